@@ -56,6 +56,9 @@ setup(
         # 'bika.magnitudefield',
     ],
     extras_require={
+        'numpy': [
+            'numpy',
+        ],
         'test': [
             'plone.app.testing',
             'plone.app.contenttypes',
@@ -65,5 +68,10 @@ setup(
     entry_points="""
     [z3c.autoinclude.plugin]
     target = plone
+
+    [console_scripts]
+    bika-ar-import = bika.lims.arimport:main
+    bika-expire-samples = bika.lims.expiry:main
+    bika-rebuild-counters = bika.lims.counters:main
     """,
 )
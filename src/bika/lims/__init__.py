@@ -4,3 +4,6 @@
 from zope.i18nmessageid import MessageFactory
 
 messagefactory = MessageFactory('bika.lims')
+
+from bika.lims import patches  # noqa: E402
+patches.apply()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from plone.app.content.namechooser import NormalizingNameChooser
+from zope.component import adapts
+from zope.container.interfaces import INameChooser
+from zope.interface import implements
+
+from bika.lims.idserver import aliquot_template
+from bika.lims.idserver import next_aliquot_id
+from bika.lims.idserver import next_sample_id
+from bika.lims.interfaces.aliquot import IAliquot
+from bika.lims.interfaces.sample import ISample
+from bika.lims.interfaces.sample import ISamplesFolder
+
+
+class SampleNameChooser(NormalizingNameChooser):
+    """New samples are named by the ID server, verbatim
+    """
+    implements(INameChooser)
+    adapts(ISamplesFolder)
+
+    def chooseName(self, name, obj):
+        if name or not ISample.providedBy(obj):
+            return super(SampleNameChooser, self).chooseName(name, obj)
+        container = self.context
+        name = next_sample_id(obj)
+        while name in container:
+            name = next_sample_id(obj)
+        return name
+
+
+class AliquotNameChooser(NormalizingNameChooser):
+    """New aliquots are named from their aliquot type's id_template
+    """
+    implements(INameChooser)
+
+    def chooseName(self, name, obj):
+        if name or not IAliquot.providedBy(obj):
+            return super(AliquotNameChooser, self).chooseName(name, obj)
+        container = self.context
+        template = aliquot_template(container, obj.aliquot_type)
+        return next_aliquot_id(container, template)
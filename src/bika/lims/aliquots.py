@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Automatic aliquots.
+
+The aliquot_types rows of a sample type with an auto_count are created in
+every new sample of that type.  All the aliquots of a sample are created
+in one step: their IDs are generated together from the compiled
+id_template of their row, they are added without per-object events and
+then indexed and counted together, in bika_catalog through the indexing
+queue.  Bulk sample imports creating tens of thousands of aliquots so do
+not pay for the add events of every aliquot.
+"""
+import logging
+from datetime import datetime
+
+from Acquisition import aq_base
+from Products.CMFCore.utils import getToolByName
+from plone.dexterity.utils import createContent
+
+from bika.lims.counters import count_added
+from bika.lims.idserver import compile_template
+from bika.lims.idserver import next_aliquot_ids
+from bika.lims.interfaces.aliquot import IAliquot
+from bika.lims.utils.bulk import add_quietly
+from bika.lims.utils.bulk import index_added
+
+logger = logging.getLogger('bika.lims.aliquots')
+
+
+def auto_aliquots(sampletype):
+    """Return (aliquot type, id_template, count) for the aliquot types of a
+    sample type that are created automatically.  Invalid id_templates are
+    replaced by the default template.
+    """
+    rows = []
+    for row in getattr(sampletype, 'aliquot_types', None) or []:
+        count = row.get('auto_count') or 0
+        if count <= 0 or not row.get('title'):
+            continue
+        template = row.get('id_template') or None
+        if template:
+            try:
+                compile_template(template)
+            except ValueError as err:
+                logger.warning("%s: %s", sampletype.getId(), err)
+                template = None
+        rows.append((row['title'], template, count))
+    return rows
+
+
+def create_aliquots(sample):
+    """Create the automatic aliquots of a new sample.  Returns the new
+    aliquots.
+    """
+    if getattr(aq_base(sample), '_aliquot_seq', 0):
+        # A copy of a sample that has its aliquots already
+        return []
+    relation = getattr(sample, 'sample_type', None)
+    sampletype = relation.to_object if relation else None
+    rows = auto_aliquots(sampletype) if sampletype is not None else []
+    if not rows:
+        return []
+    workflow = getToolByName(sample, 'portal_workflow')
+    purposes = IAliquot['purpose'].vocabulary
+    date_created = datetime.now()
+    aliquots = []
+    for aliquot_type, template, count in rows:
+        fields = {'aliquot_type': aliquot_type, 'date_created': date_created}
+        if aliquot_type in purposes:
+            fields['purpose'] = aliquot_type
+        for id in next_aliquot_ids(sample, template, count):
+            aliquot = createContent('Aliquot', **fields)
+            aliquot.id = id
+            aliquots.append(add_quietly(sample, aliquot, workflow))
+    index_added(aliquots)
+    count_added(aliquots)
+    return aliquots
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""Bulk import of Analysis Requests from CSV.
+
+Each CSV row is one Analysis Request for a new Sample.  The columns are
+
+    primary_contact   id or full name of a contact of the client
+    sample_type       id or title of a sample type
+    sample_point      id or title of a lab or client sample point (optional)
+    client_sample_id  the client's own ID for the sample (optional)
+    services          service keywords, separated by spaces, commas or
+                      semicolons
+
+The file is read as a stream, one row at a time.  Contacts, sample types,
+sample points and service keywords are resolved through maps built once
+from bika_catalog metadata, and relations point at intids that are looked
+up once per referenced object.  Every row is created inside a savepoint,
+so a bad row is rolled back and reported without affecting the others.
+Rows are processed in batches of BATCH_SIZE; bika_catalog indexing is
+queued until the end of each batch, and each batch is committed on its own,
+which keeps memory use, and so the rows-per-second rate, steady over long
+files.  The rate is logged after every batch.
+
+Use the @@ar-import view of a client, or the bika-ar-import console script.
+"""
+import argparse
+import csv
+import logging
+import re
+import sys
+import time
+
+import transaction
+from plone.app.uuid.utils import uuidToObject
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from z3c.relationfield import RelationValue
+from ZODB.POSException import ConflictError
+from zope.component import getUtility
+from zope.interface import Invalid
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.queue import getIndexQueue
+from bika.lims.idserver import format_ar_id
+from bika.lims.interfaces.contact import IClientContact
+from bika.lims.interfaces.samplepoint import ISamplePoint
+from bika.lims.interfaces.sampletype import ISampleType
+from bika.lims.keywords import keyword_map
+from bika.lims.utils.limsroot import getLims
+from bika.lims.utils.script import zope_object
+
+logger = logging.getLogger('bika.lims.arimport')
+
+BATCH_SIZE = 100
+
+KEYWORD_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+class RowError(ValueError):
+    """A CSV row cannot be imported.
+    """
+
+
+class ImportResult(object):
+    """Counters and per-row errors of an import.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+        self.started = time.time()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        """Rows per second
+        """
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'errors': [{'line': line, 'error': error}
+                       for line, error in self.errors],
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rate, 1),
+        }
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    return (value or u'').strip()
+
+
+class ARImport(object):
+    """Import Analysis Requests into a client.
+    """
+
+    def __init__(self, client, batch_size=BATCH_SIZE, commit=True):
+        self.client = client
+        self.batch_size = batch_size
+        self.commit = commit
+        self.intids = getUtility(IIntIds)
+        self._intids = {}
+
+        lims = getLims(client)
+        client_path = '/'.join(client.getPhysicalPath())
+        configuration = lims.configuration
+        self.keywords = keyword_map(client)
+        self.contacts = self._lookup(IClientContact, client_path)
+        self.sampletypes = self._lookup(
+            ISampleType, '/'.join(configuration.sampletypes.getPhysicalPath()))
+        self.samplepoints = self._lookup(
+            ISamplePoint,
+            ['/'.join(configuration.samplepoints.getPhysicalPath()),
+             client_path])
+
+    def _lookup(self, iface, path):
+        """Map the ids and lower-cased titles of the objects providing iface
+        under path to their UIDs.
+        """
+        catalog = getBikaCatalog(self.client)
+        mapping = {}
+        for proxy in catalog(object_provides=iface.__identifier__, path=path):
+            mapping[proxy.getId] = proxy.UID
+            if proxy.Title:
+                mapping.setdefault(_text(proxy.Title).lower(), proxy.UID)
+        return mapping
+
+    def _resolve(self, mapping, value, name):
+        value = _text(value)
+        uid = mapping.get(value) or mapping.get(value.lower())
+        if uid is None:
+            raise RowError(u"Unknown %s: %s" % (name, value))
+        return uid
+
+    def relation(self, uid):
+        """Return a new RelationValue pointing at the object with uid.
+        """
+        intid = self._intids.get(uid)
+        if intid is None:
+            intid = self._intids[uid] = self.intids.getId(uuidToObject(uid))
+        return RelationValue(intid)
+
+    def import_row(self, row):
+        """Create the Sample and Analysis Request of one CSV row, and return
+        the Analysis Request.
+        """
+        contact = self._resolve(self.contacts, row.get('primary_contact'),
+                                u"contact")
+        sampletype = self._resolve(self.sampletypes, row.get('sample_type'),
+                                   u"sample type")
+        samplepoint = None
+        if _text(row.get('sample_point')):
+            samplepoint = self._resolve(self.samplepoints,
+                                        row.get('sample_point'),
+                                        u"sample point")
+        keywords = [keyword for keyword in
+                    KEYWORD_SEPARATORS.split(_text(row.get('services')))
+                    if keyword]
+        if not keywords:
+            raise RowError(u"No services requested")
+        services = []
+        for keyword in keywords:
+            services.append(self._resolve(self.keywords, keyword,
+                                          u"service keyword"))
+
+        sample = createContent(
+            'Sample',
+            sample_type=self.relation(sampletype),
+            sample_point=samplepoint and self.relation(samplepoint),
+            client_sample_id=_text(row.get('client_sample_id')) or None)
+        sample = addContentToContainer(self.client.samples, sample,
+                                       checkConstraints=False)
+        ar = createContent(
+            'AnalysisRequest',
+            primary_contact=self.relation(contact),
+            sample=RelationValue(self.intids.getId(sample)),
+            services=[self.relation(uid) for uid in services])
+        ar.id = format_ar_id(sample.getId(), 1)
+        return addContentToContainer(self.client.analysisrequests, ar,
+                                     checkConstraints=False)
+
+    def run(self, stream):
+        """Import the rows of a CSV file object.  Returns an ImportResult.
+        """
+        result = ImportResult()
+        reader = csv.DictReader(stream)
+        batch = []
+        for row in reader:
+            batch.append((reader.line_num, row))
+            if len(batch) >= self.batch_size:
+                self._run_batch(batch, result)
+                batch = []
+        if batch:
+            self._run_batch(batch, result)
+        result.elapsed = time.time() - result.started
+        logger.info("Imported %s of %s rows into %s in %.1fs (%.1f rows/s)",
+                    result.created, result.rows,
+                    '/'.join(self.client.getPhysicalPath()),
+                    result.elapsed, result.rate)
+        return result
+
+    def _run_batch(self, batch, result):
+        """Import and commit one batch of rows.  Rows with bad values, which
+        raise a ValueError, a KeyError or a schema validation error, are
+        rolled back and reported.  A conflict while importing or committing
+        rolls back the whole batch, whose rows are reported as errors,
+        rather than retrying rows that may already exist.
+        """
+        created = 0
+        errors = []
+        try:
+            for line, row in batch:
+                savepoint = transaction.savepoint(optimistic=True)
+                queue = getIndexQueue()
+                mark = queue.mark() if queue is not None else None
+                try:
+                    self.import_row(row)
+                except (RowError, ValueError, KeyError, Invalid) as err:
+                    savepoint.rollback()
+                    if queue is not None:
+                        queue.rollback(mark)
+                    errors.append((line, u"%s" % (err,)))
+                else:
+                    created += 1
+            if self.commit:
+                transaction.get().note(u"bika.lims: AR import, %s rows" %
+                                       (result.rows + len(batch)))
+                transaction.commit()
+        except ConflictError:
+            transaction.abort()
+            created = 0
+            errors = [(line, u"Database conflict, row not imported")
+                      for line, row in batch]
+        result.rows += len(batch)
+        result.created += created
+        result.errors.extend(errors)
+        result.elapsed = time.time() - result.started
+        logger.info("AR import: %s rows, %s errors, %.1f rows/s",
+                    result.rows, len(result.errors), result.rate)
+
+
+def main(argv=None):
+    """Import Analysis Requests from a CSV file into a client, e.g.
+
+        bin/bika-ar-import parts/instance/etc/zope.conf \\
+            /Plone/lims/clients/client-1 requests.csv
+    """
+    parser = argparse.ArgumentParser(
+        description="Import Analysis Requests from a CSV file.")
+    parser.add_argument('zope_conf', help="Path of the instance's zope.conf")
+    parser.add_argument('client', help="Physical path of the client")
+    parser.add_argument('csvfile', help="CSV file to import")
+    parser.add_argument('--user', default='admin',
+                        help="Zope root user to import as")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="Rows per transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        client = zope_object(args.zope_conf, args.client, args.user)
+    except ValueError as err:
+        parser.error(str(err))
+
+    with open(args.csvfile, 'rb') as stream:
+        result = ARImport(client, batch_size=args.batch_size).run(stream)
+    for line, error in result.errors:
+        sys.stderr.write("line %s: %s\n" % (line, error.encode('utf-8')))
+    return 1 if result.errors else 0
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import json
+
+from plone.protect import CheckAuthenticator
+from Products.Five import BrowserView
+from zExceptions import Forbidden
+
+from bika.lims.arimport import ARImport
+
+
+class ARImportView(BrowserView):
+    """Import Analysis Requests from the CSV file uploaded as `csvfile`,
+    with the form's `_authenticator`.  Returns the import report as JSON.
+
+    The import commits batches before the response is sent, which the
+    automatic CSRF protection of plone.protect cannot roll back, so the
+    authenticator is checked before anything is imported.
+    """
+
+    def __call__(self):
+        response = self.request.response
+        response.setHeader('Content-Type', 'application/json')
+        upload = self.request.form.get('csvfile')
+        if self.request.method != 'POST' or not upload:
+            response.setStatus(400)
+            return json.dumps({'error': 'POST a CSV file as csvfile'})
+        try:
+            CheckAuthenticator(self.request)
+        except Forbidden:
+            response.setStatus(403)
+            return json.dumps({'error': 'Invalid authenticator'})
+        upload.seek(0)
+        result = ARImport(self.context).run(iter(upload.readline, b''))
+        return json.dumps(result.as_dict())
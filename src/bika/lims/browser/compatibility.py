@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import json
+
+from Products.Five import BrowserView
+
+from bika.lims.clientsecurity import client_user
+from bika.lims.clientsecurity import context_client
+from bika.lims.compatibility import compatibility_map
+
+
+class CompatibilityView(BrowserView):
+    """Sample points allowed for the sample type UID passed as
+    `sample_type`, or sample types allowed for the sample point UID passed
+    as `sample_point`, as JSON lists of {UID, title}.  Client users only
+    get the sample points of the lab and of their own clients, and inside a
+    client, other clients' sample points are left out.
+    """
+
+    def clients(self):
+        """Return the UIDs of the clients whose sample points may be listed
+        besides the lab's, or None for all of them.
+        """
+        clients = client_user(self.context)
+        client = context_client(self.context)
+        if client is None:
+            return clients
+        if clients is None:
+            return frozenset([client])
+        return clients & frozenset([client])
+
+    def __call__(self):
+        response = self.request.response
+        response.setHeader('Content-Type', 'application/json')
+        form = self.request.form
+        mapping = compatibility_map(self.context)
+        if form.get('sample_type'):
+            key = 'sample_points'
+            uids = mapping.allowed_points(form['sample_type'], self.clients())
+        elif form.get('sample_point'):
+            key = 'sample_types'
+            uids = mapping.allowed_types(form['sample_point'])
+        else:
+            response.setStatus(400)
+            return json.dumps({'error': 'Pass sample_type or sample_point'})
+        return json.dumps({key: [{'UID': uid, 'title': mapping.titles[uid]}
+                                 for uid in uids]})
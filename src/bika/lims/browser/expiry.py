@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import json
+
+from plone.protect import CheckAuthenticator
+from Products.Five import BrowserView
+from zExceptions import Forbidden
+
+from bika.lims.expiry import expire_samples
+
+
+class ExpireSamplesView(BrowserView):
+    """Expire the samples of the LIMS whose retention period is over, in
+    batches with a commit after each, on a POST with the form's
+    `_authenticator`.  Returns the number of expired samples as JSON.
+
+    Scheduled runs, which have no authenticator, use the
+    bika-expire-samples script instead.
+    """
+
+    def __call__(self):
+        response = self.request.response
+        response.setHeader('Content-Type', 'application/json')
+        if self.request.method != 'POST':
+            response.setStatus(400)
+            return json.dumps({'error': 'POST to expire samples'})
+        try:
+            CheckAuthenticator(self.request)
+        except Forbidden:
+            response.setStatus(403)
+            return json.dumps({'error': 'Invalid authenticator'})
+        return json.dumps({'expired': expire_samples(self.context)})
@@ -1,5 +1,14 @@
 # -*- coding: utf-8 -*-
+import json
+
+from plone.protect import CheckAuthenticator
 from Products.Five import BrowserView
+from zExceptions import Forbidden
+
+from bika.lims import counters
+from bika.lims import messagefactory as _
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.workflow.definitions import AR_WORKFLOW
 
 
 # from bika.lims import messagefactory as _
@@ -55,5 +64,56 @@ from Products.Five import BrowserView
 
 
 class ViewView(BrowserView):
-    """LIMS front page.
+    """LIMS front page, with the dashboard counters.
     """
+
+    def samples(self):
+        return counters.value(self.context, counters.SAMPLES)
+
+    def received_today(self):
+        return counters.value(self.context,
+                              counters.RECEIVED % counters.today())
+
+    def expired(self):
+        return counters.value(self.context, counters.EXPIRED)
+
+    def ar_states(self):
+        """(state title, count) of the Analysis Requests, in workflow
+        order
+        """
+        counts = counters.values(self.context, counters.AR_STATE % '')
+        return [(title, counts.get(state, 0))
+                for state, title in AR_WORKFLOW.states]
+
+    def departments(self):
+        """(department title, count) of the aliquots, by title
+        """
+        counts = dict((uid, count) for uid, count in counters.values(
+            self.context, counters.DEPARTMENT % '').items() if count)
+        titles = {}
+        uids = [uid for uid in counts if uid]
+        if uids:
+            catalog = getBikaCatalog(self.context)
+            titles = dict((proxy.UID, proxy.Title)
+                          for proxy in catalog(UID=uids))
+        return sorted((titles.get(uid) or _(u"No department"), count)
+                      for uid, count in counts.items())
+
+
+class RebuildCountersView(BrowserView):
+    """Recompute the dashboard counters from bika_catalog, on a POST with
+    the form's `_authenticator`.  Returns them as JSON.
+    """
+
+    def __call__(self):
+        response = self.request.response
+        response.setHeader('Content-Type', 'application/json')
+        if self.request.method != 'POST':
+            response.setStatus(400)
+            return json.dumps({'error': 'POST to rebuild the counters'})
+        try:
+            CheckAuthenticator(self.request)
+        except Forbidden:
+            response.setStatus(403)
+            return json.dumps({'error': 'Invalid authenticator'})
+        return json.dumps(counters.rebuild(self.context), sort_keys=True)
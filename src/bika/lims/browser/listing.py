@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import json
+
+from Products.Five import BrowserView
+
+from bika.lims.listing import FILTERS
+from bika.lims.listing import LIMIT
+from bika.lims.listing import Listing
+from bika.lims.listing import ListingError
+
+
+class ListingView(BrowserView):
+    """One page of the samples, aliquots or Analysis Requests, passed as
+    `type`, as JSON, streamed item by item.  Takes the FILTERS of
+    bika.lims.listing, `sort_on`, `sort_order` (ascending or descending),
+    `limit` and the `cursor` that the previous page returned as `next`.
+    """
+
+    def listing(self):
+        form = self.request.form
+        try:
+            limit = int(form.get('limit') or LIMIT)
+        except ValueError:
+            raise ListingError(u"limit must be a number")
+        filters = dict((name, form[name]) for name in FILTERS
+                       if form.get(name))
+        return Listing(self.context, form.get('type'), filters,
+                       sort_on=form.get('sort_on') or 'id',
+                       reverse=form.get('sort_order') == 'descending',
+                       limit=limit, cursor=form.get('cursor'))
+
+    def __call__(self):
+        response = self.request.response
+        response.setHeader('Content-Type', 'application/json')
+        try:
+            listing = self.listing()
+        except ListingError as err:
+            response.setStatus(400)
+            return json.dumps({'error': err.args[0]})
+        response.write('{"items": [')
+        separator = ''
+        for item in listing:
+            response.write(separator + json.dumps(item))
+            separator = ', '
+        response.write('], "next": %s}' % json.dumps(listing.next_cursor))
+        return ''
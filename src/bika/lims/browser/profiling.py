@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import json
+
+from Products.Five import BrowserView
+
+from bika.lims import profiling
+
+
+class ProfileView(BrowserView):
+    """Percentiles of the catalog queries, ZODB loads and stores, and
+    subscriber and vocabulary times of the recent requests, as JSON.
+    POST `clear` to start over.
+    """
+
+    def __call__(self):
+        request = self.request
+        request.response.setHeader('Content-Type', 'application/json')
+        if request.get('REQUEST_METHOD') == 'POST' and 'clear' in request.form:
+            profiling.clear()
+        return json.dumps(profiling.summary(), indent=2, sort_keys=True)
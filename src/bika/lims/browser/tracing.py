@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import json
+
+from Products.Five import BrowserView
+
+from bika.lims import tracing
+
+
+class TracingView(BrowserView):
+    """Histograms of the recent invocations of the traced add subscribers,
+    as JSON.  POST `clear` to start over.
+    """
+
+    def __call__(self):
+        request = self.request
+        request.response.setHeader('Content-Type', 'application/json')
+        if request.get('REQUEST_METHOD') == 'POST' and 'clear' in request.form:
+            tracing.clear()
+        return json.dumps({'enabled': tracing.threshold is not None,
+                           'threshold': tracing.threshold,
+                           'buckets_ms': tracing.BUCKETS,
+                           'handlers': tracing.histograms()},
+                          indent=2, sort_keys=True)
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import json
+
+from Products.Five import BrowserView
+
+from bika.lims.vocabularies import cache
+
+
+class VocabularyCacheInfo(BrowserView):
+    """Hit/miss counters of the shared vocabulary cache, as JSON.
+    """
+
+    def __call__(self):
+        self.request.response.setHeader('Content-Type', 'application/json')
+        return json.dumps(cache.cache_info())
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import json
+
+from plone.protect import CheckAuthenticator
+from Products.Five import BrowserView
+from zExceptions import Forbidden
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.workflow.engine import bulk_transition
+
+
+class BulkTransitionView(BrowserView):
+    """Do the transition POSTed as `transition` on the objects whose UIDs
+    are POSTed as `uids`, with the form's `_authenticator`.  Returns the
+    UIDs of the objects that were moved and the reasons the others were
+    not, as JSON.
+
+    The authenticator is checked explicitly rather than left to the
+    automatic CSRF protection of plone.protect, so that a forged request
+    is refused before any object is touched.
+    """
+
+    def __call__(self):
+        response = self.request.response
+        response.setHeader('Content-Type', 'application/json')
+        form = self.request.form
+        transition = form.get('transition')
+        uids = form.get('uids') or []
+        if isinstance(uids, basestring):
+            uids = [uids]
+        if self.request.method != 'POST' or not transition or not uids:
+            response.setStatus(400)
+            return json.dumps({'error': 'POST a transition and uids'})
+        try:
+            CheckAuthenticator(self.request)
+        except Forbidden:
+            response.setStatus(403)
+            return json.dumps({'error': 'Invalid authenticator'})
+        catalog = getBikaCatalog(self.context)
+        proxies = catalog(UID=uids,
+                          path='/'.join(self.context.getPhysicalPath()))
+        objects = [proxy.getObject() for proxy in proxies]
+        result = bulk_transition(objects, transition)
+        found = set(proxy.UID for proxy in proxies)
+        skipped = dict((uid, u"Not found") for uid in uids
+                       if uid not in found)
+        for obj, reason in result.skipped:
+            skipped[obj.UID()] = reason
+        return json.dumps({
+            'transition': transition,
+            'done': [obj.UID() for obj in result.done],
+            'skipped': skipped,
+        })
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Batch evaluation of a formula for many analyses.
+
+Instrument imports and bulk result entry deliver hundreds of results for
+the same calculation.  evaluate_batch() takes one column of values per
+variable and evaluates the formula for all rows at once.  When numpy is
+installed and the formula only uses operations whose numpy equivalents give
+the same results (see formula.VECTOR_FUNCTIONS), the formula's code object
+is evaluated once with numpy arrays bound to its variables.  Otherwise, and
+for rows whose vectorized result is not a finite number, the formula is
+evaluated row by row, so both paths give identical results and errors.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from bika.lims.calculation.formula import CONSTANTS
+from bika.lims.calculation.formula import FormulaError
+
+if numpy is not None:
+    _vector_globals = {
+        '__builtins__': {},
+        'abs': numpy.absolute,
+        'ceil': numpy.ceil,
+        'floor': numpy.floor,
+        'sqrt': numpy.sqrt,
+        'min': numpy.minimum,
+        'max': numpy.maximum,
+    }
+    _vector_globals.update(CONSTANTS)
+
+
+def evaluate_batch(formula, columns):
+    """Evaluate a Formula for every row of columns, a mapping of variable
+    names to equally long sequences of values.  Variables without a column
+    take the formula's default.
+
+    Returns (results, errors): the list of results, with None for rows that
+    could not be evaluated, and a mapping of those rows to error messages.
+    """
+    columns = dict((variable, columns[variable])
+                   for variable in formula.variables if variable in columns)
+    sizes = set(len(column) for column in columns.values())
+    if len(sizes) > 1:
+        raise ValueError("Columns differ in length")
+    size = sizes.pop() if sizes else 1
+    results = [None] * size
+    errors = {}
+    vector = None
+    if numpy is not None and formula.vectorizable:
+        try:
+            vector = _evaluate_vector(formula, columns, size)
+        except (ArithmeticError, TypeError, ValueError):
+            vector = None
+    if vector is None:
+        rows = range(size)
+    else:
+        values, recheck = vector
+        results = values.tolist()
+        rows = numpy.flatnonzero(recheck).tolist()
+    _evaluate_rows(formula, columns, rows, results, errors)
+    return results, errors
+
+
+def _evaluate_rows(formula, columns, rows, results, errors):
+    for row in rows:
+        values = dict((variable, column[row])
+                      for variable, column in columns.items())
+        try:
+            results[row] = formula(values)
+        except FormulaError as err:
+            results[row] = None
+            errors[row] = err.args[0]
+
+
+def _floats(column, size):
+    """Return a column as a float array, and the mask of the rows whose
+    value is not a number.
+    """
+    try:
+        return (numpy.asarray(column, dtype=float),
+                numpy.zeros(size, dtype=bool))
+    except (OverflowError, TypeError, ValueError):
+        pass
+    values = numpy.zeros(size, dtype=float)
+    invalid = numpy.zeros(size, dtype=bool)
+    for row, value in enumerate(column):
+        try:
+            values[row] = float(value)
+        except (OverflowError, TypeError, ValueError):
+            invalid[row] = True
+    return values, invalid
+
+
+def _evaluate_vector(formula, columns, size):
+    """Evaluate a vectorizable formula on whole columns.  Returns the
+    results and the mask of the rows to evaluate again one by one, or None
+    if a default value is missing or not a number.
+    """
+    namespace = {}
+    recheck = numpy.zeros(size, dtype=bool)
+    for name, variable in zip(formula.names, formula.variables):
+        if variable in columns:
+            namespace[name], invalid = _floats(columns[variable], size)
+            recheck |= invalid
+        elif variable in formula.defaults:
+            try:
+                namespace[name] = float(formula.defaults[variable])
+            except (TypeError, ValueError):
+                return None
+        else:
+            return None
+    with numpy.errstate(all='ignore'):
+        result = eval(formula.code, _vector_globals, namespace)
+    result = numpy.broadcast_to(numpy.asarray(result, dtype=float), (size,))
+    return result, recheck | ~numpy.isfinite(result)
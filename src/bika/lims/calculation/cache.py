@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Compiled formulas, cached per calculation.
+
+Entries are keyed by the calculation's UID and remember the formula text and
+interim field defaults they were compiled from, so a calculation edited in
+another ZEO client is recompiled on first use here.  The Modified subscriber
+drops the entry as soon as a calculation is edited in this process.
+Formula objects hold no persistent references and can be shared between
+threads.
+"""
+from threading import Lock
+
+from plone.uuid.interfaces import IUUID
+
+from bika.lims.calculation.formula import Formula
+
+_lock = Lock()
+_formulas = {}
+
+
+def interim_defaults(calculation):
+    """Return the default values of a calculation's interim fields.
+    """
+    defaults = {}
+    for row in getattr(calculation, 'interim_fields', None) or []:
+        field_id = (row.get('field_id') or u'').strip()
+        default = row.get('field_default')
+        if field_id and default not in (None, u''):
+            defaults[field_id] = default
+    return defaults
+
+
+def getFormula(calculation):
+    """Return the compiled Formula of a calculation.
+    """
+    source = calculation.formula
+    defaults = interim_defaults(calculation)
+    uid = IUUID(calculation, None)
+    if uid is None:
+        return Formula(source, defaults)
+    formula = _formulas.get(uid)
+    if formula is None or formula.source != source or \
+            formula.defaults != defaults:
+        formula = Formula(source, defaults)
+        with _lock:
+            _formulas[uid] = formula
+    return formula
+
+
+def invalidate(calculation):
+    """Drop the compiled formula of a calculation.
+    """
+    with _lock:
+        _formulas.pop(IUUID(calculation, None), None)
+
+
+def clear():
+    with _lock:
+        _formulas.clear()
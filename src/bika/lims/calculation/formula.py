@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Calculation formulas.
+
+Formulas are arithmetic expressions in which interim fields and analysis
+service keywords are referenced in square brackets, e.g.
+
+    ([Ca] * 2.497) + ([Mg] * 4.118)
+
+A formula is parsed once into a Python expression AST, checked against a
+whitelist of node types and functions, and compiled to a code object.
+Evaluating it is then a single eval() of that code object, with the
+referenced values bound as local variables.  Division is always true
+division and every number is a float, so results do not depend on whether
+values were entered as integers.
+"""
+import __future__
+import ast
+import math
+import re
+
+VARIABLE = re.compile(r'\[([^\[\]]+)\]')
+
+FUNCTIONS = {
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'round': round,
+    'ceil': math.ceil,
+    'exp': math.exp,
+    'floor': math.floor,
+    'log': math.log,
+    'log10': math.log10,
+    'pow': math.pow,
+    'sqrt': math.sqrt,
+}
+
+CONSTANTS = {
+    'e': math.e,
+    'pi': math.pi,
+}
+
+_ALLOWED_NODES = tuple(getattr(ast, name) for name in (
+    'Expression', 'Load',
+    'BinOp', 'UnaryOp', 'BoolOp', 'Compare', 'IfExp', 'Call',
+    'Name', 'Num', 'Constant',
+    'Add', 'Sub', 'Mult', 'Div', 'FloorDiv', 'Mod', 'Pow',
+    'UAdd', 'USub', 'Not', 'And', 'Or',
+    'Eq', 'NotEq', 'Lt', 'LtE', 'Gt', 'GtE',
+) if hasattr(ast, name))
+
+# Functions, with their number of arguments, and nodes that have numpy
+# equivalents giving the same results as the scalar path.  Formulas made of
+# these only can be evaluated on whole columns of values at once.
+VECTOR_FUNCTIONS = {
+    'abs': 1,
+    'ceil': 1,
+    'floor': 1,
+    'sqrt': 1,
+    'min': 2,
+    'max': 2,
+}
+
+_VECTOR_NODES = tuple(getattr(ast, name) for name in (
+    'Expression', 'Load', 'BinOp', 'UnaryOp', 'Call', 'Name', 'Num',
+    'Constant', 'Add', 'Sub', 'Mult', 'Div', 'FloorDiv', 'Mod', 'UAdd',
+    'USub',
+) if hasattr(ast, name))
+
+_FLAGS = __future__.division.compiler_flag
+
+_globals = {'__builtins__': {}}
+_globals.update(FUNCTIONS)
+_globals.update(CONSTANTS)
+
+
+class FormulaError(ValueError):
+    """A formula could not be compiled or evaluated.
+    """
+
+
+class _Floats(ast.NodeTransformer):
+    """Turn every numeric literal into a float.
+    """
+
+    def visit_Num(self, node):
+        if isinstance(node.n, bool) or not isinstance(node.n, (int, long,
+                                                               float)):
+            raise FormulaError(u"Invalid number %r" % (node.n,))
+        return ast.copy_location(ast.Num(n=float(node.n)), node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or \
+                not isinstance(node.value, (int, float)):
+            raise FormulaError(u"Invalid constant %r" % (node.value,))
+        return ast.copy_location(ast.Constant(value=float(node.value)), node)
+
+
+class Formula(object):
+    """A compiled formula.
+
+    `variables` are the bracketed names in order of first use, `defaults`
+    the values to use for variables that are not passed in.
+    """
+
+    def __init__(self, source, defaults=None):
+        self.source = source
+        self.defaults = dict(defaults or {})
+        self.variables, self.names, tree = parse(source)
+        self.code = compile(tree, '<formula>', 'eval', _FLAGS, True)
+        self.vectorizable = vectorizable(tree)
+
+    def bind(self, values):
+        """Return the eval() locals for a mapping of variable values.
+        """
+        namespace = {}
+        for name, variable in zip(self.names, self.variables):
+            if variable in values:
+                value = values[variable]
+            elif variable in self.defaults:
+                value = self.defaults[variable]
+            else:
+                raise FormulaError(u"No value for [%s]" % variable)
+            try:
+                namespace[name] = float(value)
+            except (TypeError, ValueError):
+                raise FormulaError(
+                    u"Value of [%s] is not a number: %r" % (variable, value))
+        return namespace
+
+    def __call__(self, values):
+        """Evaluate the formula for a mapping of variable values.
+        """
+        try:
+            return float(eval(self.code, _globals, self.bind(values)))
+        except (ArithmeticError, TypeError, ValueError) as err:
+            if isinstance(err, FormulaError):
+                raise
+            raise FormulaError(u"%s: %s" % (self.source, err))
+
+
+def parse(source):
+    """Parse and validate a formula.  Returns its variables, the Python
+    names they are bound to and the expression tree.
+    """
+    variables, expression = translate(source)
+    names = tuple('_v%s' % x for x in range(len(variables)))
+    return variables, names, parse_expression(expression, names)
+
+
+def translate(source):
+    """Replace the bracketed variables of a formula by Python names.
+    Returns the variables, in order of first use, and the expression.
+    """
+    variables = []
+
+    def name(match):
+        variable = match.group(1).strip()
+        if variable not in variables:
+            variables.append(variable)
+        return ' _v%s ' % variables.index(variable)
+
+    expression = VARIABLE.sub(name, source or u'').strip()
+    if not expression:
+        raise FormulaError(u"Empty formula")
+    return tuple(variables), expression
+
+
+def parse_expression(expression, names):
+    """Parse and validate an expression and return its tree.
+    Only arithmetic, comparisons, conditionals, the given variable names
+    and the whitelisted FUNCTIONS and CONSTANTS are accepted.
+    """
+    try:
+        tree = ast.parse(expression.replace(u'\n', u' '), mode='eval')
+    except SyntaxError as err:
+        raise FormulaError(u"Invalid formula: %s" % err)
+    allowed = set(names) | set(CONSTANTS)
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(
+                u"%s is not allowed in formulas" % type(node).__name__)
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or \
+                    node.func.id not in FUNCTIONS:
+                raise FormulaError(u"Unknown function in formula")
+            if node.keywords or getattr(node, 'starargs', None) or \
+                    getattr(node, 'kwargs', None):
+                raise FormulaError(u"Only positional arguments are allowed")
+        elif isinstance(node, ast.Name) and node.id not in allowed and \
+                node.id not in FUNCTIONS:
+            raise FormulaError(u"Unknown name %s in formula" % node.id)
+    return ast.fix_missing_locations(_Floats().visit(tree))
+
+
+def vectorizable(tree):
+    """Return True if a validated expression tree only uses operations
+    that can be applied to numpy arrays with the same results.
+    """
+    for node in ast.walk(tree):
+        if not isinstance(node, _VECTOR_NODES):
+            return False
+        if isinstance(node, ast.Call) and \
+                VECTOR_FUNCTIONS.get(node.func.id) != len(node.args):
+            return False
+    return True
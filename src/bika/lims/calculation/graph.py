@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Dependency graph of the calculated analysis services of a LIMS.
+
+Every analysis service is a node, named by its keyword.  A service with a
+calculation depends on the services whose keywords appear in the formula
+(other than the calculation's interim fields) and on the calculation's
+dependent_services.  The graph is built once per LIMS and configuration
+version and kept in memory; it holds keywords and compiled formulas only,
+no persistent objects.  When results change, only the calculated services
+downstream of them are evaluated again, in topological order.
+"""
+from threading import Lock
+
+from plone.app.uuid.utils import uuidToObject
+from plone.uuid.interfaces import IUUID
+
+from bika.lims.calculation.cache import getFormula
+from bika.lims.calculation.formula import FormulaError
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.interfaces.analysisservice import IAnalysisService
+from bika.lims.utils.configversion import getConfigVersion
+from bika.lims.utils.limsroot import getLims
+
+_lock = Lock()
+_graphs = {}
+
+
+class CycleError(ValueError):
+    """Calculations depend on each other in a cycle.
+    """
+
+    def __init__(self, keywords):
+        ValueError.__init__(
+            self, u"Circular dependency between %s" % u", ".join(keywords))
+        self.keywords = keywords
+
+
+def toposort(upstream):
+    """Return the nodes of a mapping of node to upstream nodes, each after
+    all of its upstream nodes.  Raises CycleError for cycles.
+    """
+    pending = dict((node, set(up)) for node, up in upstream.items())
+    for up in upstream.values():
+        for node in up:
+            pending.setdefault(node, set())
+    downstream = dict((node, []) for node in pending)
+    for node, up in pending.items():
+        for parent in up:
+            downstream[parent].append(node)
+    ready = sorted(node for node, up in pending.items() if not up)
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for child in downstream[node]:
+            pending[child].discard(node)
+            if not pending[child]:
+                ready.append(child)
+    if len(order) < len(pending):
+        # Drop the nodes that are only blocked by a cycle, not part of one
+        cycle = set(pending) - set(order)
+        pruned = True
+        while pruned:
+            pruned = [node for node in cycle
+                      if not cycle.intersection(downstream[node])]
+            cycle.difference_update(pruned)
+        raise CycleError(sorted(cycle))
+    return order
+
+
+def resolve(value):
+    """Return the object of a relation, UID or object value.
+    """
+    if value is None:
+        return None
+    if hasattr(value, 'to_object'):
+        return value.to_object
+    if isinstance(value, basestring):
+        return uuidToObject(value)
+    return value
+
+
+def calculation_inputs(calculation, formula=None, dependent_services=None):
+    """Return the keywords of the services a calculation depends on.
+    formula and dependent_services default to the calculation's own.
+    """
+    if formula is None:
+        formula = getFormula(calculation)
+    if dependent_services is None:
+        dependent_services = getattr(calculation, 'dependent_services', None)
+    interims = set((row.get('field_id') or u'').strip()
+                   for row in getattr(calculation, 'interim_fields', None)
+                   or [])
+    inputs = [variable for variable in formula.variables
+              if variable not in interims]
+    for value in dependent_services or []:
+        service = resolve(value)
+        keyword = getattr(service, 'keyword', None)
+        if keyword and keyword not in inputs:
+            inputs.append(keyword)
+    return tuple(inputs)
+
+
+class DependencyGraph(object):
+    """Services keyed by keyword, with the formula and upstream keywords
+    of the calculated ones.
+    """
+
+    def __init__(self, nodes):
+        """nodes maps keywords to (calculation UID, formula, upstream
+        keywords); calculation UID and formula are None for services
+        without a calculation.
+        """
+        self.nodes = nodes
+        self.order = toposort(dict((keyword, node[2])
+                                   for keyword, node in nodes.items()))
+        self.position = dict((keyword, x)
+                             for x, keyword in enumerate(self.order))
+        self.downstream = dict((keyword, []) for keyword in self.order)
+        for keyword, node in nodes.items():
+            for parent in node[2]:
+                self.downstream[parent].append(keyword)
+
+    def dirty(self, changed):
+        """Return the calculated services downstream of the changed
+        keywords, in the order they must be evaluated.
+        """
+        found = set()
+        todo = [keyword for keyword in changed if keyword in self.downstream]
+        while todo:
+            for child in self.downstream[todo.pop()]:
+                if child not in found:
+                    found.add(child)
+                    todo.append(child)
+        return sorted((keyword for keyword in found
+                       if self.nodes.get(keyword, (None, None))[1]),
+                      key=self.position.get)
+
+    def recalculate(self, results, changed, interims=None):
+        """Evaluate the services downstream of the changed keywords.
+
+        results maps keywords to result values and is updated in place,
+        interims maps keywords to the interim field values of their
+        analyses.  Returns the keywords that were evaluated, in order, and
+        a mapping of the ones that failed to error messages; their results
+        are set to None.
+        """
+        interims = interims or {}
+        errors = {}
+        dirty = self.dirty(changed)
+        for keyword in dirty:
+            formula = self.nodes[keyword][1]
+            values = dict(results)
+            values.update(interims.get(keyword) or {})
+            try:
+                results[keyword] = formula(values)
+            except FormulaError as err:
+                results[keyword] = None
+                errors[keyword] = err.args[0]
+        return dirty, errors
+
+
+def service_nodes(lims):
+    """Return the graph nodes of the analysis services of a LIMS.  The
+    graph is shared by all users, so every service is included, whether
+    the current user may view it or not.
+    """
+    catalog = getBikaCatalog(lims)
+    nodes = {}
+    for proxy in catalog.unrestrictedSearchResults(
+            object_provides=IAnalysisService.__identifier__,
+            path='/'.join(lims.getPhysicalPath())):
+        service = proxy._unrestrictedGetObject()
+        if not service.keyword:
+            continue
+        calculation = resolve(getattr(service, 'calculation', None))
+        if calculation is None:
+            nodes[service.keyword] = (None, None, ())
+            continue
+        formula = getFormula(calculation)
+        nodes[service.keyword] = (IUUID(calculation), formula,
+                                  calculation_inputs(calculation, formula))
+    return nodes
+
+
+def getDependencyGraph(context):
+    """Return the dependency graph of the LIMS containing context, built
+    once per configuration version.
+    """
+    lims = getLims(context)
+    key = lims.getPhysicalPath()
+    version = getConfigVersion(lims)
+    entry = _graphs.get(key)
+    if entry is not None and version is not None and entry[0] == version:
+        return entry[1]
+    graph = DependencyGraph(service_nodes(lims))
+    if version is not None:
+        with _lock:
+            _graphs[key] = (version, graph)
+    return graph
+
+
+def graph_nodes(context):
+    """Return the graph nodes of the LIMS containing context, even while
+    its configuration has a cycle.
+    """
+    try:
+        return dict(getDependencyGraph(context).nodes)
+    except CycleError:
+        return service_nodes(getLims(context))
+
+
+def check_cycles(context, replace):
+    """Raise CycleError if the dependency graph of the LIMS would have a
+    cycle after the nodes in replace, a mapping of keywords to nodes, are
+    changed.
+    """
+    nodes = graph_nodes(context)
+    nodes.update(replace)
+    toposort(dict((keyword, node[2]) for keyword, node in nodes.items()))
+
+
+def clear():
+    with _lock:
+        _graphs.clear()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Form validators that keep keywords unique and the calculation
+dependency graph acyclic.
+"""
+from plone.uuid.interfaces import IUUID
+from z3c.form import validator
+from zope.interface import Invalid
+
+from bika.lims import messagefactory as _
+from bika.lims.calculation.cache import getFormula
+from bika.lims.calculation.formula import Formula
+from bika.lims.calculation.graph import CycleError
+from bika.lims.calculation.graph import calculation_inputs
+from bika.lims.calculation.graph import check_cycles
+from bika.lims.calculation.graph import graph_nodes
+from bika.lims.calculation.graph import resolve
+from bika.lims.interfaces.analysisservice import IAnalysisService
+from bika.lims.interfaces.calculation import ICalculation
+from bika.lims.keywords import keyword_uids
+
+
+def _check_calculation(calculation, formula, inputs):
+    """Raise Invalid if giving calculation formula and inputs would make
+    the services using it depend on themselves.
+    """
+    uid = IUUID(calculation, None)
+    replace = {}
+    for keyword, node in graph_nodes(calculation).items():
+        if uid is not None and node[0] == uid:
+            replace[keyword] = (uid, formula, inputs)
+    try:
+        check_cycles(calculation, replace)
+    except CycleError as err:
+        raise Invalid(err.args[0])
+
+
+class FormulaValidator(validator.SimpleFieldValidator):
+    """Reject a formula that would make the services using this
+    calculation depend on themselves.
+    """
+
+    def validate(self, value):
+        super(FormulaValidator, self).validate(value)
+        calculation = self.context
+        if value is None or not ICalculation.providedBy(calculation):
+            return
+        formula = Formula(value)
+        _check_calculation(calculation, formula,
+                           calculation_inputs(calculation, formula))
+
+
+class DependentServicesValidator(validator.SimpleFieldValidator):
+    """Reject dependent services that would make the services using this
+    calculation depend on themselves.
+    """
+
+    def validate(self, value):
+        super(DependentServicesValidator, self).validate(value)
+        calculation = self.context
+        if value is None or not ICalculation.providedBy(calculation):
+            return
+        formula = getFormula(calculation)
+        _check_calculation(calculation, formula,
+                           calculation_inputs(calculation, formula, value))
+
+
+class ServiceCalculationValidator(validator.SimpleFieldValidator):
+    """Reject a calculation that would make a service depend on itself.
+    """
+
+    def keyword(self):
+        widgets = getattr(self.view, 'widgets', None)
+        if widgets is not None and 'keyword' in widgets:
+            return widgets['keyword'].value
+        return getattr(self.context, 'keyword', None)
+
+    def validate(self, value):
+        super(ServiceCalculationValidator, self).validate(value)
+        calculation = resolve(value)
+        keyword = self.keyword()
+        if calculation is None or not keyword:
+            return
+        formula = getFormula(calculation)
+        replace = {keyword: (IUUID(calculation), formula,
+                             calculation_inputs(calculation, formula))}
+        try:
+            check_cycles(self.context, replace)
+        except CycleError as err:
+            raise Invalid(err.args[0])
+
+
+class KeywordValidator(validator.SimpleFieldValidator):
+    """Keywords must be unique within a LIMS, and usable in formulas.
+    """
+
+    def validate(self, value):
+        super(KeywordValidator, self).validate(value)
+        if not value:
+            return
+        if u'[' in value or u']' in value:
+            raise Invalid(_(u"Keywords cannot contain square brackets."))
+        own = None
+        if IAnalysisService.providedBy(self.context):
+            own = IUUID(self.context, None)
+        for uid in keyword_uids(self.context, value):
+            if uid != own:
+                raise Invalid(_(
+                    u"The keyword ${keyword} is used by another analysis "
+                    u"service.", mapping={'keyword': value}))
+
+
+validator.WidgetValidatorDiscriminators(
+    FormulaValidator, field=ICalculation['formula'])
+validator.WidgetValidatorDiscriminators(
+    DependentServicesValidator, field=ICalculation['dependent_services'])
+validator.WidgetValidatorDiscriminators(
+    ServiceCalculationValidator, field=IAnalysisService['calculation'])
+validator.WidgetValidatorDiscriminators(
+    KeywordValidator, field=IAnalysisService['keyword'])
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""The bika_catalog tool.
+
+LIMS content is indexed in bika_catalog, next to portal_catalog, with
+indexes and metadata columns that match the LIMS lookups and listings.
+"""
+from Products.CMFCore.utils import getToolByName
+
+from bika.lims.catalog.queue import getIndexQueue
+from bika.lims.interfaces.aliquot import IAliquot
+from bika.lims.interfaces.analysisrequest import IAnalysisRequest
+from bika.lims.interfaces.analysisservice import IAnalysisService
+from bika.lims.interfaces.calculation import ICalculation
+from bika.lims.interfaces.client import IClient
+from bika.lims.interfaces.contact import IContact
+from bika.lims.interfaces.department import IDepartment
+from bika.lims.interfaces.sample import ISample
+from bika.lims.interfaces.samplepoint import ISamplePoint
+from bika.lims.interfaces.sampletype import ISampleType
+
+CATALOG_ID = 'bika_catalog'
+
+# Content providing one of these interfaces is indexed in bika_catalog
+CATALOGED_INTERFACES = (
+    IAliquot,
+    IAnalysisRequest,
+    IAnalysisService,
+    ICalculation,
+    IClient,
+    IContact,
+    IDepartment,
+    ISample,
+    ISamplePoint,
+    ISampleType,
+)
+
+# (name, meta_type, extra)
+INDEXES = (
+    ('UID', 'UUIDIndex', None),
+    ('id', 'FieldIndex', None),
+    ('path', 'ExtendedPathIndex', None),
+    ('portal_type', 'FieldIndex', None),
+    ('review_state', 'FieldIndex', None),
+    ('object_provides', 'KeywordIndex', None),
+    ('allowedRolesAndUsers', 'KeywordIndex', None),
+    ('effectiveRange', 'DateRangeIndex',
+     {'since_field': 'effective', 'until_field': 'expires'}),
+    ('sortable_title', 'FieldIndex', None),
+    ('client_sample_id', 'FieldIndex', None),
+    ('sample_type', 'FieldIndex', None),
+    ('sample_point', 'FieldIndex', None),
+    ('client', 'FieldIndex', None),
+    ('department', 'FieldIndex', None),
+    ('aliquot_type', 'FieldIndex', None),
+    ('purpose', 'FieldIndex', None),
+    ('keyword', 'FieldIndex', None),
+    ('sample_type_uids', 'KeywordIndex', None),
+    ('sample_point_uids', 'KeywordIndex', None),
+    ('lineage', 'KeywordIndex', None),
+    ('root_sample', 'FieldIndex', None),
+    ('date_sampled', 'DateIndex', None),
+    ('date_created', 'DateIndex', None),
+    ('date_received', 'DateIndex', None),
+    ('expiry_date', 'DateIndex', None),
+    ('username', 'FieldIndex', None),
+    ('id_key', 'FieldIndex', None),
+    ('date_created_key', 'FieldIndex', None),
+)
+
+COLUMNS = (
+    'UID',
+    'id',
+    'getId',
+    'Title',
+    'portal_type',
+    'review_state',
+    'client_sample_id',
+    'sample_type',
+    'sample_type_title',
+    'sample_point',
+    'sample_point_title',
+    'client',
+    'client_title',
+    'department',
+    'department_title',
+    'aliquot_type',
+    'purpose',
+    'keyword',
+    'sample_type_uids',
+    'sample_point_uids',
+    'lineage',
+    'root_sample',
+    'date_sampled',
+    'date_created',
+    'date_received',
+    'expiry_date',
+)
+
+
+def getBikaCatalog(context):
+    """Return the bika_catalog tool
+    """
+    return getToolByName(context, CATALOG_ID)
+
+
+def is_cataloged(obj):
+    """Return True if obj belongs in bika_catalog
+    """
+    for iface in CATALOGED_INTERFACES:
+        if iface.providedBy(obj):
+            return True
+    return False
+
+
+def reindex_object(obj, idxs=None):
+    """Reindex obj in portal_catalog, and queue reindexing it in bika_catalog
+    if it is LIMS content.  Use this instead of obj.reindexObject() in LIMS
+    code.
+    """
+    idxs = list(idxs or [])
+    obj.reindexObject(idxs=idxs)
+    if not is_cataloged(obj):
+        return
+    queue = getIndexQueue()
+    if queue is not None:
+        queue.index(obj, getBikaCatalog(obj), idxs)
+    else:
+        getBikaCatalog(obj).reindexObject(obj, idxs=idxs)
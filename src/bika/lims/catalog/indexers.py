@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Indexers for bika_catalog.
+
+Relations are indexed by the UID of their target, and each one has a
+*_title metadata column so that listings never need to wake up the
+related objects.  Sample fields are indexed on the sample's aliquots as
+well.  Samples and aliquots are indexed with their lineage, see
+bika.lims.utils.lineage, and samples with their expiry date, see
+bika.lims.expiry.  review_state comes from the LIMS workflows of
+bika.lims.workflow, or from DCWorkflow for other content.  Client
+contacts are indexed with their user name, see bika.lims.clientsecurity.
+Samples, aliquots and Analysis Requests have unique sort keys for the
+listings of bika.lims.listing.  An indexer raises AttributeError when it
+does not apply to an object, so that nothing is indexed for it.
+"""
+from Acquisition import aq_base
+from Acquisition import aq_chain
+from DateTime import DateTime
+from plone.indexer import indexer
+from plone.uuid.interfaces import IUUID
+from Products.CMFCore.utils import getToolByName
+from zope.interface import Interface
+
+from bika.lims import expiry
+from bika.lims.interfaces.aliquot import IAliquot
+from bika.lims.interfaces.analysisrequest import IAnalysisRequest
+from bika.lims.interfaces.catalog import IBikaCatalog
+from bika.lims.interfaces.client import IClient
+from bika.lims.interfaces.contact import IClientContact
+from bika.lims.interfaces.sample import IExpiredSample
+from bika.lims.interfaces.sample import ISample
+from bika.lims.interfaces.samplepoint import ISamplePoint
+from bika.lims.interfaces.sampletype import ISampleType
+from bika.lims.utils.lineage import getLineage
+from bika.lims.workflow.engine import getState
+from bika.lims.workflow.engine import getTransitionDate
+
+
+def _attr(obj, name):
+    """Attribute of obj itself, never acquired
+    """
+    return getattr(aq_base(obj), name)
+
+
+def _parent(obj, iface):
+    for parent in aq_chain(obj):
+        if iface.providedBy(parent):
+            return parent
+    raise AttributeError(iface.__name__)
+
+
+def _target(value):
+    """Resolve a RelationValue, or a value stored from a UID vocabulary,
+    to the related object or UID.
+    """
+    if value is not None and hasattr(value, 'to_object'):
+        return value.to_object
+    return value
+
+
+def _uid(value):
+    target = _target(value)
+    if target is None or isinstance(target, basestring):
+        return target
+    return IUUID(target, None)
+
+
+def _title(value):
+    target = _target(value)
+    if target is None or isinstance(target, basestring):
+        return None
+    return target.Title()
+
+
+@indexer(Interface, IBikaCatalog)
+def client(obj):
+    return IUUID(_parent(obj, IClient), None)
+
+
+@indexer(Interface, IBikaCatalog)
+def client_title(obj):
+    return _parent(obj, IClient).Title()
+
+
+@indexer(Interface, IBikaCatalog)
+def sample_type(obj):
+    return _uid(_parent(obj, ISample).sample_type)
+
+
+@indexer(Interface, IBikaCatalog)
+def sample_type_title(obj):
+    return _title(_parent(obj, ISample).sample_type)
+
+
+@indexer(Interface, IBikaCatalog)
+def sample_point(obj):
+    return _uid(_parent(obj, ISample).sample_point)
+
+
+@indexer(Interface, IBikaCatalog)
+def sample_point_title(obj):
+    return _title(_parent(obj, ISample).sample_point)
+
+
+@indexer(Interface, IBikaCatalog)
+def client_sample_id(obj):
+    return _parent(obj, ISample).client_sample_id
+
+
+@indexer(Interface, IBikaCatalog)
+def date_sampled(obj):
+    return _parent(obj, ISample).date_sampled
+
+
+@indexer(ISample, IBikaCatalog)
+def expiry_date(obj):
+    if IExpiredSample.providedBy(obj):
+        raise AttributeError('expiry_date')
+    date = expiry.expiry_date(obj)
+    if date is None:
+        raise AttributeError('expiry_date')
+    return date
+
+
+def _date_created(obj):
+    return getattr(aq_base(obj), 'date_created', None) or obj.created()
+
+
+@indexer(Interface, IBikaCatalog)
+def date_created(obj):
+    return _date_created(obj)
+
+
+def _listing_key(obj, value):
+    """Return value followed by the UID of a sample, aliquot or Analysis
+    Request: a key that sorts like value and is unique, for keyset
+    pagination, see bika.lims.listing.
+    """
+    if not (ISample.providedBy(obj) or IAliquot.providedBy(obj) or
+            IAnalysisRequest.providedBy(obj)):
+        raise AttributeError('listing key')
+    uid = IUUID(obj, None)
+    if uid is None:
+        raise AttributeError('listing key')
+    return u'%s %s' % (value, uid)
+
+
+@indexer(Interface, IBikaCatalog)
+def id_key(obj):
+    return _listing_key(obj, obj.getId())
+
+
+@indexer(Interface, IBikaCatalog)
+def date_created_key(obj):
+    millis = DateTime(_date_created(obj)).millis()
+    return _listing_key(obj, u'%015d' % millis)
+
+
+@indexer(Interface, IBikaCatalog)
+def department(obj):
+    return _uid(_attr(obj, 'department'))
+
+
+@indexer(Interface, IBikaCatalog)
+def department_title(obj):
+    return _title(_attr(obj, 'department'))
+
+
+@indexer(ISamplePoint, IBikaCatalog)
+def sample_type_uids(obj):
+    return tuple(filter(None, [_uid(value) for value in
+                               _attr(obj, 'sample_types') or ()]))
+
+
+@indexer(ISampleType, IBikaCatalog)
+def sample_point_uids(obj):
+    return tuple(filter(None, [_uid(value) for value in
+                               _attr(obj, 'sample_points') or ()]))
+
+
+@indexer(Interface, IBikaCatalog)
+def lineage(obj):
+    return getLineage(obj)
+
+
+@indexer(Interface, IBikaCatalog)
+def root_sample(obj):
+    return getLineage(obj)[0]
+
+
+@indexer(Interface, IBikaCatalog)
+def review_state(obj):
+    state = getState(obj)
+    if state is None:
+        workflow = getToolByName(obj, 'portal_workflow')
+        state = workflow.getInfoFor(obj, 'review_state', None)
+    return state
+
+
+@indexer(Interface, IBikaCatalog)
+def date_received(obj):
+    date = getTransitionDate(obj, 'receive')
+    if date is None:
+        raise AttributeError('date_received')
+    return date
+
+
+@indexer(IClientContact, IBikaCatalog)
+def username(obj):
+    name = _attr(obj, 'username')
+    if not name:
+        raise AttributeError('username')
+    return name
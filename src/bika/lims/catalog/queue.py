@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Per-transaction bika_catalog indexing queue.
+
+Adding, editing and classifying LIMS content triggers several index,
+reindex and unindex operations on the same object within one transaction.
+They are queued here instead, merged per object path, and applied once,
+just before the transaction commits.  bika_catalog flushes the queue before
+every search, so code searching the catalog in the same transaction sees
+its own changes.
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import transaction
+
+_local = threading.local()
+
+
+class IndexQueue(object):
+    """Pending bika_catalog operations, by object path.  Each entry is
+    (object, index names, catalog); the object is None for unindexing and
+    the index names are None for indexing everything.
+    """
+
+    def __init__(self, txn):
+        self.txn = txn
+        self.ops = OrderedDict()
+
+    def index(self, obj, catalog, idxs=None):
+        """Queue (re)indexing obj, in the given indexes or all of them.
+        """
+        path = obj.getPhysicalPath()
+        idxs = frozenset(idxs) if idxs else None
+        op = self.ops.get(path)
+        if op is not None:
+            if op[0] is None or op[1] is None or idxs is None:
+                idxs = None
+            else:
+                idxs = op[1] | idxs
+        self.ops[path] = (obj, idxs, catalog)
+
+    def unindex(self, obj, catalog):
+        """Queue unindexing obj from its current path.
+        """
+        self.ops[obj.getPhysicalPath()] = (None, None, catalog)
+
+    def mark(self):
+        """Return the current state, for rollback() after rolling back a
+        savepoint.
+        """
+        return OrderedDict(self.ops)
+
+    def rollback(self, mark):
+        self.ops = mark
+
+    def flush(self):
+        """Apply the queued operations.  Returns the number of catalog
+        writes.
+        """
+        ops, self.ops = self.ops, OrderedDict()
+        for path, (obj, idxs, catalog) in ops.items():
+            uid = '/'.join(path)
+            if obj is None:
+                if catalog.getrid(uid) is not None:
+                    catalog.uncatalog_object(uid)
+            elif idxs is None:
+                catalog.catalog_object(obj, uid)
+            else:
+                catalog.catalog_object(obj, uid, idxs=list(idxs))
+        return len(ops)
+
+
+def getIndexQueue():
+    """Return the indexing queue of the current transaction, or None while
+    indexing is immediate.
+    """
+    if getattr(_local, 'immediate', False):
+        return None
+    txn = transaction.get()
+    queue = getattr(_local, 'queue', None)
+    if queue is None or queue.txn is not txn:
+        queue = _local.queue = IndexQueue(txn)
+        txn.addBeforeCommitHook(queue.flush)
+    return queue
+
+
+def flushIndexQueue():
+    """Apply the operations queued in the current transaction so far.
+    """
+    queue = getattr(_local, 'queue', None)
+    if queue is not None and queue.ops and queue.txn is transaction.get():
+        queue.flush()
+
+
+@contextmanager
+def immediate_indexing():
+    """Index right away, without the queue, inside the block.  Operations
+    queued before are applied first.
+    """
+    flushIndexQueue()
+    previous = getattr(_local, 'immediate', False)
+    _local.immediate = True
+    try:
+        yield
+    finally:
+        _local.immediate = previous
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import time
+
+from App.class_init import InitializeClass
+from Products.CMFPlone.CatalogTool import CatalogTool
+from zope.interface import implementer
+
+from bika.lims import profiling
+from bika.lims.catalog import CATALOG_ID
+from bika.lims.catalog import COLUMNS
+from bika.lims.catalog import INDEXES
+from bika.lims.catalog.queue import flushIndexQueue
+from bika.lims.interfaces.catalog import IBikaCatalog
+
+
+class Extra(object):
+    """Index construction arguments, as ZCatalog.addIndex expects them
+    """
+
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+@implementer(IBikaCatalog)
+class BikaCatalog(CatalogTool):
+    """Catalog of LIMS content
+    """
+
+    id = CATALOG_ID
+    title = 'Bika LIMS Catalog'
+    meta_type = 'Bika Catalog Tool'
+
+    # Indexing is queued until the end of the transaction; apply what is
+    # pending before searching, so searches see the transaction's changes.
+    # Queries are timed while bika.lims.profiling is counting them.
+
+    def searchResults(self, REQUEST=None, **kw):
+        flushIndexQueue()
+        if not profiling.counting:
+            return super(BikaCatalog, self).searchResults(REQUEST, **kw)
+        started = time.time()
+        try:
+            return super(BikaCatalog, self).searchResults(REQUEST, **kw)
+        finally:
+            profiling.catalog_query(time.time() - started)
+
+    __call__ = searchResults
+
+    def unrestrictedSearchResults(self, REQUEST=None, **kw):
+        flushIndexQueue()
+        if not profiling.counting:
+            return super(BikaCatalog, self).unrestrictedSearchResults(
+                REQUEST, **kw)
+        started = time.time()
+        try:
+            return super(BikaCatalog, self).unrestrictedSearchResults(
+                REQUEST, **kw)
+        finally:
+            profiling.catalog_query(time.time() - started)
+
+    def getCounter(self):
+        flushIndexQueue()
+        return super(BikaCatalog, self).getCounter()
+
+
+InitializeClass(BikaCatalog)
+
+
+def setup_catalog(portal):
+    """Create bika_catalog and add any missing indexes and columns.
+    Returns the names of the indexes that were added.
+    """
+    if CATALOG_ID not in portal.objectIds():
+        portal._setObject(CATALOG_ID, BikaCatalog())
+    catalog = portal[CATALOG_ID]
+
+    added = []
+    indexes = catalog.indexes()
+    for name, meta_type, extra in INDEXES:
+        if name not in indexes:
+            catalog.addIndex(name, meta_type, extra and Extra(**extra))
+            added.append(name)
+    columns = catalog.schema()
+    for name in COLUMNS:
+        if name not in columns:
+            catalog.addColumn(name)
+    return added
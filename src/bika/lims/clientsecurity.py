@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Client membership and searches of client content.
+
+A user belongs to the clients that have a contact with their user name.
+bika_catalog indexes the username of client contacts, so the clients of a
+user are found with a single index lookup, see client_uids().  Membership
+decides which clients' sample points a client user is offered; it does not
+decide what a user may view, which is up to the allowedRolesAndUsers
+index like everywhere else.
+
+Restricted catalog searches match the roles, groups and user id of the
+current user against the allowedRolesAndUsers index, which means merging
+the postings of all those tokens before anything else narrows the search
+down.  With thousands of clients, each with many contacts, that merge
+dominates every listing of a client user.  A search that is narrowed down
+to some clients by the client index is cheaper the other way round:
+search() runs it unrestricted and checks the allowedRolesAndUsers entry of
+each result against the user's tokens, which gives the same results as the
+restricted search, effective range check included.  Listings and the
+samples vocabulary add the client containing their context to the query,
+so searches inside a client take that path.  Any other search is a plain
+restricted search, so who sees what never depends on which path is taken.
+"""
+from AccessControl import getSecurityManager
+from Acquisition import aq_chain
+from DateTime import DateTime
+from plone.uuid.interfaces import IUUID
+from Products.CMFCore.permissions import AccessInactivePortalContent
+from Products.CMFCore.utils import _checkPermission
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.interfaces.client import IClient
+from bika.lims.interfaces.contact import IClientContact
+from bika.lims.utils.limsroot import getLims
+
+# Users with one of these roles see the whole LIMS, not just their clients
+LAB_ROLES = ('Manager', 'Site Administrator', 'LabManager', 'LabClerk')
+
+
+def client_uids(context, user=None):
+    """Return the UIDs of the clients the user, by default the current
+    one, has a contact in.
+    """
+    if user is None:
+        user = getSecurityManager().getUser()
+    catalog = getBikaCatalog(context)
+    return frozenset(
+        proxy.client for proxy in catalog.unrestrictedSearchResults(
+            object_provides=IClientContact.__identifier__,
+            username=user.getId())
+        if proxy.client)
+
+
+def is_lab_user(user, context):
+    """Return whether user has a lab role, globally or in the LIMS of
+    context.
+    """
+    lims = getLims(context)
+    if lims is None:
+        roles = user.getRoles()
+    else:
+        roles = user.getRolesInContext(lims)
+    return any(role in roles for role in LAB_ROLES)
+
+
+def client_user(context, user=None):
+    """Return the UIDs of the clients of a user, which may be none, or
+    None for lab users.
+    """
+    if user is None:
+        user = getSecurityManager().getUser()
+    if is_lab_user(user, context):
+        return None
+    return client_uids(context, user)
+
+
+def context_client(context):
+    """Return the UID of the client containing context, or None.
+    """
+    for parent in aq_chain(context):
+        if IClient.providedBy(parent):
+            return IUUID(parent, None)
+    return None
+
+
+def _as_set(value):
+    if isinstance(value, dict):
+        value = value.get('query')
+    if isinstance(value, basestring):
+        return set([value])
+    return set(value)
+
+
+def search(context, **query):
+    """Search bika_catalog as the current user, with the results of a
+    restricted search.  Returns a sequence of brains.
+    """
+    catalog = getBikaCatalog(context)
+    if not query.get('client'):
+        return catalog(**query)
+    return search_clients(catalog, getSecurityManager().getUser(), **query)
+
+
+def search_clients(catalog, user, **query):
+    """Search the content of the clients in the query's client index
+    query that user may view, without querying allowedRolesAndUsers.
+    """
+    uids = _as_set(query['client'])
+    if not uids:
+        return []
+    query['client'] = sorted(uids)
+    show_inactive = query.pop('show_inactive', False)
+    if not show_inactive and \
+            not _checkPermission(AccessInactivePortalContent, catalog):
+        query['effectiveRange'] = DateTime()
+    limit = query.pop('sort_limit', None)
+    tokens = frozenset(catalog._listAllowedRolesAndUsers(user))
+    allowed = catalog._catalog.getIndex('allowedRolesAndUsers')
+    results = []
+    for proxy in catalog.unrestrictedSearchResults(**query):
+        if tokens.intersection(allowed.getEntryForObject(proxy.getRID(),
+                                                         ())):
+            results.append(proxy)
+            if limit and len(results) >= limit:
+                break
+    return results
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Compatibility of sample points and sample types.
+
+A sample point lists the sample types that can be collected at it, and a
+sample type lists the sample points it can be collected from; an empty
+list means all of them.  Both sides restrict: a sample type can be
+collected at a sample point if each of them either allows all of the
+other or lists it.
+
+compatibility_map() computes the allowed sample points of every sample
+type and the allowed sample types of every sample point from bika_catalog
+metadata, without loading any object.  Like the keyword map, it is kept
+per LIMS and tagged with the configuration version, which the sample
+type and sample point subscribers bump, so lookups are dictionary lookups
+until the next change.
+"""
+from threading import Lock
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.interfaces.samplepoint import ISamplePoint
+from bika.lims.interfaces.sampletype import ISampleType
+from bika.lims.utils.configversion import getConfigVersion
+from bika.lims.utils.limsroot import getLims
+
+_lock = Lock()
+_maps = {}
+
+
+class CompatibilityMap(object):
+    """Allowed sample points of sample types and allowed sample types of
+    sample points, by UID.
+
+    `points` maps sample type UIDs to tuples of sample point UIDs, `types`
+    sample point UIDs to tuples of sample type UIDs, `titles` all UIDs to
+    titles and `clients` sample point UIDs to the UID of their client, or
+    None for lab sample points.
+    """
+
+    def __init__(self, sampletypes, samplepoints):
+        """sampletypes and samplepoints map UIDs to (title, UIDs of the
+        allowed other side, client UID); an empty list of UIDs allows all.
+        """
+        self.titles = {}
+        self.clients = {}
+        points = dict((uid, []) for uid in sampletypes)
+        types = dict((uid, []) for uid in samplepoints)
+        for uid, (title, allowed, client) in sampletypes.items():
+            self.titles[uid] = title
+        for point, (title, allowed, client) in samplepoints.items():
+            self.titles[point] = title
+            self.clients[point] = client
+            for sampletype in allowed or sampletypes:
+                if sampletype not in sampletypes:
+                    continue
+                wanted = sampletypes[sampletype][1]
+                if not wanted or point in wanted:
+                    points[sampletype].append(point)
+                    types[point].append(sampletype)
+        self.points = dict((uid, tuple(value))
+                           for uid, value in points.items())
+        self.types = dict((uid, tuple(value))
+                          for uid, value in types.items())
+
+    def allowed_points(self, sampletype, clients=None):
+        """Return the UIDs of the sample points allowed for a sample type
+        UID.  With a collection of client UIDs, only the lab's sample
+        points and those of these clients are returned.
+        """
+        points = self.points.get(sampletype, ())
+        if clients is None:
+            return points
+        return tuple(point for point in points
+                     if self.clients.get(point) is None or
+                     self.clients[point] in clients)
+
+    def allowed_types(self, samplepoint):
+        """Return the UIDs of the sample types allowed for a sample point
+        UID.
+        """
+        return self.types.get(samplepoint, ())
+
+
+def _entries(lims, iface, column):
+    # Unrestricted: the map is shared by all users, who are filtered by
+    # client when it is used.
+    catalog = getBikaCatalog(lims)
+    entries = {}
+    for proxy in catalog.unrestrictedSearchResults(
+            object_provides=iface.__identifier__,
+            path='/'.join(lims.getPhysicalPath())):
+        entries[proxy.UID] = (proxy.Title, frozenset(getattr(proxy, column)
+                                                     or ()),
+                              proxy.client)
+    return entries
+
+
+def compatibility_map(context):
+    """Return the CompatibilityMap of the LIMS containing context.  The map
+    must not be modified.
+    """
+    lims = getLims(context)
+    if lims is None:
+        return CompatibilityMap({}, {})
+    key = lims.getPhysicalPath()
+    version = getConfigVersion(lims)
+    entry = _maps.get(key)
+    if entry is not None and version is not None and entry[0] == version:
+        return entry[1]
+    mapping = CompatibilityMap(
+        _entries(lims, ISampleType, 'sample_point_uids'),
+        _entries(lims, ISamplePoint, 'sample_type_uids'))
+    if version is not None:
+        with _lock:
+            _maps[key] = (version, mapping)
+    return mapping
+
+
+def clear():
+    with _lock:
+        _maps.clear()
@@ -1 +1,22 @@
 # -*- coding: utf-8 -*-
+
+# LIMS and client folders that collect the bulk of the LIMS content.  These
+# are kept unordered, see bika.lims.content.container.
+LARGE_FOLDERS = ('samples', 'analysisrequests')
+
+# Sample IDs: {prefix} is the sample type's sample_id_prefix, {period} is
+# the current date formatted with ID_PERIOD_FORMAT, and {seq} is numbered
+# per prefix and period.  See bika.lims.idserver.
+SAMPLE_ID_TEMPLATE = u'{prefix}{period}-{seq:04d}'
+ID_PERIOD_FORMAT = '%y'
+
+# Number of sample IDs each worker thread reserves at a time
+ID_BLOCK_SIZE = 10
+
+# Used for aliquot types that have no id_template.  {sample_id} is the id of
+# the sample or aliquot that holds the new aliquot.
+ALIQUOT_ID_TEMPLATE = u'{sample_id}-{seq:03d}'
+
+# Analysis Requests are named after their sample; {seq} numbers the ARs of
+# one sample.
+AR_ID_TEMPLATE = u'{sample_id}-R{seq:02d}'
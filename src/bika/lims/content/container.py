@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from Acquisition import aq_base
+from plone.dexterity.content import Container
+from plone.folder.default import DefaultOrdering
+from zope.annotation.interfaces import IAnnotations
+
+UNORDERED = u'unordered'
+
+
+class UnorderedContainer(Container):
+    """Container for content that collects very many children.
+
+    Children live only in the container's BTree: adding or removing one does
+    not rewrite an ordering list, and objectIds() iterates the BTree keys
+    lazily instead of materialising the full list of ids.
+    """
+
+    _ordering = UNORDERED
+
+
+def make_unordered(folder):
+    """Switch an existing BTree folder to unordered storage in place,
+    dropping the stored ordering.  Returns False if it already was.
+    """
+    if getattr(aq_base(folder), '_ordering', u'') == UNORDERED:
+        return False
+    folder.setOrdering(UNORDERED)
+    annotations = IAnnotations(folder)
+    for key in (DefaultOrdering.ORDER_KEY, DefaultOrdering.POS_KEY):
+        if key in annotations:
+            del annotations[key]
+    return True
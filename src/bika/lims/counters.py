@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Dashboard counters of a LIMS.
+
+The front page shows counts that would take several catalog queries to
+compute: samples, samples received per day, Analysis Requests per state,
+expired samples and aliquots per department.  They are kept in an OOBTree
+of BTrees Length objects on the LIMS root, one per counter, and changed
+by the add, remove, transition and expiry subscribers.  Length resolves
+concurrent changes of a counter, and the OOBTree concurrent insertions of
+different counters, so counting does not make registrations conflict.
+Reading a counter is a single lookup.
+
+rebuild() recomputes all counters from bika_catalog, for LIMS roots that
+existed before the counters or whose counters drifted.  It runs from the
+@@rebuild-counters view or the bika-rebuild-counters console script.
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date
+
+import transaction
+from Acquisition import aq_base
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree
+from plone.uuid.interfaces import IUUID
+from zope.annotation.interfaces import IAnnotations
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.interfaces.aliquot import IAliquot
+from bika.lims.interfaces.analysisrequest import IAnalysisRequest
+from bika.lims.interfaces.sample import IExpiredSample
+from bika.lims.interfaces.sample import ISample
+from bika.lims.utils.limsroot import getLims
+from bika.lims.utils.script import zope_object
+from bika.lims.workflow.engine import getState
+from bika.lims.workflow.engine import getTransitionDate
+
+logger = logging.getLogger('bika.lims.counters')
+
+ANNOTATION_KEY = 'bika.lims.counters'
+
+SAMPLES = 'samples'
+EXPIRED = 'expired'
+RECEIVED = 'received:%s'
+AR_STATE = 'ar_state:%s'
+DEPARTMENT = 'department:%s'
+
+# The department an aliquot was counted in
+COUNTED_DEPARTMENT = '_counted_department'
+
+
+def _counters(lims, create=True):
+    annotations = IAnnotations(lims)
+    counters = annotations.get(ANNOTATION_KEY)
+    if counters is None and create:
+        counters = annotations[ANNOTATION_KEY] = OOBTree()
+    return counters
+
+
+def change(lims, deltas):
+    """Apply a mapping of counter names to changes.
+    """
+    counters = _counters(lims)
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        counter = counters.get(name)
+        if counter is None:
+            counter = counters[name] = Length()
+        counter.change(delta)
+
+
+def value(lims, name):
+    """Return the value of a counter.
+    """
+    counters = _counters(lims, create=False)
+    counter = counters.get(name) if counters is not None else None
+    return counter() if counter is not None else 0
+
+
+def values(lims, prefix):
+    """Return {key: value} of the counters named prefix + key.
+    """
+    counters = _counters(lims, create=False)
+    if counters is None:
+        return {}
+    return dict((name[len(prefix):], counter())
+                for name, counter in counters.items(prefix, prefix + '\xff')
+                if name.startswith(prefix))
+
+
+def _department(aliquot):
+    relation = getattr(aq_base(aliquot), 'department', None)
+    if relation is not None and hasattr(relation, 'to_object'):
+        relation = relation.to_object
+    if relation is None or isinstance(relation, basestring):
+        return relation or ''
+    return IUUID(relation, '')
+
+
+def deltas(obj, sign):
+    """Return the counter changes of adding (sign 1) or removing (sign -1)
+    obj.
+    """
+    result = defaultdict(int)
+    if ISample.providedBy(obj):
+        result[SAMPLES] += sign
+        if IExpiredSample.providedBy(obj):
+            result[EXPIRED] += sign
+        received = getTransitionDate(obj, 'receive')
+        if received is not None:
+            result[RECEIVED % received.date().isoformat()] += sign
+    elif IAnalysisRequest.providedBy(obj):
+        result[AR_STATE % getState(obj)] += sign
+    elif IAliquot.providedBy(obj):
+        department = getattr(aq_base(obj), COUNTED_DEPARTMENT, None)
+        if department is None or sign > 0:
+            department = _department(obj)
+        if sign > 0:
+            setattr(obj, COUNTED_DEPARTMENT, department)
+        result[DEPARTMENT % department] += sign
+    return result
+
+
+def count_added(objects):
+    """Count new objects, e.g. those added without events.
+    """
+    total = defaultdict(int)
+    lims = None
+    for obj in objects:
+        lims = lims or getLims(obj)
+        for name, delta in deltas(obj, 1).items():
+            total[name] += delta
+    if lims is not None:
+        change(lims, total)
+
+
+def department_changed(aliquot):
+    """Move an edited aliquot to the counter of its new department.
+    """
+    counted = getattr(aq_base(aliquot), COUNTED_DEPARTMENT, None)
+    department = _department(aliquot)
+    if counted is None or counted == department:
+        return
+    setattr(aliquot, COUNTED_DEPARTMENT, department)
+    change(getLims(aliquot), {DEPARTMENT % counted: -1,
+                              DEPARTMENT % department: 1})
+
+
+def transitioned(objects, transition, previous):
+    """Count a bulk transition of objects from the previous states.
+    """
+    total = defaultdict(int)
+    lims = None
+    day = today()
+    for obj, state in zip(objects, previous):
+        lims = lims or getLims(obj)
+        if IAnalysisRequest.providedBy(obj):
+            total[AR_STATE % state] -= 1
+            total[AR_STATE % getState(obj)] += 1
+        elif ISample.providedBy(obj) and transition == 'receive':
+            total[RECEIVED % day] += 1
+    if lims is not None:
+        change(lims, total)
+
+
+def rebuild(lims):
+    """Recompute the counters of a LIMS from bika_catalog.  Returns them.
+    """
+    catalog = getBikaCatalog(lims)
+    path = '/'.join(lims.getPhysicalPath())
+    total = defaultdict(int)
+    for proxy in catalog.unrestrictedSearchResults(portal_type='Sample',
+                                                   path=path):
+        total[SAMPLES] += 1
+        if proxy.date_received:
+            day = proxy.date_received.date().isoformat()
+            total[RECEIVED % day] += 1
+    total[EXPIRED] = len(catalog.unrestrictedSearchResults(
+        object_provides=IExpiredSample.__identifier__, path=path))
+    for proxy in catalog.unrestrictedSearchResults(
+            portal_type='AnalysisRequest', path=path):
+        total[AR_STATE % proxy.review_state] += 1
+    for proxy in catalog.unrestrictedSearchResults(portal_type='Aliquot',
+                                                   path=path):
+        total[DEPARTMENT % (proxy.department or '')] += 1
+
+    counters = _counters(lims)
+    for name in list(counters.keys()):
+        if name not in total:
+            del counters[name]
+    for name, count in total.items():
+        counter = counters.get(name)
+        if counter is None:
+            counters[name] = Length(count)
+        elif counter() != count:
+            counter.set(count)
+    return dict(total)
+
+
+def today():
+    return date.today().isoformat()
+
+
+def main(argv=None):
+    """Rebuild the dashboard counters of a LIMS, e.g.
+
+        bin/bika-rebuild-counters parts/instance/etc/zope.conf /Plone/lims
+    """
+    parser = argparse.ArgumentParser(
+        description="Rebuild the dashboard counters of a LIMS.")
+    parser.add_argument('zope_conf', help="Path of the instance's zope.conf")
+    parser.add_argument('lims', help="Physical path of the LIMS")
+    parser.add_argument('--user', default='admin',
+                        help="Zope root user to run as")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        lims = zope_object(args.zope_conf, args.lims, args.user)
+    except ValueError as err:
+        parser.error(str(err))
+    total = rebuild(lims)
+    transaction.get().note(u"bika.lims: rebuild counters")
+    transaction.commit()
+    for name in sorted(total):
+        logger.info("%s: %s", name, total[name])
+    return 0
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from zope.interface.interfaces import ObjectEvent
+
 
 class LIMSCreatedEvent(object):
     """A LIMS root has been created.
@@ -6,3 +8,19 @@ class LIMSCreatedEvent(object):
 
     def __init__(self, lims):
         self.lims = lims
+
+
+class SampleExpiredEvent(ObjectEvent):
+    """A sample has reached the end of its sample type's retention period.
+    """
+
+
+class BulkTransitionEvent(object):
+    """A workflow transition has been done on a batch of objects, which
+    were in the `previous` states.
+    """
+
+    def __init__(self, transition, objects, previous):
+        self.transition = transition
+        self.objects = objects
+        self.previous = previous
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Sample expiry.
+
+A sample expires `retention_period` hours after its date_sampled, as set
+on its sample type; a retention period of 0 means that samples of the type
+never expire.  The expiry date is indexed in bika_catalog as
+`expiry_date`, so expired samples are found with a single range query.
+Samples that have expired, or never expire, are not in the index.
+
+When the retention period of a sample type changes, only its samples are
+reindexed.  expire_samples() marks the samples whose expiry date has
+passed with IExpiredSample, notifies SampleExpiredEvent for each and
+commits after every batch.  It runs from the @@expire-samples view of a
+LIMS, e.g. on a clock server schedule, or from the bika-expire-samples
+console script.
+"""
+import argparse
+import logging
+from datetime import datetime
+from datetime import timedelta
+
+import transaction
+from plone.uuid.interfaces import IUUID
+from ZODB.POSException import ConflictError
+from zope.event import notify
+from zope.interface import alsoProvides
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog import reindex_object
+from bika.lims.events import SampleExpiredEvent
+from bika.lims.interfaces.sample import IExpiredSample
+from bika.lims.interfaces.sample import ISample
+from bika.lims.utils.script import zope_object
+
+logger = logging.getLogger('bika.lims.expiry')
+
+BATCH_SIZE = 500
+
+CONFLICT_RETRIES = 3
+
+
+def expiry_date(sample):
+    """Return the date a sample expires, or None if it never does.
+    """
+    relation = getattr(sample, 'sample_type', None)
+    sampletype = relation.to_object if relation else None
+    hours = getattr(sampletype, 'retention_period', None)
+    if not hours or sample.date_sampled is None:
+        return None
+    return sample.date_sampled + timedelta(hours=hours)
+
+
+def reindex_samples(sampletype):
+    """Reindex the expiry dates of the samples of a sample type.  Returns
+    the number of samples.
+    """
+    catalog = getBikaCatalog(sampletype)
+    count = 0
+    for proxy in catalog.unrestrictedSearchResults(
+            sample_type=IUUID(sampletype),
+            object_provides=ISample.__identifier__):
+        reindex_object(proxy._unrestrictedGetObject(), idxs=['expiry_date'])
+        count += 1
+    return count
+
+
+def expired(context, now=None, limit=None):
+    """Return the brains of the samples under context that have expired.
+    """
+    catalog = getBikaCatalog(context)
+    query = {
+        'path': '/'.join(context.getPhysicalPath()),
+        'object_provides': ISample.__identifier__,
+        'expiry_date': {'query': now or datetime.now(), 'range': 'max'},
+        'sort_on': 'expiry_date',
+    }
+    if limit:
+        query['sort_limit'] = limit
+        return catalog.unrestrictedSearchResults(**query)[:limit]
+    return catalog.unrestrictedSearchResults(**query)
+
+
+def expire(sample):
+    """Mark a sample as expired.
+    """
+    alsoProvides(sample, IExpiredSample)
+    notify(SampleExpiredEvent(sample))
+    reindex_object(sample, idxs=['object_provides', 'expiry_date'])
+
+
+def expire_samples(context, now=None, batch_size=BATCH_SIZE, commit=True):
+    """Expire the samples under context whose expiry date is before now,
+    batch_size samples per transaction.  Returns the number of expired
+    samples.
+    """
+    now = now or datetime.now()
+    total = 0
+    conflicts = 0
+    while True:
+        batch = expired(context, now, batch_size)
+        if not batch:
+            break
+        for proxy in batch:
+            expire(proxy._unrestrictedGetObject())
+        if commit:
+            transaction.get().note(u"bika.lims: expire %s samples" %
+                                   len(batch))
+            try:
+                transaction.commit()
+            except ConflictError:
+                transaction.abort()
+                conflicts += 1
+                if conflicts > CONFLICT_RETRIES:
+                    raise
+                logger.warning("Conflict while expiring samples, retrying")
+                continue
+        conflicts = 0
+        total += len(batch)
+        logger.info("Expired %s samples", total)
+    return total
+
+
+def main(argv=None):
+    """Expire the samples of a LIMS, e.g.
+
+        bin/bika-expire-samples parts/instance/etc/zope.conf /Plone/lims
+    """
+    parser = argparse.ArgumentParser(description="Expire samples.")
+    parser.add_argument('zope_conf', help="Path of the instance's zope.conf")
+    parser.add_argument('lims', help="Physical path of the LIMS")
+    parser.add_argument('--user', default='admin',
+                        help="Zope root user to run as")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="Samples per transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        lims = zope_object(args.zope_conf, args.lims, args.user)
+    except ValueError as err:
+        parser.error(str(err))
+    expire_samples(lims, batch_size=args.batch_size)
+    return 0
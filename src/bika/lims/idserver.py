@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Server side ID generation.
+
+Sample IDs are made of the sample type's prefix, a period (the year by
+default) and a sequence number kept per prefix and period.  Reception desks
+register samples in parallel, so the sequence numbers are not taken from a
+shared counter inside the registering transaction, which would make every
+registration conflict with every other one.  Instead each worker thread
+reserves a block of numbers in a short transaction of its own, on a
+separate connection, and hands them out from memory.  Only block
+reservations can conflict, and they are simply retried.
+
+The counters live in an OOBTree, whose conflict resolution merges
+concurrent insertions of different prefix/period keys, and each
+prefix/period has its own small Counter object, so reservations for
+different prefixes never touch the same record.  Numbers of a block that is
+not used up before a restart are skipped, so sequences may have gaps.
+"""
+import string
+import threading
+from datetime import datetime
+
+import transaction
+from Acquisition import aq_chain
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from ZODB.POSException import ConflictError
+from ZODB.utils import z64
+from zope.annotation.interfaces import IAnnotations
+
+from bika.lims.config import ALIQUOT_ID_TEMPLATE
+from bika.lims.config import AR_ID_TEMPLATE
+from bika.lims.config import ID_BLOCK_SIZE
+from bika.lims.config import ID_PERIOD_FORMAT
+from bika.lims.config import SAMPLE_ID_TEMPLATE
+from bika.lims.interfaces.sample import ISample
+from bika.lims.utils.limsroot import getLims
+
+ANNOTATION_KEY = 'bika.lims.idserver'
+
+RESERVE_ATTEMPTS = 10
+
+_blocks = threading.local()
+
+
+class Counter(Persistent):
+    """Highest sequence number handed out for one prefix and period
+    """
+
+    value = 0
+
+
+class IDServer(object):
+    """Hands out sequence numbers from a counters OOBTree.
+    """
+
+    def __init__(self, counters, block_size=ID_BLOCK_SIZE):
+        self.counters = counters
+        self.block_size = block_size
+
+    def next_seq(self, prefix, period=u''):
+        """Return the next sequence number for prefix and period.
+        """
+        key = (prefix, period)
+        if self.counters._p_oid is not None:
+            self.counters._p_activate()
+        if self.counters._p_oid is None or self.counters._p_serial == z64:
+            # Not committed yet, so no other transaction can see it.
+            return self._reserve(self.counters, key, 1)
+        blocks = getattr(_blocks, 'blocks', None)
+        if blocks is None:
+            blocks = _blocks.blocks = {}
+        jar = self.counters._p_jar
+        cachekey = (id(jar.db()), self.counters._p_oid, key)
+        block = blocks.get(cachekey)
+        if block is None or block[0] >= block[1]:
+            start = self._reserve_block(key)
+            block = blocks[cachekey] = [start, start + self.block_size]
+        seq = block[0]
+        block[0] += 1
+        return seq
+
+    def _reserve(self, counters, key, size):
+        counter = counters.get(key)
+        if counter is None:
+            counter = counters[key] = Counter()
+        start = counter.value + 1
+        counter.value += size
+        return start
+
+    def _reserve_block(self, key):
+        """Reserve a block of numbers in a separate transaction, and return
+        its first number.
+        """
+        db = self.counters._p_jar.db()
+        tm = transaction.TransactionManager()
+        connection = db.open(transaction_manager=tm)
+        try:
+            for attempt in range(RESERVE_ATTEMPTS):
+                tm.begin()
+                try:
+                    counters = connection.get(self.counters._p_oid)
+                    start = self._reserve(counters, key, self.block_size)
+                    tm.get().note(u"bika.lims: reserve IDs %s" % (key,))
+                    tm.commit()
+                    return start
+                except ConflictError:
+                    tm.abort()
+            raise ConflictError(
+                "Could not reserve IDs for %s after %s attempts" %
+                (key, RESERVE_ATTEMPTS))
+        finally:
+            connection.close()
+
+
+def getIDServer(lims):
+    """Return the IDServer of a LIMS root
+    """
+    annotations = IAnnotations(lims)
+    counters = annotations.get(ANNOTATION_KEY)
+    if counters is None:
+        counters = annotations[ANNOTATION_KEY] = OOBTree()
+    return IDServer(counters)
+
+
+def current_period():
+    return unicode(datetime.now().strftime(ID_PERIOD_FORMAT))
+
+
+def format_sample_id(prefix, period, seq):
+    return SAMPLE_ID_TEMPLATE.format(prefix=prefix, period=period, seq=seq)
+
+
+_templates = {}
+_template_fields = frozenset(['sample_id', 'seq'])
+
+
+def compile_template(template):
+    """Validate an aliquot id_template once and return its formatter.
+    Templates may use {sample_id} and {seq}.
+    """
+    formatter = _templates.get(template)
+    if formatter is None:
+        for literal, field, spec, conversion in \
+                string.Formatter().parse(template):
+            if field is not None and field not in _template_fields:
+                raise ValueError(
+                    "Unknown field {%s} in ID template %r" % (field, template))
+        formatter = _templates[template] = template.format
+    return formatter
+
+
+def format_aliquot_id(template, sample_id, seq):
+    """Render an aliquot id_template for the seq'th aliquot of a sample or
+    aliquot.
+    """
+    return compile_template(template or ALIQUOT_ID_TEMPLATE)(
+        sample_id=sample_id, seq=seq)
+
+
+def format_ar_id(sample_id, seq):
+    return AR_ID_TEMPLATE.format(sample_id=sample_id, seq=seq)
+
+
+def next_sample_id(sample):
+    """Generate the ID of a new sample from its sample type's prefix.
+    The sample need not be in its container yet.
+    """
+    sampletype = sample.sample_type.to_object
+    server = getIDServer(getLims(sampletype))
+    prefix = sampletype.sample_id_prefix
+    period = current_period()
+    return format_sample_id(prefix, period, server.next_seq(prefix, period))
+
+
+def aliquot_template(container, aliquot_type):
+    """Return the id_template of an aliquot type, from the sample type of
+    the sample that container belongs to.
+    """
+    for parent in aq_chain(container):
+        if ISample.providedBy(parent):
+            sampletype = parent.sample_type.to_object
+            for row in getattr(sampletype, 'aliquot_types', None) or []:
+                if row.get('title') == aliquot_type:
+                    return row.get('id_template')
+            break
+    return None
+
+
+def _free_aliquot_id(container, template, seq, taken=()):
+    """Return the first aliquot ID from seq on that is neither in container
+    nor in taken, with its seq and template.  A template that does not use
+    {seq} gives the same ID every time, so once that ID is taken the
+    default template is used instead.
+    """
+    sample_id = container.getId()
+    name = format_aliquot_id(template, sample_id, seq)
+    while name in container or name in taken:
+        if format_aliquot_id(template, sample_id, seq + 1) == name:
+            template = ALIQUOT_ID_TEMPLATE
+        else:
+            seq += 1
+        name = format_aliquot_id(template, sample_id, seq)
+    return name, seq, template
+
+
+def next_aliquot_id(container, template):
+    """Generate the ID of a new aliquot in a sample or aliquot.  Aliquots
+    are numbered per container; the container is being modified anyway, so
+    its counter is kept on it.
+    """
+    seq = getattr(container, '_aliquot_seq', 0) + 1
+    name, seq, template = _free_aliquot_id(container, template, seq)
+    container._aliquot_seq = seq
+    return name
+
+
+def next_aliquot_ids(container, template, count):
+    """Generate the IDs of count new aliquots in a sample or aliquot at
+    once, as count calls of next_aliquot_id would.
+    """
+    seq = getattr(container, '_aliquot_seq', 0)
+    ids = []
+    while len(ids) < count:
+        name, seq, template = _free_aliquot_id(container, template, seq + 1,
+                                               ids)
+        ids.append(name)
+    container._aliquot_seq = seq
+    return ids
@@ -4,8 +4,9 @@ from zope import schema
 from bika.lims import messagefactory as _
 from bika.lims.interfaces.analysisservice import IAnalysisService
 from bika.lims.interfaces.contact import IClientContact
-from bika.lims.interfaces.sample import ISample
 from plone.app.vocabularies.catalog import CatalogSource
+from plone.autoform import directives
+from plone.formwidget.autocomplete import AutocompleteFieldWidget
 from plone.supermodel import model
 from z3c.relationfield import RelationChoice
 from z3c.relationfield import RelationList
@@ -40,11 +41,12 @@ class IAnalysisRequest(model.Schema):
         required=False,
     )
 
+    directives.widget(sample=AutocompleteFieldWidget)
     sample = RelationChoice(
         title=_(u"Sample"),
         description=_(u"Select an existing sample to create a secondary AR, "
                       u"or leave this field blank to register a new sample."),
-        source=CatalogSource(object_provides=ISample.__identifier__),
+        vocabulary='bika.lims.vocabularies.Samples',
         required=False,
     )
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from plone.supermodel import model
+from z3c.relationfield import RelationChoice
 from zope import schema
 
 from bika.lims import messagefactory as _
@@ -45,11 +46,11 @@ class IAnalysisService(model.Schema):
             u"calculations, instrument imports, and bulk AR requests."),
     )
 
-    calculation = schema.Choice(
-        title=_(u"Type of Aliquot"),
-        description=_(u"Possible aliquot types are controlled by the sample "
-                      u"type settings."),
-        vocabulary="bika.lims.vocabularies.calculation.Calculations",
+    calculation = RelationChoice(
+        title=_(u"Calculation"),
+        description=_(u"The calculation used to compute the result of "
+                      u"this analysis from other results."),
+        vocabulary="bika.lims.vocabularies.Calculations",
         required=False,
     )
 
@@ -3,10 +3,16 @@ from zope import schema
 
 from collective.z3cform.datagridfield import DictRow
 from plone.directives import form
+from plone.app.vocabularies.catalog import CatalogSource
 from plone.supermodel import model
-from zope.interface import Attribute
+from z3c.relationfield import RelationChoice
+from z3c.relationfield import RelationList
+from zope.interface import Invalid
 
 from bika.lims import messagefactory as _
+from bika.lims.interfaces.analysisservice import IAnalysisService
+from bika.lims.calculation.formula import FormulaError
+from bika.lims.calculation.formula import parse
 
 
 class IInterimRowSchema(form.Schema):
@@ -65,6 +71,17 @@ INTERIMROW_DEFAULT = [
 ]
 
 
+def formula_constraint(value):
+    """Formulas must compile.  Which variables exist is only known when
+    the calculation is evaluated.
+    """
+    try:
+        parse(value)
+    except FormulaError as err:
+        raise Invalid(err.args[0])
+    return True
+
+
 class ICalculation(model.Schema):
     """Analysis Service defines the tests available in the LIMS.
     """
@@ -92,6 +109,17 @@ class ICalculation(model.Schema):
     formula = schema.Text(
         title=_(u"Calculation Formula"),
         description=_(u"calculation_formula_description"),
+        constraint=formula_constraint,
     )
 
-    dependent_services = Attribute("Dependent Services")
+    dependent_services = RelationList(
+        title=_(u"Dependent Services"),
+        description=_(u"Services whose results this calculation needs, in "
+                      u"addition to the keywords used in the formula."),
+        value_type=RelationChoice(
+            title=u"Dependent Services",
+            source=CatalogSource(
+                object_provides=IAnalysisService.__identifier__),
+        ),
+        required=False,
+    )
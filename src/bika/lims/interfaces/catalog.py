@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from zope.interface import Interface
+
+
+class IBikaCatalog(Interface):
+    """Marker for the catalog tool that indexes only LIMS content
+    """
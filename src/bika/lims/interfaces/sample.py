@@ -7,6 +7,8 @@ from bika.lims.interfaces.sampletype import ISampleType
 from plone.app.vocabularies.catalog import CatalogSource
 from plone.supermodel import model
 from z3c.relationfield import RelationChoice
+from zope.interface import Interface
+
 
 class ISample(model.Schema):
     """Represents the original sample.
@@ -34,3 +36,15 @@ class ISample(model.Schema):
         title=_(u"Date Sampled"),
         required=False,
     )
+
+
+class ISamplesFolder(Interface):
+    """Marker for the folders that hold samples.  New samples in these
+    folders are named by the ID server.
+    """
+
+
+class IExpiredSample(Interface):
+    """Marker for samples that were kept longer than their sample type's
+    retention period.
+    """
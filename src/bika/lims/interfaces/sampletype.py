@@ -41,10 +41,10 @@ class IAliquotTypesRow(form.Schema):
 
 
 ALIQUOT_TYPES_DEFAULT = [
-    {'title': 'Bulk',
-     'idTemplate': '{sample_id:s}-001',
-     'MinimumVolume': '',
-     'AutoCount': 1,
+    {'title': u'Bulk',
+     'id_template': u'{sample_id:s}-001',
+     'minimum_volume': u'',
+     'auto_count': 1,
      }
 ]
 
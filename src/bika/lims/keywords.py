@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Analysis service keywords.
+
+Keywords identify analysis services in calculations, instrument imports and
+bulk AR requests.  keyword_map() returns a keyword to service UID mapping
+built from bika_catalog metadata, without loading any service.  Maps are
+kept per LIMS, tagged with the configuration version that the analysis
+service subscribers bump, and rebuilt on first use after a change or a
+restart.  A published map is never modified, only replaced, so threads
+share it without locking.
+"""
+from threading import Lock
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.interfaces.analysisservice import IAnalysisService
+from bika.lims.utils.configversion import getConfigVersion
+from bika.lims.utils.limsroot import getLims
+
+_lock = Lock()
+_maps = {}
+
+
+def _query(lims, **kw):
+    # Unrestricted: maps are shared by all users, and keywords must be
+    # unique among all services, visible to the current user or not.
+    catalog = getBikaCatalog(lims)
+    return catalog.unrestrictedSearchResults(
+        object_provides=IAnalysisService.__identifier__,
+        path='/'.join(lims.getPhysicalPath()), **kw)
+
+
+def keyword_map(context):
+    """Return the keyword to service UID mapping of the LIMS containing
+    context.  The mapping must not be modified.
+    """
+    lims = getLims(context)
+    if lims is None:
+        return {}
+    key = lims.getPhysicalPath()
+    version = getConfigVersion(lims)
+    entry = _maps.get(key)
+    if entry is not None and version is not None and entry[0] == version:
+        return entry[1]
+    mapping = dict((proxy.keyword, proxy.UID)
+                   for proxy in _query(lims) if proxy.keyword)
+    if version is not None:
+        with _lock:
+            _maps[key] = (version, mapping)
+    return mapping
+
+
+def getServiceUID(context, keyword):
+    """Return the UID of the analysis service with keyword, or None.
+    """
+    return keyword_map(context).get(keyword)
+
+
+def keyword_uids(context, keyword):
+    """Return the UIDs of all services using keyword, straight from the
+    catalog, including changes made in the current transaction.
+    """
+    lims = getLims(context)
+    if lims is None:
+        return []
+    return [proxy.UID for proxy in _query(lims, keyword=keyword)]
+
+
+def clear():
+    with _lock:
+        _maps.clear()
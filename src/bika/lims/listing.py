@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Keyset paginated listings of samples, aliquots and Analysis Requests.
+
+A listing is a bika_catalog query on indexed fields, sorted on one of
+SORT_INDEXES.  Pages are not found by offset.  Each sort index has a key
+index in SORT_KEYS, whose values are the sort value followed by the UID:
+they sort the same way and are unique.  The cursor of a page holds the
+key of its last item, and the next page is a range query starting at that
+key, so a deep page costs no more than the first one, and cursors have the
+same size however many items share a sort value.  Items are built from
+catalog metadata only; no object is woken up.  Listings of a client are
+narrowed down by the client index, which bika.lims.clientsecurity
+searches without querying allowedRolesAndUsers.
+"""
+import base64
+import json
+from datetime import datetime
+
+from DateTime import DateTime
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.clientsecurity import context_client
+from bika.lims.clientsecurity import search
+
+TYPES = {
+    'samples': 'Sample',
+    'aliquots': 'Aliquot',
+    'analysisrequests': 'AnalysisRequest',
+}
+
+# Indexes that can be filtered on, with one value or a list of values
+FILTERS = (
+    'review_state',
+    'client',
+    'client_sample_id',
+    'sample_type',
+    'sample_point',
+    'department',
+    'aliquot_type',
+    'purpose',
+    'root_sample',
+)
+
+# Indexes that have a value for every listed item
+SORT_INDEXES = ('id', 'date_created')
+
+# Unique keys that sort like the SORT_INDEXES, see catalog.indexers
+SORT_KEYS = {
+    'id': 'id_key',
+    'date_created': 'date_created_key',
+}
+
+# Metadata columns of the listed items
+FIELDS = (
+    'UID',
+    'getId',
+    'Title',
+    'portal_type',
+    'review_state',
+    'client',
+    'client_title',
+    'client_sample_id',
+    'sample_type',
+    'sample_type_title',
+    'sample_point',
+    'sample_point_title',
+    'department',
+    'department_title',
+    'aliquot_type',
+    'purpose',
+    'root_sample',
+    'date_sampled',
+    'date_created',
+    'date_received',
+    'expiry_date',
+)
+
+LIMIT = 100
+MAX_LIMIT = 5000
+
+
+class ListingError(ValueError):
+    """A listing was asked for with invalid parameters.
+    """
+
+
+def json_value(value):
+    """Return a metadata value as it is sent in JSON.
+    """
+    if isinstance(value, DateTime):
+        return value.ISO8601()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(sort_on, reverse, key):
+    data = json.dumps([sort_on, reverse, key])
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return the sort index and order and the key of the last item of a
+    cursor.
+    """
+    try:
+        data = base64.urlsafe_b64decode(str(cursor))
+        sort_on, reverse, key = json.loads(data.decode('utf-8'))
+    except (TypeError, ValueError):
+        raise ListingError(u"Invalid cursor")
+    if not isinstance(key, basestring):
+        raise ListingError(u"Invalid cursor")
+    return sort_on, bool(reverse), key
+
+
+class Listing(object):
+    """One page of a listing.  Iterate over it to get the items, after
+    which `next_cursor` is the cursor of the next page, or None if this is
+    the last one.
+    """
+
+    def __init__(self, context, kind, filters=None, sort_on='id',
+                 reverse=False, limit=LIMIT, cursor=None):
+        if kind not in TYPES:
+            raise ListingError(u"Unknown listing %s" % kind)
+        if not 0 < limit <= MAX_LIMIT:
+            raise ListingError(u"limit must be between 1 and %s" % MAX_LIMIT)
+        self.context = context
+        self.limit = limit
+        self.key = None
+        if cursor:
+            sort_on, reverse, self.key = decode_cursor(cursor)
+        if sort_on not in SORT_INDEXES:
+            raise ListingError(u"Cannot sort on %s" % sort_on)
+        self.sort_on = sort_on
+        self.reverse = reverse
+        self.query = {
+            'portal_type': TYPES[kind],
+            'path': '/'.join(context.getPhysicalPath()),
+        }
+        for name, value in (filters or {}).items():
+            if name not in FILTERS:
+                raise ListingError(u"Cannot filter on %s" % name)
+            self.query[name] = value
+        client = context_client(context)
+        if client is not None and 'client' not in self.query:
+            self.query['client'] = client
+        self.next_cursor = None
+
+    def _proxies(self):
+        index = SORT_KEYS[self.sort_on]
+        query = dict(self.query)
+        query['sort_on'] = index
+        if self.reverse:
+            query['sort_order'] = 'reverse'
+        if self.key is not None:
+            query[index] = {'query': self.key,
+                            'range': 'max' if self.reverse else 'min'}
+        # The range starts with the last item of the previous page, and
+        # one more item tells whether there is a next page.
+        query['sort_limit'] = self.limit + 2
+        return search(self.context, **query)
+
+    def __iter__(self):
+        index = getBikaCatalog(self.context)._catalog.getIndex(
+            SORT_KEYS[self.sort_on])
+        count = 0
+        key = self.key
+        for proxy in self._proxies():
+            entry = index.getEntryForObject(proxy.getRID())
+            if entry == self.key:
+                continue
+            if count == self.limit:
+                self.next_cursor = encode_cursor(self.sort_on, self.reverse,
+                                                 key)
+                return
+            key = entry
+            count += 1
+            yield self.item(proxy)
+
+    def item(self, proxy):
+        item = dict((name, json_value(getattr(proxy, name, None)))
+                    for name in FIELDS)
+        item['url'] = proxy.getURL()
+        return item
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Patches to Plone and CMF.
+
+CatalogAware.reindexObjectSecurity only updates portal_catalog, and it is
+what the sharing tab, plone.api and workflow changes call when roles or
+permissions change.  The patched method updates bika_catalog as well, so
+restricted bika_catalog searches never see stale security.
+"""
+from Products.CMFCore.CMFCatalogAware import CatalogAware
+
+_reindexObjectSecurity = CatalogAware.reindexObjectSecurity
+
+
+def reindexObjectSecurity(self, skip_self=False):
+    """Reindex the security of self and its content in portal_catalog and
+    bika_catalog.
+    """
+    from bika.lims.subscribers.catalog import reindex_security
+    _reindexObjectSecurity(self, skip_self)
+    reindex_security(self, skip_self)
+
+
+def apply():
+    """Apply the patches, once.
+    """
+    if getattr(CatalogAware, '_bika_patched', False):
+        return
+    CatalogAware.reindexObjectSecurity = reindexObjectSecurity
+    CatalogAware._bika_patched = True
@@ -14,6 +14,13 @@ AddSample = "Bika LIMS: Add Sample"
 AddSamplePoint = "Bika LIMS: Add Sample Point"
 AddSampleType = "Bika LIMS: Add Sample Type"
 
+CancelAndReinstate = "Bika LIMS: Cancel and Reinstate"
+DisposeSample = "Bika LIMS: Dispose Sample"
+PublishResults = "Bika LIMS: Publish Results"
+ReceiveSample = "Bika LIMS: Receive Sample"
+SubmitResults = "Bika LIMS: Submit Results"
+VerifyResults = "Bika LIMS: Verify Results"
+
 
 def setup_default_permissions(portal):
     """Setup default portal rolemap
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""Opt-in instrumentation of requests.
+
+When profiling.zcml is included, e.g. with
+
+    zcml-additional =
+        <configure xmlns="http://namespaces.zope.org/zope">
+          <include package="bika.lims" file="profiling.zcml" />
+        </configure>
+
+in the instance part of the buildout, every request records the number
+and duration of its bika_catalog queries, the ZODB objects it loaded and
+stored, and the time spent in each bika.lims.subscribers handler and
+bika.lims vocabulary factory.  Handler and factory times include whatever
+they trigger, e.g. the handlers of the events they notify.  A summary is
+sent back in the X-Bika-Profile response header, and the profiles of the
+last RECENT requests are kept in memory for the @@lims-profile view, which
+aggregates them into percentiles.
+
+The handlers and vocabulary factories are wrapped in the global registry
+once, when the process starts, so without profiling.zcml nothing is wrapped
+and nothing is counted.  Recording starts after traversal, once the site
+and its ZODB connection are known.
+"""
+import math
+import threading
+import time
+from collections import deque
+from functools import WRAPPER_ASSIGNMENTS
+from functools import wraps
+from threading import Lock
+
+from zope.component import getGlobalSiteManager
+from zope.component.hooks import getSite
+from zope.schema.interfaces import IVocabularyFactory
+
+HEADER = 'X-Bika-Profile'
+
+# Number of request profiles kept for @@lims-profile
+RECENT = 500
+
+PERCENTILES = (50, 90, 99)
+
+METRICS = ('seconds', 'catalog_queries', 'catalog_seconds', 'loads',
+           'stores')
+
+SUBSCRIBERS = 'bika.lims.subscribers.'
+VOCABULARIES = 'bika.lims.'
+
+# True while the handlers and factories are wrapped
+active = False
+
+# Number of installed instrumentations that count catalog queries;
+# bika_catalog only times its queries while it is not 0.
+counting = 0
+
+_local = threading.local()
+_lock = Lock()
+_recent = deque(maxlen=RECENT)
+_wrapped = []
+
+
+def catalog_query(seconds):
+    """Count a bika_catalog query of the current thread.
+    """
+    _local.queries = getattr(_local, 'queries', 0) + 1
+    _local.query_seconds = getattr(_local, 'query_seconds', 0.0) + seconds
+
+
+def activity():
+    """Return the catalog queries and their seconds, and the ZODB loads
+    and stores, of the current thread so far.
+    """
+    jar = getattr(getSite(), '_p_jar', None)
+    loads, stores = jar.getTransferCounts() if jar is not None else (0, 0)
+    return (getattr(_local, 'queries', 0),
+            getattr(_local, 'query_seconds', 0.0), loads, stores)
+
+
+class Profile(object):
+    """What one request did.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.started = time.time()
+        self.start = activity()
+        self.timings = {'subscribers': {}, 'vocabularies': {}}
+
+    def add(self, kind, name, seconds):
+        entry = self.timings[kind].setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def result(self):
+        queries, query_seconds, loads, stores = [
+            after - before for before, after in zip(self.start, activity())]
+        result = {
+            'url': self.url,
+            'seconds': time.time() - self.started,
+            'catalog_queries': queries,
+            'catalog_seconds': query_seconds,
+            'loads': loads,
+            'stores': stores,
+        }
+        for kind, timings in self.timings.items():
+            result[kind] = dict((name, tuple(entry))
+                                for name, entry in timings.items())
+        return result
+
+
+def header(result):
+    """Format a request profile for the X-Bika-Profile header.
+    """
+    return ('time=%.1fms; catalog=%d/%.1fms; loads=%d; stores=%d; '
+            'subscribers=%.1fms; vocabularies=%.1fms' % (
+                result['seconds'] * 1000, result['catalog_queries'],
+                result['catalog_seconds'] * 1000, result['loads'],
+                result['stores'],
+                sum(s for c, s in result['subscribers'].values()) * 1000,
+                sum(s for c, s in result['vocabularies'].values()) * 1000))
+
+
+def start(url):
+    """Start recording a request in the current thread.
+    """
+    _local.profile = Profile(url)
+    return _local.profile
+
+
+def finish():
+    """Stop recording the request of the current thread, keep its profile
+    and return it, or None if nothing was being recorded.
+    """
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return None
+    _local.profile = None
+    result = profile.result()
+    with _lock:
+        _recent.append(result)
+    return result
+
+
+def recent():
+    with _lock:
+        return list(_recent)
+
+
+def clear():
+    with _lock:
+        _recent.clear()
+
+
+def _timed(kind, name, func):
+    @wraps(func, assigned=[attr for attr in WRAPPER_ASSIGNMENTS
+                           if hasattr(func, attr)])
+    def timed(*args, **kw):
+        profile = getattr(_local, 'profile', None)
+        if profile is None:
+            return func(*args, **kw)
+        started = time.time()
+        try:
+            return func(*args, **kw)
+        finally:
+            profile.add(kind, name, time.time() - started)
+    timed.original = func
+    return timed
+
+
+def _reregister(requireds, replace):
+    """Unregister the handlers of the global registry for the requireds and
+    register replace(handler) for each, in the same order, which keeps
+    their order among each other.
+    """
+    gsm = getGlobalSiteManager()
+    registrations = [registration for registration in gsm.registeredHandlers()
+                     if registration.required in requireds]
+    for registration in registrations:
+        gsm.unregisterHandler(registration.handler, registration.required,
+                              registration.name)
+    for registration in registrations:
+        gsm.registerHandler(replace(registration.handler),
+                            registration.required, registration.name,
+                            registration.info, event=False)
+
+
+def wrap_handlers(wrap):
+    """Replace the handlers of the global registry for which wrap(handler)
+    returns a wrapper.  Returns what unwrap_handlers needs to undo it.
+    """
+    wrappers = {}
+    requireds = set()
+    for registration in getGlobalSiteManager().registeredHandlers():
+        handler = registration.handler
+        wrapper = wrappers.get(handler) or wrap(handler)
+        if wrapper is not None:
+            wrappers[handler] = wrapper
+            requireds.add(registration.required)
+    _reregister(requireds, lambda handler: wrappers.get(handler, handler))
+    return requireds, wrappers
+
+
+def unwrap_handlers(wrapped):
+    requireds, wrappers = wrapped
+    originals = dict((wrapper, handler)
+                     for handler, wrapper in wrappers.items())
+    _reregister(requireds, lambda handler: originals.get(handler, handler))
+
+
+def _timed_subscriber(handler):
+    module = getattr(handler, '__module__', None) or ''
+    if module.startswith(SUBSCRIBERS):
+        return _timed('subscribers', '%s.%s' % (module[len(SUBSCRIBERS):],
+                                                handler.__name__), handler)
+    return None
+
+
+def install():
+    """Wrap the bika.lims subscribers and vocabulary factories of the
+    global registry with timers.
+    """
+    global active, counting
+    gsm = getGlobalSiteManager()
+    with _lock:
+        if active:
+            return
+        _wrapped.append(('handlers', wrap_handlers(_timed_subscriber)))
+        for registration in list(gsm.registeredUtilities()):
+            if registration.provided is not IVocabularyFactory or \
+                    not registration.name.startswith(VOCABULARIES):
+                continue
+            wrapper = _timed('vocabularies', registration.name,
+                             registration.component)
+            gsm.registerUtility(wrapper, IVocabularyFactory,
+                                registration.name, registration.info,
+                                event=False)
+            _wrapped.append(('utility', registration))
+        active = True
+        counting += 1
+
+
+def uninstall():
+    """Put the original subscribers and vocabulary factories back.
+    """
+    global active, counting
+    gsm = getGlobalSiteManager()
+    with _lock:
+        if not active:
+            return
+        for kind, wrapped in _wrapped:
+            if kind == 'handlers':
+                unwrap_handlers(wrapped)
+            else:
+                gsm.registerUtility(wrapped.component, IVocabularyFactory,
+                                    wrapped.name, wrapped.info, event=False)
+        del _wrapped[:]
+        active = False
+        counting -= 1
+
+
+def percentiles(values):
+    """Return the PERCENTILES, by nearest rank, and the maximum of values.
+    """
+    values = sorted(values)
+    if not values:
+        return {}
+    result = dict(('p%s' % p, values[max(0, int(math.ceil(
+        p / 100.0 * len(values))) - 1)]) for p in PERCENTILES)
+    result['max'] = values[-1]
+    return result
+
+
+def summary(profiles=None, slowest=10):
+    """Aggregate request profiles, the recent ones by default.
+    """
+    if profiles is None:
+        profiles = recent()
+    result = {
+        'requests': len(profiles),
+        'metrics': dict((name, percentiles([p[name] for p in profiles]))
+                        for name in METRICS),
+        'slowest': [dict((key, p[key]) for key in ('url',) + METRICS)
+                    for p in sorted(profiles, key=lambda p: p['seconds'],
+                                    reverse=True)[:slowest]],
+    }
+    for kind in ('subscribers', 'vocabularies'):
+        timings = {}
+        for profile in profiles:
+            for name, (calls, seconds) in profile[kind].items():
+                timings.setdefault(name, ([], []))
+                timings[name][0].append(calls)
+                timings[name][1].append(seconds)
+        result[kind] = dict(
+            (name, dict(percentiles(seconds), requests=len(calls),
+                        calls=sum(calls)))
+            for name, (calls, seconds) in timings.items())
+    return result
+
+
+def Starting(event):
+    install()
+
+
+def AfterTraversal(event):
+    request = event.request
+    start(request.get('ACTUAL_URL') or request.get('URL'))
+
+
+def Finished(event):
+    result = finish()
+    if result is not None:
+        event.request.response.setHeader(HEADER, header(result))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Client folder structure and permissions.
+
+The folders and local permissions of a client are described by the
+CLIENT_FOLDERS and CLIENT_PERMISSIONS tables, which both the client Added
+subscriber and provision_clients() apply, so that clients created either
+way get exactly the same structure and security settings.
+
+provision_clients() creates many clients in one transaction without firing
+add events for every client and folder.  Each object is added with events
+suppressed, gets its initial workflow state and the permission table, and
+is registered in the intid utility and indexed once, after all clients
+have been built.  Subscribers to add events of clients and their folders
+are therefore not called for bulk provisioned clients.
+"""
+from Products.CMFCore.permissions import ModifyPortalContent
+from plone import api
+from plone.dexterity.utils import createContent
+from zope.interface import alsoProvides
+
+from bika.lims.config import LARGE_FOLDERS
+from bika.lims.content.container import make_unordered
+from bika.lims.interfaces.sample import ISamplesFolder
+from bika.lims.permissions import AddAnalysisRequest
+from bika.lims.permissions import AddClient
+from bika.lims.permissions import AddContact
+from bika.lims.permissions import AddSample
+from bika.lims.permissions import AddSamplePoint
+from bika.lims.permissions import disallow_default_contenttypes
+from bika.lims.utils.bulk import add_quietly
+from bika.lims.utils.bulk import index_added
+
+CLIENT_ROLES = ('Manager', 'LabManager', 'LabClerk', 'Owner')
+
+# (path, title, disallow default content types), parents first
+CLIENT_FOLDERS = (
+    (('samples',), 'Samples', True),
+    (('analysisrequests',), 'Analysis Requests', True),
+    (('configuration',), 'Configuration', True),
+    (('configuration', 'contacts'), 'Contacts', False),
+    (('configuration', 'samplepoints'), 'Sample Points', False),
+)
+
+# (path, permission, roles); the empty path is the client itself
+CLIENT_PERMISSIONS = (
+    ((), AddClient, ()),
+    (('samples',), AddSample, CLIENT_ROLES),
+    (('samples',), ModifyPortalContent, CLIENT_ROLES),
+    (('analysisrequests',), AddAnalysisRequest, CLIENT_ROLES),
+    (('analysisrequests',), ModifyPortalContent, CLIENT_ROLES),
+    (('configuration', 'contacts'), AddContact, CLIENT_ROLES),
+    (('configuration', 'contacts'), ModifyPortalContent, CLIENT_ROLES),
+    (('configuration', 'samplepoints'), AddSamplePoint, CLIENT_ROLES),
+    (('configuration', 'samplepoints'), ModifyPortalContent, CLIENT_ROLES),
+)
+
+
+def _traverse(client, path):
+    obj = client
+    for name in path:
+        obj = obj._getOb(name)
+    return obj
+
+
+def build_client(client, add_folder, reindex=True):
+    """Create the folders of a client with add_folder(parent, id, title)
+    and set the client's local permissions.  Returns the new folders.
+    """
+    folders = []
+    for path, title, restricted in CLIENT_FOLDERS:
+        folder = add_folder(_traverse(client, path[:-1]), path[-1], title)
+        if restricted:
+            disallow_default_contenttypes(folder)
+        if len(path) == 1 and path[0] in LARGE_FOLDERS:
+            make_unordered(folder)
+        if path == ('samples',):
+            alsoProvides(folder, ISamplesFolder)
+            if reindex:
+                folder.reindexObject(idxs=['object_provides'])
+        folders.append(folder)
+    for path, permission, roles in CLIENT_PERMISSIONS:
+        _traverse(client, path).manage_permission(permission, list(roles), 0)
+    return folders
+
+
+def setup_client(client):
+    """Build the structure of a client that was added the usual way.
+    """
+    build_client(client, lambda parent, id, title:
+                 api.content.create(parent, 'Folder', id, title))
+
+
+def _add_folder(parent, id, title):
+    folder = createContent('Folder', title=title)
+    folder.id = id
+    return add_quietly(parent, folder)
+
+
+def provision_clients(container, clients):
+    """Create clients in container.  clients is an iterable of mappings of
+    IClient field values, each including the client's `id`.  Returns the
+    new clients.
+    """
+    created = []
+    new = []
+    for fields in clients:
+        fields = dict(fields)
+        client = createContent('Client', **fields)
+        client = add_quietly(container, client)
+        created.append(client)
+        new.append(client)
+        new.extend(build_client(client, _add_folder, reindex=False))
+
+    index_added(new)
+    return created
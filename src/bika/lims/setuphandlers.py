@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from Products.CMFPlone.interfaces import INavigationSchema
 from Products.CMFPlone.interfaces import INonInstallable
+from bika.lims.catalog.tool import setup_catalog
 from bika.lims.permissions import setup_default_permissions
 from plone import api
 from plone.registry.interfaces import IRegistry
@@ -123,6 +124,7 @@ def postInstall(context):
     setup_roles(context)
     setup_groups(context)
     setup_permissions(context)
+    setup_catalog(portal)
 
     create_lims(portal)
     add_to_displayed_types('LIMSRoot')
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from bika.lims.calculation.cache import invalidate
+
+
+def Modified(calculation, event):
+    """Recompile the formula of a calculation on next use after it is
+    edited.
+    """
+    invalidate(calculation)
+
+
+def Removed(calculation, event):
+    """Forget the compiled formula of a deleted calculation.
+    """
+    invalidate(calculation)
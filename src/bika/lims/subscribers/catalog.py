@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from Products.CMFCore.utils import getToolByName
+from zope.container.interfaces import IContainerModifiedEvent
+
+from bika.lims.catalog import CATALOG_ID
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog import is_cataloged
+from bika.lims.catalog.queue import getIndexQueue
+
+
+def index(obj):
+    """Queue indexing obj in bika_catalog, or index it right away while
+    indexing is immediate.
+    """
+    queue = getIndexQueue()
+    if queue is not None:
+        queue.index(obj, getBikaCatalog(obj))
+    else:
+        getBikaCatalog(obj).catalog_object(obj)
+
+
+def reindex_security(obj, skip_self=False):
+    """Reindex allowedRolesAndUsers in bika_catalog for obj and the LIMS
+    content inside it, after their roles or permissions changed.
+    """
+    catalog = getToolByName(obj, CATALOG_ID, None)
+    if catalog is None:
+        return
+    path = '/'.join(obj.getPhysicalPath())
+    queue = getIndexQueue()
+    for proxy in catalog.unrestrictedSearchResults(path=path):
+        if skip_self and proxy.getPath() == path:
+            continue
+        child = proxy._unrestrictedGetObject()
+        if queue is not None:
+            queue.index(child, catalog, idxs=['allowedRolesAndUsers'])
+        else:
+            catalog.catalog_object(child, proxy.getPath(),
+                                   idxs=['allowedRolesAndUsers'])
+
+
+def WillBeMoved(obj, event):
+    """Unindex LIMS content from bika_catalog before it is moved or removed,
+    while it can still be found at its old path.
+    """
+    if event.oldParent is None or not is_cataloged(obj):
+        return
+    catalog = getBikaCatalog(obj)
+    queue = getIndexQueue()
+    if queue is not None:
+        queue.unindex(obj, catalog)
+    else:
+        catalog.uncatalog_object('/'.join(obj.getPhysicalPath()))
+
+
+def Moved(obj, event):
+    """Index LIMS content in bika_catalog when it is added or moved.
+    """
+    if event.newParent is None or not is_cataloged(obj):
+        return
+    index(obj)
+
+
+def Modified(obj, event):
+    """Reindex LIMS content in bika_catalog after it is edited.
+    """
+    if IContainerModifiedEvent.providedBy(event) or not is_cataloged(obj):
+        return
+    index(obj)
@@ -1,14 +1,6 @@
 # -*- coding: utf-8 -*-
-from Products.CMFCore.permissions import ModifyPortalContent
+from bika.lims.provisioning import setup_client
 
-from bika.lims.permissions import AddAnalysisRequest
-from bika.lims.permissions import AddClient
-from bika.lims.permissions import AddContact
-from bika.lims.permissions import AddSample
-from bika.lims.permissions import AddSamplePoint
-from plone import api
-
-from bika.lims.permissions import disallow_default_contenttypes
 
 def Added(client, event):
     """When a new Client is created, we must create it's folder structure and
@@ -17,43 +9,8 @@ def Added(client, event):
     The order in which items are created here defines the default order
     of the site navigation.
 
-    The permissions set here are inherited by children.
+    The permissions set here are inherited by children.  The structure and
+    permissions are defined in bika.lims.provisioning, which also creates
+    clients in bulk.
     """
-
-    # Prevent anyone from adding a Client inside of a Client
-    client.manage_permission(AddClient, [], 0)
-
-    # Create client/* folders and set permissions
-    # -------------------------------------------
-    for x in [
-        ['samples', 'Samples'],
-        ['analysisrequests', 'Analysis Requests'],
-        ['configuration', 'Configuration'],
-    ]:
-        instance = api.content.create(client, 'Folder', x[0], x[1])
-        disallow_default_contenttypes(instance)
-
-    mp = client.samples.manage_permission
-    mp(AddSample, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-    mp(ModifyPortalContent, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-
-    mp = client.analysisrequests.manage_permission
-    mp(AddAnalysisRequest, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-    mp(ModifyPortalContent, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-
-    # Create client/configuration/* and set permissions
-    # -------------------------------------------------
-    folder = client.configuration
-    for x in [
-        ['contacts', 'Contacts'],
-        ['samplepoints', 'Sample Points'],
-    ]:
-        instance = api.content.create(folder, 'Folder', x[0], x[1])
-
-    mp = folder.contacts.manage_permission
-    mp(AddContact, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-    mp(ModifyPortalContent, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-
-    mp = folder.samplepoints.manage_permission
-    mp(AddSamplePoint, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
-    mp(ModifyPortalContent, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
+    setup_client(client)
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from bika.lims.utils.configversion import bumpConfigVersion
+from bika.lims.utils.limsroot import getLims
+
+
+def Changed(obj, event):
+    """Bump the configuration version of the LIMS when an analysis service,
+    calculation, sample type or sample point is added, edited, moved or
+    removed.
+    """
+    parent = getattr(event, 'newParent', None) or \
+        getattr(event, 'oldParent', None) or obj.__parent__
+    lims = getLims(parent)
+    if lims is not None:
+        bumpConfigVersion(lims)
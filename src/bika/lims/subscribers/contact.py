@@ -4,16 +4,17 @@ from bika.lims.utils.limsroot import getLims
 from zope.interface import alsoProvides
 
 
-def Added(contact, event):
+def WillBeAdded(contact, event):
     """I'll apply ILabContact or IClientContact interface to contacts, to
-    allow us to neatly select them later based on their context.
+    allow us to neatly select them later based on their context.  This
+    happens before the contact is added, so that it is indexed with its
+    interfaces in the first place.
     """
-
-    contextpath = '/'.join(contact.__parent__.getPhysicalPath())
-    lims = getLims(contact)
-    limspath = '/'.join(lims.configuration.contacts.getPhysicalPath())
-    if contextpath == limspath:
+    if event.newParent is None:
+        return
+    lims = getLims(event.newParent)
+    if event.newParent.getPhysicalPath() == \
+            lims.configuration.contacts.getPhysicalPath():
         alsoProvides(contact, ILabContact)
     else:
         alsoProvides(contact, IClientContact)
-    contact.reindexObject(idxs=['object_provides'])
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from zope.container.interfaces import IContainerModifiedEvent
+
+from bika.lims import counters
+from bika.lims.utils.limsroot import getLims
+
+
+def Added(obj, event):
+    """Count new samples, aliquots and Analysis Requests.
+    """
+    lims = getLims(event.newParent)
+    if lims is not None:
+        counters.change(lims, counters.deltas(obj, 1))
+
+
+def Removed(obj, event):
+    """Uncount removed samples, aliquots and Analysis Requests.
+    """
+    lims = getLims(event.oldParent)
+    if lims is not None:
+        counters.change(lims, counters.deltas(obj, -1))
+
+
+def AliquotModified(aliquot, event):
+    """Recount an aliquot whose department was changed.
+    """
+    if not IContainerModifiedEvent.providedBy(event):
+        counters.department_changed(aliquot)
+
+
+def Transitioned(event):
+    counters.transitioned(event.objects, event.transition, event.previous)
+
+
+def Expired(event):
+    lims = getLims(event.object)
+    if lims is not None:
+        counters.change(lims, {counters.EXPIRED: 1})
@@ -2,11 +2,17 @@
 from Products.CMFCore.permissions import ModifyPortalContent
 from plone import api
 from zope.event import notify
+from zope.interface import alsoProvides
 
 from bika.lims import messagefactory as _
+from bika.lims.config import LARGE_FOLDERS
+from bika.lims.content.container import make_unordered
 from bika.lims.events import LIMSCreatedEvent
+from bika.lims.interfaces.sample import ISamplesFolder
 from bika.lims.permissions import *
 from bika.lims.permissions import disallow_default_contenttypes
+from bika.lims.tracing import trace
+from bika.lims.utils.configversion import setupConfigVersion
 
 
 def Added(lims, event):
@@ -24,7 +30,9 @@ def Added(lims, event):
 
     create_structure(lims)
     structure_permissions(lims)
-    notify(LIMSCreatedEvent(lims))
+    setupConfigVersion(lims)
+    with trace('limsroot.LIMSCreatedEvent', lims):
+        notify(LIMSCreatedEvent(lims))
 
 
 def create_structure(lims):
@@ -38,6 +46,11 @@ def create_structure(lims):
             container=x[0], type=x[1], id=x[2], title=x[3])
         instance.setLayout('folder_contents')
         disallow_default_contenttypes(instance)
+        if x[2] in LARGE_FOLDERS:
+            make_unordered(instance)
+        if x[2] == 'samples':
+            alsoProvides(instance, ISamplesFolder)
+            instance.reindexObject(idxs=['object_provides'])
 
     configuration = lims.configuration
     for x in [
@@ -57,6 +70,8 @@ def create_structure(lims):
 
 
 def structure_permissions(lims):
+    workflow_permissions(lims)
+
     mp = lims.clients.manage_permission
     mp(AddClient, ['Manager', 'LabManager'], 0)
     mp(ModifyPortalContent, ['Manager', 'LabManager'], 0)
@@ -104,3 +119,16 @@ def structure_permissions(lims):
     mp = lims.configuration.calculations.manage_permission
     mp(AddCalculation, ['Manager', 'LabManager', 'Owner'], 0)
     mp(ModifyPortalContent, ['Manager', 'LabManager', 'Owner'], 0)
+
+
+def workflow_permissions(lims):
+    """Roles that may do the workflow transitions of samples, aliquots and
+    Analysis Requests anywhere in the LIMS
+    """
+    mp = lims.manage_permission
+    mp(ReceiveSample, ['Manager', 'LabManager', 'LabClerk', 'Sampler'], 0)
+    mp(DisposeSample, ['Manager', 'LabManager', 'LabClerk'], 0)
+    mp(CancelAndReinstate, ['Manager', 'LabManager', 'LabClerk'], 0)
+    mp(SubmitResults, ['Manager', 'LabManager', 'Analyst'], 0)
+    mp(VerifyResults, ['Manager', 'LabManager', 'Verifier'], 0)
+    mp(PublishResults, ['Manager', 'LabManager', 'Publisher'], 0)
@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
-from bika.lims.interfaces.samplepoint import ILabSamplePoint, IClientSamplePoint
+from bika.lims.aliquots import create_aliquots
 from bika.lims.permissions import AddAliquot
-from bika.lims.utils.limsroot import getLims
-from zope.interface import alsoProvides
 
 
 def Added(sample, event):
-    """Sample has been added, set some permissions
+    """Sample has been added, set some permissions and create its
+    automatic aliquots
     """
 
-    lims = getLims(sample)
     mp = sample.manage_permission
     mp(AddAliquot, ['Manager', 'LabManager', 'LabClerk', 'Owner'], 0)
+    create_aliquots(sample)
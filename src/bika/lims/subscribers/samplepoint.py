@@ -4,16 +4,17 @@ from bika.lims.utils.limsroot import getLims
 from zope.interface import alsoProvides
 
 
-def Added(samplepoint, event):
+def WillBeAdded(samplepoint, event):
     """I'll apply ILabSamplePoint or IClientSamplePoint interface to sample
     points, to allow us to neatly select them later based on their context.
+    This happens before the sample point is added, so that it is indexed
+    with its interfaces in the first place.
     """
-
-    contextpath = '/'.join(samplepoint.__parent__.getPhysicalPath())
-    lims = getLims(samplepoint)
-    limspath = '/'.join(lims.configuration.samplepoints.getPhysicalPath())
-    if contextpath == limspath:
+    if event.newParent is None:
+        return
+    lims = getLims(event.newParent)
+    if event.newParent.getPhysicalPath() == \
+            lims.configuration.samplepoints.getPhysicalPath():
         alsoProvides(samplepoint, ILabSamplePoint)
     else:
         alsoProvides(samplepoint, IClientSamplePoint)
-    samplepoint.reindexObject(idxs=['object_provides'])
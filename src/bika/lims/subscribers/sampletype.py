@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from zope.container.interfaces import IContainerModifiedEvent
+
+from bika.lims.expiry import reindex_samples
+
+
+def _changed(event, name):
+    """True if the modified event may have changed the field name.  Events
+    that do not describe their changes may have changed anything.
+    """
+    names = []
+    for description in event.descriptions:
+        names.extend(getattr(description, 'attributes', ()))
+    if not names:
+        return True
+    return any(attr == name or attr.endswith('.' + name) for attr in names)
+
+
+def Modified(sampletype, event):
+    """Reindex the expiry dates of the samples of a sample type when its
+    retention period is edited.
+    """
+    if IContainerModifiedEvent.providedBy(event):
+        return
+    if _changed(event, 'retention_period'):
+        reindex_samples(sampletype)
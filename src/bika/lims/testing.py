@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from plone.app.contenttypes.testing import PLONE_APP_CONTENTTYPES_FIXTURE
+from plone.app.robotframework.testing import REMOTE_LIBRARY_BUNDLE_FIXTURE
+from plone.app.testing import applyProfile
+from plone.app.testing import FunctionalTesting
+from plone.app.testing import IntegrationTesting
+from plone.app.testing import PloneSandboxLayer
+from plone.testing import z2
+
+import bika.lims
+
+
+class BikaLimsLayer(PloneSandboxLayer):
+
+    defaultBases = (PLONE_APP_CONTENTTYPES_FIXTURE,)
+
+    def setUpZope(self, app, configurationContext):
+        self.loadZCML(package=bika.lims)
+
+    def setUpPloneSite(self, portal):
+        applyProfile(portal, 'bika.lims:default')
+
+
+BIKA_LIMS_FIXTURE = BikaLimsLayer()
+
+
+BIKA_LIMS_INTEGRATION_TESTING = IntegrationTesting(
+    bases=(BIKA_LIMS_FIXTURE,),
+    name='BikaLimsLayer:IntegrationTesting'
+)
+
+
+BIKA_LIMS_FUNCTIONAL_TESTING = FunctionalTesting(
+    bases=(BIKA_LIMS_FIXTURE,),
+    name='BikaLimsLayer:FunctionalTesting'
+)
+
+
+BIKA_LIMS_ACCEPTANCE_TESTING = FunctionalTesting(
+    bases=(
+        BIKA_LIMS_FIXTURE,
+        REMOTE_LIBRARY_BUNDLE_FIXTURE,
+        z2.ZSERVER_FIXTURE
+    ),
+    name='BikaLimsLayer:AcceptanceTesting'
+)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Synthetic LIMS data for benchmarks and load tests.
+
+LIMSGenerator fills a LIMS root with configurable numbers of clients,
+contacts, departments, sample types with aliquot types, analysis services,
+calculations and samples, through the same APIs the add forms use, so the
+subscribers, indexers and ID server all do their usual work.  Contents are
+named and titled predictably, e.g. client-3 or "Service 12", and a seeded
+random generator picks the relations, so runs of the same size build the
+same LIMS.
+"""
+import random
+
+from plone import api
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+SIZES = {
+    'clients': 5,
+    'contacts': 20,
+    'departments': 3,
+    'sampletypes': 4,
+    'aliquot_types': 2,
+    'services': 20,
+    'calculations': 5,
+    'samples': 100,
+}
+
+
+class LIMSGenerator(object):
+    """Build the contents of a LIMS root.  Missing sizes default to SIZES;
+    contacts are spread over the clients, samples over the clients and
+    sample types.
+    """
+
+    def __init__(self, lims, seed=0, **sizes):
+        unknown = set(sizes) - set(SIZES)
+        if unknown:
+            raise ValueError("Unknown sizes: %s" % ", ".join(sorted(unknown)))
+        self.lims = lims
+        self.sizes = dict(SIZES, **sizes)
+        self.random = random.Random(seed)
+        self.intids = getUtility(IIntIds)
+        self.clients = []
+        self.contacts = []
+        self.departments = []
+        self.sampletypes = []
+        self.services = []
+        self.calculations = []
+        self.samples = []
+
+    def relation(self, obj):
+        return RelationValue(self.intids.getId(obj))
+
+    def generate(self):
+        """Build everything, configuration first, and return self.
+        """
+        self.add_departments()
+        self.add_sampletypes()
+        self.add_calculations()
+        self.add_services()
+        self.add_clients()
+        self.add_contacts()
+        self.add_samples()
+        return self
+
+    def add_departments(self, count=None):
+        container = self.lims.configuration.departments
+        for x in range(self._count('departments', count)):
+            self.departments.append(api.content.create(
+                container, 'Department', id='department-%s' % x,
+                title=u"Department %s" % x))
+        return self.departments
+
+    def add_sampletypes(self, count=None):
+        container = self.lims.configuration.sampletypes
+        aliquot_types = self.sizes['aliquot_types']
+        for x in range(self._count('sampletypes', count)):
+            self.sampletypes.append(api.content.create(
+                container, 'SampleType', id='sampletype-%s' % x,
+                title=u"Sample Type %s" % x,
+                sample_id_prefix=u"S%s" % x,
+                aliquot_types=[
+                    {'title': u"Aliquot %s" % y, 'id_template': u'',
+                     'minimum_volume': u'', 'auto_count': y == 0 and 1 or 0}
+                    for y in range(aliquot_types)]))
+        return self.sampletypes
+
+    def add_calculations(self, count=None):
+        """Add calculations that sum two of the uncalculated services that
+        add_services will create.
+        """
+        container = self.lims.configuration.calculations
+        count = self._count('calculations', count)
+        inputs = self.sizes['services'] - count
+        if inputs < 2:
+            raise ValueError("Not enough services for %s calculations" %
+                             count)
+        for x in range(count):
+            a, b = self.random.sample(range(inputs), 2)
+            self.calculations.append(api.content.create(
+                container, 'Calculation', id='calculation-%s' % x,
+                title=u"Calculation %s" % x, interim_fields=[],
+                formula=u"[S%s] + [S%s]" % (a, b)))
+        return self.calculations
+
+    def add_services(self, count=None):
+        """Add services keyed S0, S1...; the last ones use the
+        calculations, one each.
+        """
+        container = self.lims.configuration.analysisservices
+        count = self._count('services', count)
+        calculated = count - len(self.calculations)
+        for x in range(count):
+            calculation = None
+            if x >= calculated:
+                calculation = self.relation(self.calculations[x - calculated])
+            self.services.append(api.content.create(
+                container, 'AnalysisService', id='service-%s' % x,
+                title=u"Service %s" % x, keyword=u"S%s" % x,
+                calculation=calculation))
+        return self.services
+
+    def add_clients(self, count=None):
+        container = self.lims.clients
+        for x in range(self._count('clients', count)):
+            self.clients.append(api.content.create(
+                container, 'Client', id='client-%s' % x,
+                title=u"Client %s" % x))
+        return self.clients
+
+    def add_contacts(self, count=None):
+        for x in range(self._count('contacts', count)):
+            client = self.clients[x % len(self.clients)]
+            self.contacts.append(api.content.create(
+                client.configuration.contacts, 'Contact',
+                id='contact-%s' % x, title=u"Contact %s" % x,
+                first_name=u"Contact", last_name=u"%s" % x))
+        return self.contacts
+
+    def add_samples(self, count=None):
+        sampletypes = [self.intids.getId(sampletype)
+                       for sampletype in self.sampletypes]
+        for x in range(self._count('samples', count)):
+            client = self.clients[x % len(self.clients)]
+            sample = createContent(
+                'Sample',
+                sample_type=RelationValue(self.random.choice(sampletypes)))
+            self.samples.append(addContentToContainer(
+                client.samples, sample, checkConstraints=False))
+        return self.samples
+
+    def _count(self, name, count):
+        return self.sizes[name] if count is None else count
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Automatic aliquot tests for this package."""
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.interfaces.sampletype import ALIQUOT_TYPES_DEFAULT
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.workflow.engine import getState
+
+
+class TestAutoAliquots(unittest.TestCase):
+    """New samples get the aliquots their sample type creates
+    automatically."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        self.client = api.content.create(lims.clients, 'Client',
+                                         id='client-1', title=u"Client")
+        self.sampletype = api.content.create(
+            lims.configuration.sampletypes, 'SampleType', id='blood',
+            title=u"Blood", sample_id_prefix=u"B",
+            aliquot_types=ALIQUOT_TYPES_DEFAULT + [
+                {'title': u'Working', 'id_template': u'{sample_id}-W{seq}',
+                 'minimum_volume': u'', 'auto_count': 3},
+                {'title': u'Quality Control', 'id_template': u'',
+                 'minimum_volume': u'', 'auto_count': 0},
+            ])
+
+    def create_sample(self):
+        intid = getUtility(IIntIds).getId(self.sampletype)
+        sample = createContent('Sample', sample_type=RelationValue(intid))
+        return addContentToContainer(self.client.samples, sample)
+
+    def test_aliquots(self):
+        sample = self.create_sample()
+        sample_id = sample.getId()
+        self.assertEqual(sorted(sample.objectIds()),
+                         [sample_id + u'-001', sample_id + u'-W2',
+                          sample_id + u'-W3', sample_id + u'-W4'])
+        bulk = sample[sample_id + u'-001']
+        self.assertEqual(bulk.aliquot_type, u'Bulk')
+        self.assertEqual(bulk.purpose, u'Bulk')
+        self.assertEqual(sample[sample_id + u'-W2'].purpose, u'Working')
+        self.assertEqual(getState(bulk), 'available')
+
+        catalog = api.portal.get_tool('bika_catalog')
+        path = '/'.join(sample.getPhysicalPath())
+        self.assertEqual(len(catalog(path={'query': path, 'depth': 1})), 4)
+        portal_catalog = api.portal.get_tool('portal_catalog')
+        self.assertEqual(
+            len(portal_catalog(path={'query': path, 'depth': 1})), 4)
+
+    def test_manual_aliquot_after_auto(self):
+        sample = self.create_sample()
+        aliquot = addContentToContainer(
+            sample, createContent('Aliquot', aliquot_type=u'Working'))
+        self.assertEqual(aliquot.getId(), sample.getId() + u'-W5')
+
+    def test_manual_bulk_aliquot(self):
+        sample = self.create_sample()
+        sample_id = sample.getId()
+        for seq in (5, 6):
+            aliquot = addContentToContainer(
+                sample, createContent('Aliquot', aliquot_type=u'Bulk'))
+            self.assertEqual(aliquot.getId(), u'%s-%03d' % (sample_id, seq))
+
+    def test_default_bulk_row(self):
+        self.sampletype.aliquot_types = [
+            dict(ALIQUOT_TYPES_DEFAULT[0], auto_count=2)]
+        sample = self.create_sample()
+        sample_id = sample.getId()
+        self.assertEqual(sorted(sample.objectIds()),
+                         [sample_id + u'-001', sample_id + u'-002'])
+        aliquot = addContentToContainer(
+            sample, createContent('Aliquot', aliquot_type=u'Bulk'))
+        self.assertEqual(aliquot.getId(), sample_id + u'-003')
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Analysis Request import tests for this package."""
+import json
+import unittest
+from io import BytesIO
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+
+from bika.lims.arimport import ARImport
+from bika.lims.browser.arimport import ARImportView
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+CSV = b"""primary_contact,sample_type,sample_point,client_sample_id,services
+jane,Water,,CS-1,Ca Mg
+Jane Doe,water,,CS-2,"Ca, Mg"
+nobody,Water,,CS-3,Ca
+jane,Water,,CS-4,Ca K
+jane,Water,,CS-5,
+"""
+
+
+class TestARImport(unittest.TestCase):
+    """Rows are imported, bad rows are reported and skipped."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        configuration = lims.configuration
+        self.client = api.content.create(lims.clients, 'Client',
+                                         id='client-1', title=u"Client")
+        api.content.create(self.client.configuration.contacts, 'Contact',
+                           id='jane', title=u"Jane Doe",
+                           first_name=u"Jane", last_name=u"Doe")
+        api.content.create(configuration.sampletypes, 'SampleType',
+                           id='water', title=u"Water",
+                           sample_id_prefix=u"W")
+        for keyword in (u"Ca", u"Mg"):
+            api.content.create(configuration.analysisservices,
+                               'AnalysisService', title=keyword,
+                               keyword=keyword)
+
+    def test_import(self):
+        result = ARImport(self.client, commit=False).run(BytesIO(CSV))
+        self.assertEqual(result.rows, 5)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, error in result.errors], [4, 5, 6])
+        self.assertEqual(
+            len(list(self.client.analysisrequests.objectIds())), 2)
+        self.assertEqual(len(list(self.client.samples.objectIds())), 2)
+        catalog = api.portal.get_tool('bika_catalog')
+        self.assertEqual(len(catalog(client_sample_id=[u"CS-1", u"CS-2",
+                                                       u"CS-4"])), 2)
+
+    def test_authenticator(self):
+        request = self.layer['request']
+        request.method = 'POST'
+        request.form['csvfile'] = BytesIO(CSV)
+        result = json.loads(ARImportView(self.client, request)())
+        self.assertIn('error', result)
+        self.assertEqual(request.response.getStatus(), 403)
+        self.assertEqual(
+            len(list(self.client.analysisrequests.objectIds())), 0)
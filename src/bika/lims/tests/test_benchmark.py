@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the hot operations of this package.
+
+The benchmarks only run when BIKA_BENCHMARK_OUTPUT is set.  A LIMS root
+is created and filled by the synthetic data generator, and the time taken
+by each step, by rendering the vocabularies and by the common catalog
+queries is written as JSON to that file, so runs can be compared.  Sizes
+default to those of generator.SIZES and can be changed with environment
+variables, e.g.
+
+    BIKA_BENCHMARK_SAMPLES=5000 BIKA_BENCHMARK_CLIENTS=50 \\
+    BIKA_BENCHMARK_OUTPUT=before.json bin/test -s bika.lims -t test_benchmark
+"""
+import json
+import logging
+import os
+import platform
+import random
+import time
+import unittest
+from datetime import datetime
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.uuid.interfaces import IUUID
+from zope.component import getUtility
+from zope.schema.interfaces import IVocabularyFactory
+
+from bika.lims.calculation import graph
+from bika.lims.calculation.batch import evaluate_batch
+from bika.lims.calculation.formula import Formula
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.compatibility import compatibility_map
+from bika.lims.interfaces.contact import IContact
+from bika.lims.interfaces.sample import ISample
+from bika.lims.keywords import keyword_map
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.tests.generator import LIMSGenerator
+from bika.lims.tests.generator import SIZES
+from bika.lims.utils.lineage import family
+from bika.lims.vocabularies import cache
+
+OUTPUT = os.environ.get('BIKA_BENCHMARK_OUTPUT')
+
+REPEAT = 10
+
+FORMULA = u"([Ca] * 2.497) + ([Mg] * 4.118) / [dilution]"
+
+logger = logging.getLogger('bika.lims.benchmark')
+
+VOCABULARIES = (
+    # name, path of the context from the LIMS root
+    ('bika.lims.vocabularies.Contacts', 'configuration/contacts'),
+    ('bika.lims.vocabularies.ClientContacts', 'clients/client-0'),
+    ('bika.lims.vocabularies.LabContacts', 'configuration/contacts'),
+    ('bika.lims.vocabularies.Departments', 'configuration/departments'),
+    ('bika.lims.vocabularies.Calculations',
+     'configuration/analysisservices'),
+    ('bika.lims.vocabularies.Samples', 'clients/client-0'),
+)
+
+
+def sizes():
+    """SIZES, overridden by the BIKA_BENCHMARK_<SIZE> environment
+    variables.
+    """
+    return dict((name, int(os.environ.get('BIKA_BENCHMARK_%s' % name.upper(),
+                                          default)))
+                for name, default in SIZES.items())
+
+
+class Timings(object):
+    """Wall clock times of named operations.
+    """
+
+    def __init__(self):
+        self.results = {}
+
+    def time(self, name, func, count=1, repeat=1):
+        """Call func repeat times, and record the time per call and per
+        item for func calls that handle count items; a count of None is
+        the length of the result.  Returns the result of the last call.
+        """
+        started = time.time()
+        for x in range(repeat):
+            result = func()
+        seconds = (time.time() - started) / repeat
+        if count is None:
+            count = len(result)
+        self.results[name] = {
+            'count': count,
+            'repeat': repeat,
+            'seconds': round(seconds, 6),
+            'ms_per_item': round(seconds * 1000 / count, 4) if count else None,
+        }
+        return result
+
+    def write(self, path, sizes):
+        data = {
+            'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'sizes': sizes,
+            'timings': self.results,
+        }
+        with open(path, 'w') as stream:
+            json.dump(data, stream, indent=2, sort_keys=True)
+
+    def report(self):
+        lines = ["%-40s %10.4fs %6s items" % (name, result['seconds'],
+                                              result['count'])
+                 for name, result in sorted(self.results.items())]
+        return "\n".join(lines)
+
+
+@unittest.skipUnless(OUTPUT, "Set BIKA_BENCHMARK_OUTPUT to run benchmarks")
+class TestBenchmark(unittest.TestCase):
+    """Time building a LIMS of configurable size and using it."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.sizes = sizes()
+        self.timings = Timings()
+
+    def build(self):
+        timed = self.timings.time
+        lims = timed('create_lims_root', lambda: api.content.create(
+            self.portal, 'LIMSRoot', id='benchmark', title=u"Benchmark"))
+        generator = LIMSGenerator(lims, **self.sizes)
+        for name in ('departments', 'sampletypes', 'calculations',
+                     'services', 'clients', 'contacts', 'samples'):
+            timed('add_%s' % name, getattr(generator, 'add_%s' % name),
+                  count=self.sizes[name])
+        return generator
+
+    def render_vocabularies(self, lims):
+        for name, path in VOCABULARIES:
+            factory = getUtility(IVocabularyFactory, name)
+            context = lims.unrestrictedTraverse(path)
+
+            def render():
+                return [(term.token, term.title)
+                        for term in factory(context)]
+            cache.clear()
+            terms = self.timings.time('vocabulary_cold:%s' % name, render,
+                                      count=None)
+            self.timings.time('vocabulary:%s' % name, render,
+                              count=len(terms), repeat=REPEAT)
+
+    def run_queries(self, generator):
+        timed = self.timings.time
+        lims = generator.lims
+        catalog = getBikaCatalog(lims)
+        client = generator.clients[0]
+        client_path = '/'.join(client.getPhysicalPath())
+        sampletype = IUUID(generator.sampletypes[0])
+        queries = (
+            ('samples_of_client', {
+                'object_provides': ISample.__identifier__,
+                'path': client_path}),
+            ('samples_of_type', {
+                'object_provides': ISample.__identifier__,
+                'sample_type': sampletype}),
+            ('samples_by_state', {
+                'object_provides': ISample.__identifier__,
+                'review_state': 'sample_due',
+                'sort_on': 'id', 'sort_limit': 50}),
+            ('samples_by_expiry', {
+                'object_provides': ISample.__identifier__,
+                'sort_on': 'expiry_date', 'sort_limit': 50}),
+            ('contacts_sorted', {
+                'object_provides': IContact.__identifier__,
+                'sort_on': 'sortable_title'}),
+        )
+        for name, query in queries:
+            timed('query:%s' % name,
+                  lambda: [proxy.UID for proxy in catalog(query)],
+                  count=None, repeat=REPEAT)
+        timed('query:family', lambda: family(generator.samples[0]),
+              count=None, repeat=REPEAT)
+        timed('keyword_map', lambda: keyword_map(lims), repeat=REPEAT)
+        timed('compatibility_map',
+              lambda: compatibility_map(lims).allowed_points(sampletype),
+              repeat=REPEAT)
+        graph.clear()
+        timed('dependency_graph_cold', lambda: graph.getDependencyGraph(lims))
+
+    def evaluate_formula(self):
+        """Time evaluating a formula for one row per sample, in a batch and
+        one row at a time.
+        """
+        rows = self.sizes['samples']
+        formula = Formula(FORMULA)
+        rnd = random.Random(0)
+        columns = dict((name, [rnd.uniform(1, 100) for x in range(rows)])
+                       for name in formula.variables)
+
+        def one_by_one():
+            return [formula(dict((name, column[row])
+                                 for name, column in columns.items()))
+                    for row in range(rows)]
+        self.timings.time('formula_batch',
+                          lambda: evaluate_batch(formula, columns),
+                          count=rows, repeat=REPEAT)
+        self.timings.time('formula_one_by_one', one_by_one, count=rows,
+                          repeat=REPEAT)
+
+    def test_benchmark(self):
+        generator = self.build()
+        self.assertEqual(len(generator.samples), self.sizes['samples'])
+        self.render_vocabularies(generator.lims)
+        self.run_queries(generator)
+        self.evaluate_formula()
+        self.timings.write(OUTPUT, self.sizes)
+        logger.info("Benchmark results written to %s\n%s",
+                    os.path.abspath(OUTPUT), self.timings.report())
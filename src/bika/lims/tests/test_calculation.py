@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Calculation formula tests for this package."""
+import random
+import timeit
+import unittest
+
+from bika.lims.calculation import batch
+from bika.lims.calculation.batch import evaluate_batch
+from bika.lims.calculation.formula import Formula
+from bika.lims.calculation.formula import FormulaError
+from bika.lims.calculation.graph import CycleError
+from bika.lims.calculation.graph import DependencyGraph
+from bika.lims.calculation.graph import toposort
+
+FORMULA = u"([Ca] * 2.497) + ([Mg] * 4.118) / [dilution]"
+VALUES = {'Ca': 10, 'Mg': 4, 'dilution': 2}
+EVALUATIONS = 20000
+ROWS = 1000
+
+BATCH_FORMULAS = (
+    FORMULA,
+    u"abs([a] - [b]) / max([a], [b]) * 100",
+    u"[a] // [b] + [a] % [b] - floor(sqrt([a]))",
+    u"[a] ** 2 / [b]",
+    u"log10([a]) if [a] > 0 else -1",
+)
+
+
+class TestFormula(unittest.TestCase):
+    """Formulas are compiled once and evaluated with bound variables."""
+
+    def test_variables(self):
+        formula = Formula(FORMULA)
+        self.assertEqual(formula.variables, ('Ca', 'Mg', 'dilution'))
+        self.assertAlmostEqual(formula(VALUES), 24.97 + 8.236)
+
+    def test_true_division_of_integers(self):
+        self.assertEqual(Formula(u"[a] / [b]")({'a': 1, 'b': 2}), 0.5)
+        self.assertEqual(Formula(u"1 / 2")({}), 0.5)
+
+    def test_functions_and_conditionals(self):
+        formula = Formula(u"sqrt([x]) if [x] > 0 else 0")
+        self.assertEqual(formula({'x': 16}), 4.0)
+        self.assertEqual(formula({'x': -1}), 0.0)
+
+    def test_interim_defaults(self):
+        formula = Formula(u"[TV] * [factor]", {'factor': u'2.5'})
+        self.assertEqual(formula({'TV': 2}), 5.0)
+        self.assertEqual(formula({'TV': 2, 'factor': 1}), 2.0)
+        self.assertRaises(FormulaError, formula, {'factor': 1})
+
+    def test_rejects_unsafe_formulas(self):
+        for source in (u"__import__('os')",
+                       u"[a].__class__",
+                       u"open('/etc/passwd')",
+                       u"[a] + x",
+                       u"(lambda: 1)()",
+                       u"[a] +",
+                       u""):
+            self.assertRaises(FormulaError, Formula, source)
+
+    def test_evaluation_errors(self):
+        formula = Formula(u"[a] / [b]")
+        self.assertRaises(FormulaError, formula, {'a': 1, 'b': 0})
+        self.assertRaises(FormulaError, formula, {'a': u'n/a', 'b': 1})
+
+    def test_benchmark(self):
+        formula = Formula(FORMULA)
+        formula(VALUES)
+
+        def parse_each_time():
+            Formula(FORMULA)(VALUES)
+
+        compiled = timeit.timeit(lambda: formula(VALUES),
+                                 number=EVALUATIONS) / EVALUATIONS
+        parsed = timeit.timeit(parse_each_time,
+                               number=EVALUATIONS // 10) / (EVALUATIONS // 10)
+        self.assertLess(compiled, parsed)
+
+
+class TestBatch(unittest.TestCase):
+    """Batch evaluation gives the same results as the scalar path."""
+
+    def setUp(self):
+        rnd = random.Random(42)
+        self.columns = {}
+        for variable in ('a', 'b', 'Ca', 'Mg', 'dilution'):
+            column = [rnd.choice([rnd.uniform(-100, 100), rnd.randint(0, 9)])
+                      for x in range(ROWS)]
+            column[rnd.randrange(ROWS)] = 0
+            column[rnd.randrange(ROWS)] = u'n/a'
+            self.columns[variable] = column
+
+    def tearDown(self):
+        numpy = getattr(self, 'numpy', None)
+        if numpy is not None:
+            batch.numpy = numpy
+
+    def scalar(self, formula):
+        results, errors = [], {}
+        for row in range(ROWS):
+            values = dict((key, column[row])
+                          for key, column in self.columns.items())
+            try:
+                results.append(formula(values))
+            except FormulaError as err:
+                results.append(None)
+                errors[row] = err.args[0]
+        return results, errors
+
+    def test_same_results_as_scalar(self):
+        for source in BATCH_FORMULAS:
+            formula = Formula(source)
+            self.assertEqual(evaluate_batch(formula, self.columns),
+                             self.scalar(formula), source)
+
+    def test_same_results_without_numpy(self):
+        self.numpy = batch.numpy
+        batch.numpy = None
+        for source in BATCH_FORMULAS:
+            formula = Formula(source)
+            self.assertEqual(evaluate_batch(formula, self.columns),
+                             self.scalar(formula), source)
+
+    def test_vectorizable(self):
+        self.assertTrue(Formula(BATCH_FORMULAS[1]).vectorizable)
+        self.assertFalse(Formula(BATCH_FORMULAS[3]).vectorizable)
+        self.assertFalse(Formula(BATCH_FORMULAS[4]).vectorizable)
+
+    def test_defaults(self):
+        formula = Formula(u"[a] * [factor]", {'factor': 2})
+        results, errors = evaluate_batch(formula, {'a': [1, 2, 3]})
+        self.assertEqual(results, [2.0, 4.0, 6.0])
+        self.assertEqual(errors, {})
+
+
+class TestDependencyGraph(unittest.TestCase):
+    """Only services downstream of a changed result are recalculated."""
+
+    def setUp(self):
+        self.graph = DependencyGraph({
+            'Ca': (None, None, ()),
+            'Mg': (None, None, ()),
+            'Fe': (None, None, ()),
+            'Hardness': ('c1', Formula(u"[Ca] * 2.497 + [Mg] * 4.118"),
+                         ('Ca', 'Mg')),
+            'Ratio': ('c2', Formula(u"[Hardness] / [Ca]"),
+                      ('Hardness', 'Ca')),
+            'FeX': ('c3', Formula(u"[Fe] * [factor]"), ('Fe',)),
+        })
+
+    def test_order(self):
+        order = self.graph.order
+        self.assertLess(order.index('Ca'), order.index('Hardness'))
+        self.assertLess(order.index('Hardness'), order.index('Ratio'))
+
+    def test_dirty(self):
+        self.assertEqual(self.graph.dirty(['Mg']), ['Hardness', 'Ratio'])
+        self.assertEqual(self.graph.dirty(['Ca']), ['Hardness', 'Ratio'])
+        self.assertEqual(self.graph.dirty(['Hardness']), ['Ratio'])
+        self.assertEqual(self.graph.dirty(['Fe']), ['FeX'])
+        self.assertEqual(self.graph.dirty(['Ratio']), [])
+
+    def test_recalculate(self):
+        results = {'Ca': 10, 'Mg': 0, 'Fe': 1, 'FeX': 7}
+        dirty, errors = self.graph.recalculate(
+            results, ['Mg'], interims={'FeX': {'factor': 3}})
+        self.assertEqual(dirty, ['Hardness', 'Ratio'])
+        self.assertEqual(errors, {})
+        self.assertAlmostEqual(results['Hardness'], 24.97)
+        self.assertAlmostEqual(results['Ratio'], 2.497)
+        self.assertEqual(results['FeX'], 7)
+        results['Ca'] = 0
+        dirty, errors = self.graph.recalculate(results, ['Ca'])
+        self.assertEqual(results['Hardness'], 0.0)
+        self.assertIsNone(results['Ratio'])
+        self.assertEqual(list(errors), ['Ratio'])
+
+    def test_cycles(self):
+        self.assertRaises(CycleError, toposort,
+                          {'A': ('B',), 'B': ('C',), 'C': ('A',), 'D': ()})
+        with self.assertRaises(CycleError) as cm:
+            toposort({'A': ('B',), 'B': ('A',), 'C': ('A',)})
+        self.assertEqual(cm.exception.keywords, ['A', 'B'])
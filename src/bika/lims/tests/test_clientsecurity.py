@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Client membership tests for this package."""
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import login
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from plone.uuid.interfaces import IUUID
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.clientsecurity import client_uids
+from bika.lims.clientsecurity import client_user
+from bika.lims.clientsecurity import search
+from bika.lims.interfaces.sample import ISample
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+
+class TestClientSecurity(unittest.TestCase):
+    """Searches give the same results as a restricted search, whichever
+    way they are run."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        self.catalog = getBikaCatalog(self.portal)
+        sampletype = api.content.create(
+            lims.configuration.sampletypes, 'SampleType', id='water',
+            title=u"Water", sample_id_prefix=u"W")
+        intid = getUtility(IIntIds).getId(sampletype)
+        self.clients = []
+        self.samples = {}
+        for x, count in enumerate((3, 2, 1)):
+            client = api.content.create(lims.clients, 'Client',
+                                        id='client-%s' % x,
+                                        title=u"Client %s" % x)
+            self.clients.append(client)
+            self.samples[IUUID(client)] = [
+                addContentToContainer(client.samples, createContent(
+                    'Sample', sample_type=RelationValue(intid)))
+                for y in range(count)]
+        # Jane is a contact of the first client, and may view the second
+        # one without being a contact there.
+        api.content.create(self.clients[0].configuration.contacts, 'Contact',
+                           id='jane', title=u"Jane", first_name=u"Jane",
+                           username=u"jane")
+        api.user.create(email='jane@example.com', username='jane',
+                        password='secret-jane')
+        for client in self.clients[:2]:
+            api.user.grant_roles(username='jane', obj=client,
+                                 roles=['Reader'])
+        hidden = self.samples[IUUID(self.clients[0])][0]
+        hidden.manage_permission('View', ['Manager'], 0)
+        hidden.reindexObjectSecurity()
+
+    def uids(self, proxies):
+        return set(proxy.UID for proxy in proxies)
+
+    def test_membership(self):
+        user = api.user.get(username='jane')
+        self.assertEqual(client_uids(self.portal, user),
+                         frozenset([IUUID(self.clients[0])]))
+        self.assertEqual(client_user(self.portal, user),
+                         frozenset([IUUID(self.clients[0])]))
+
+    def test_same_results(self):
+        login(self.portal, 'jane')
+        query = {'object_provides': ISample.__identifier__}
+        restricted = self.uids(self.catalog(**query))
+        self.assertEqual(self.uids(search(self.portal, **query)),
+                         restricted)
+        clients = [IUUID(client) for client in self.clients]
+        self.assertEqual(
+            self.uids(search(self.portal, client=clients, **query)),
+            restricted)
+        self.assertEqual(restricted, set(
+            IUUID(sample) for sample in
+            self.samples[clients[0]][1:] + self.samples[clients[1]]))
+        for client in clients:
+            self.assertEqual(
+                self.uids(search(self.portal, client=client, **query)),
+                self.uids(self.catalog(client=client, **query)))
+
+    def test_sort_limit(self):
+        login(self.portal, 'jane')
+        client = IUUID(self.clients[0])
+        results = search(self.portal, client=client, sort_on='id',
+                         sort_limit=1,
+                         object_provides=ISample.__identifier__)
+        self.assertEqual([proxy.UID for proxy in results],
+                         [IUUID(self.samples[client][1])])
+
+    def test_lab_users(self):
+        user = api.user.get(username='jane')
+        api.user.grant_roles(username='jane', obj=self.portal.lims,
+                             roles=['LabClerk'])
+        self.assertIsNone(client_user(self.portal, user))
+        query = {'object_provides': ISample.__identifier__}
+        self.assertEqual(len(search(self.portal, **query)), 6)
+
+    def test_revoke_roles(self):
+        api.user.revoke_roles(username='jane', obj=self.clients[1],
+                              roles=['Reader'])
+        login(self.portal, 'jane')
+        self.assertEqual(
+            self.uids(self.catalog(object_provides=ISample.__identifier__)),
+            set(IUUID(sample) for sample in
+                self.samples[IUUID(self.clients[0])][1:]))
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Sample point and sample type compatibility tests for this package."""
+import json
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import login
+from plone.app.testing import setRoles
+from plone.uuid.interfaces import IUUID
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.event import notify
+from zope.intid.interfaces import IIntIds
+from zope.lifecycleevent import ObjectModifiedEvent
+
+from bika.lims.browser.compatibility import CompatibilityView
+from bika.lims.compatibility import CompatibilityMap
+from bika.lims.compatibility import compatibility_map
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+
+class TestCompatibilityMap(unittest.TestCase):
+    """Both sides restrict, and an empty list allows everything."""
+
+    def setUp(self):
+        self.mapping = CompatibilityMap(
+            {'blood': (u"Blood", frozenset(), None),
+             'water': (u"Water", frozenset(['river', 'tap']), None),
+             'soil': (u"Soil", frozenset(['field']), None)},
+            {'river': (u"River", frozenset(), None),
+             'tap': (u"Tap", frozenset(['blood']), None),
+             'ward': (u"Ward", frozenset(['blood', 'soil']), 'client-1'),
+             'field': (u"Field", frozenset(['gone']), None)})
+
+    def test_points(self):
+        self.assertEqual(sorted(self.mapping.allowed_points('blood')),
+                         ['river', 'tap', 'ward'])
+        self.assertEqual(self.mapping.allowed_points('water'), ('river',))
+        self.assertEqual(self.mapping.allowed_points('soil'), ())
+        self.assertEqual(self.mapping.allowed_points('unknown'), ())
+
+    def test_types(self):
+        self.assertEqual(sorted(self.mapping.allowed_types('river')),
+                         ['blood', 'water'])
+        self.assertEqual(self.mapping.allowed_types('tap'), ('blood',))
+        self.assertEqual(self.mapping.allowed_types('ward'), ('blood',))
+        self.assertEqual(self.mapping.allowed_types('field'), ())
+
+    def test_client(self):
+        self.assertEqual(
+            sorted(self.mapping.allowed_points('blood', ['client-1'])),
+            ['river', 'tap', 'ward'])
+        self.assertEqual(
+            sorted(self.mapping.allowed_points('blood', ['client-2'])),
+            ['river', 'tap'])
+        self.assertEqual(
+            sorted(self.mapping.allowed_points('blood', frozenset())),
+            ['river', 'tap'])
+
+
+class TestCompatibility(unittest.TestCase):
+    """The map follows edits of sample types and sample points."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        configuration = self.portal.lims.configuration
+        self.blood = api.content.create(
+            configuration.sampletypes, 'SampleType', id='blood',
+            title=u"Blood", sample_id_prefix=u"B")
+        self.water = api.content.create(
+            configuration.sampletypes, 'SampleType', id='water',
+            title=u"Water", sample_id_prefix=u"W")
+        self.ward = api.content.create(
+            configuration.samplepoints, 'SamplePoint', id='ward',
+            title=u"Ward")
+
+    def test_edit(self):
+        mapping = compatibility_map(self.portal.lims)
+        self.assertEqual(sorted(mapping.allowed_types(IUUID(self.ward))),
+                         sorted([IUUID(self.blood), IUUID(self.water)]))
+        self.ward.sample_types = [
+            RelationValue(getUtility(IIntIds).getId(self.blood))]
+        notify(ObjectModifiedEvent(self.ward))
+        mapping = compatibility_map(self.portal.lims)
+        self.assertEqual(mapping.allowed_types(IUUID(self.ward)),
+                         (IUUID(self.blood),))
+        self.assertEqual(mapping.allowed_points(IUUID(self.water)), ())
+
+    def test_view(self):
+        request = self.layer['request']
+        request.form['sample_point'] = IUUID(self.ward)
+        view = self.portal.lims.restrictedTraverse('@@sample-compatibility')
+        result = json.loads(view())
+        self.assertEqual(sorted(row['title']
+                                for row in result['sample_types']),
+                         [u"Blood", u"Water"])
+
+    def test_client_users(self):
+        lims = self.portal.lims
+        for x in (1, 2):
+            client = api.content.create(lims.clients, 'Client',
+                                        id='client-%s' % x,
+                                        title=u"Client %s" % x)
+            api.content.create(client.configuration.samplepoints,
+                               'SamplePoint', id='tap', title=u"Tap %s" % x)
+        api.content.create(lims.clients['client-1'].configuration.contacts,
+                           'Contact', id='jane', title=u"Jane",
+                           first_name=u"Jane", username=u"jane")
+        api.user.create(email='jane@example.com', username='jane',
+                        password='secret-jane')
+        login(self.portal, 'jane')
+        request = self.layer['request']
+        request.form['sample_type'] = IUUID(self.blood)
+        result = json.loads(CompatibilityView(lims, request)())
+        self.assertEqual(sorted(row['title']
+                                for row in result['sample_points']),
+                         [u"Tap 1", u"Ward"])
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Unordered container tests for this package."""
+import unittest
+
+import transaction
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.folder.default import DefaultOrdering
+from zope.annotation.interfaces import IAnnotations
+
+from bika.lims.content.container import UNORDERED
+from bika.lims.content.container import make_unordered
+from bika.lims.testing import BIKA_LIMS_FUNCTIONAL_TESTING  # noqa
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.upgrades.v4002 import migrate
+
+IDS = ['c', 'a', 'b']
+
+
+def ordered_folder(portal):
+    folder = api.content.create(portal, 'Folder', id='folder',
+                                title=u"Folder")
+    for id in IDS:
+        api.content.create(folder, 'Document', id=id, title=id.upper())
+    return folder
+
+
+class TestUnordered(unittest.TestCase):
+    """Ordered folders are switched to unordered storage in place."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+
+    def test_make_unordered(self):
+        folder = ordered_folder(self.portal)
+        self.assertEqual(list(folder.objectIds()), IDS)
+        self.assertTrue(make_unordered(folder))
+        self.assertEqual(folder._ordering, UNORDERED)
+        self.assertNotIn(DefaultOrdering.ORDER_KEY, IAnnotations(folder))
+        self.assertEqual(sorted(folder.objectIds()), sorted(IDS))
+        self.assertEqual(folder['a'].Title(), u"A")
+        self.assertFalse(make_unordered(folder))
+        api.content.create(folder, 'Document', id='d', title=u"D")
+        self.assertEqual(sorted(folder.objectIds()), sorted(IDS + ['d']))
+
+    def test_lims_folders(self):
+        self.assertEqual(self.portal.lims.samples._ordering, UNORDERED)
+
+
+class TestUpgrade(unittest.TestCase):
+    """The upgrade step converts folders and commits."""
+
+    layer = BIKA_LIMS_FUNCTIONAL_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        ordered_folder(self.portal)
+        transaction.commit()
+
+    def test_migrate(self):
+        migrate([self.portal.folder], "folders")
+        transaction.abort()
+        folder = self.portal.folder
+        self.assertEqual(folder._ordering, UNORDERED)
+        self.assertEqual(sorted(folder.objectIds()), sorted(IDS))
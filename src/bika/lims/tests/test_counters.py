@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Dashboard counter tests for this package."""
+import json
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from plone.protect.authenticator import createToken
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims import counters
+from bika.lims.browser.limsroot import RebuildCountersView
+from bika.lims.expiry import expire
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.workflow.engine import bulk_transition
+
+
+class TestCounters(unittest.TestCase):
+    """Counters follow adds, removals and transitions, and a rebuild
+    from the catalog gives the same values."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.lims = self.portal.lims
+        self.client = api.content.create(self.lims.clients, 'Client',
+                                         id='client-1', title=u"Client")
+        sampletype = api.content.create(
+            self.lims.configuration.sampletypes, 'SampleType', id='blood',
+            title=u"Blood", sample_id_prefix=u"B", aliquot_types=[
+                {'title': u'Bulk', 'id_template': u'', 'minimum_volume': u'',
+                 'auto_count': 2}])
+        intid = getUtility(IIntIds).getId(sampletype)
+        self.samples = [
+            addContentToContainer(self.client.samples, createContent(
+                'Sample', sample_type=RelationValue(intid)))
+            for x in range(3)]
+        self.ars = [
+            addContentToContainer(self.client.analysisrequests,
+                                  createContent('AnalysisRequest'))
+            for x in range(2)]
+
+    def value(self, name):
+        return counters.value(self.lims, name)
+
+    def snapshot(self):
+        return dict((name, counter()) for name, counter in
+                    counters._counters(self.lims).items() if counter())
+
+    def test_counters(self):
+        bulk_transition(self.samples[:2], 'receive')
+        bulk_transition(self.ars[:1], 'receive')
+        expire(self.samples[2])
+        api.content.delete(self.samples[1])
+
+        self.assertEqual(self.value(counters.SAMPLES), 2)
+        self.assertEqual(self.value(counters.RECEIVED % counters.today()), 1)
+        self.assertEqual(self.value(counters.EXPIRED), 1)
+        self.assertEqual(counters.values(self.lims, 'ar_state:'),
+                         {'sample_due': 1, 'sample_received': 1})
+        self.assertEqual(self.value(counters.DEPARTMENT % ''), 4)
+
+        before = self.snapshot()
+        counters.rebuild(self.lims)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_dashboard(self):
+        view = self.lims.restrictedTraverse('@@view')
+        self.assertEqual(view.samples(), 3)
+        self.assertEqual(dict(view.ar_states())[u"Sample due"], 2)
+        self.assertIn(u"Aliquots per department", view())
+
+    def test_rebuild_view(self):
+        request = self.layer['request']
+        view = RebuildCountersView(self.lims, request)
+        self.assertIn('error', json.loads(view()))
+        self.assertEqual(request.response.getStatus(), 400)
+        request.method = 'POST'
+        self.assertIn('error', json.loads(view()))
+        self.assertEqual(request.response.getStatus(), 403)
+        request.response.setStatus(200)
+        request.form['_authenticator'] = createToken()
+        self.assertEqual(json.loads(view())[counters.SAMPLES], 3)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Sample expiry tests for this package."""
+import json
+import unittest
+from datetime import datetime
+from datetime import timedelta
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from plone.protect.authenticator import createToken
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.event import notify
+from zope.intid.interfaces import IIntIds
+from zope.lifecycleevent import Attributes
+from zope.lifecycleevent import ObjectModifiedEvent
+
+from bika.lims.browser.expiry import ExpireSamplesView
+from bika.lims.expiry import expire_samples
+from bika.lims.expiry import expired
+from bika.lims.interfaces.sample import IExpiredSample
+from bika.lims.interfaces.sampletype import ISampleType
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+
+class TestExpiry(unittest.TestCase):
+    """Expired samples are found through the expiry_date index."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.lims = self.portal.lims
+        client = api.content.create(self.lims.clients, 'Client',
+                                    id='client-1', title=u"Client")
+        self.sampletype = api.content.create(
+            self.lims.configuration.sampletypes, 'SampleType', id='blood',
+            title=u"Blood", sample_id_prefix=u"B", retention_period=24)
+        intid = getUtility(IIntIds).getId(self.sampletype)
+        now = datetime.now()
+        self.samples = []
+        for date_sampled in (now - timedelta(hours=48),
+                             now - timedelta(hours=1), None):
+            sample = createContent('Sample',
+                                   sample_type=RelationValue(intid),
+                                   date_sampled=date_sampled)
+            self.samples.append(
+                addContentToContainer(client.samples, sample))
+
+    def expired_ids(self):
+        return sorted(proxy.getId for proxy in expired(self.lims))
+
+    def test_retention_period_change(self):
+        self.assertEqual(self.expired_ids(), [self.samples[0].getId()])
+        self.sampletype.retention_period = 0
+        notify(ObjectModifiedEvent(self.sampletype,
+                                   Attributes(ISampleType, 'title')))
+        self.assertEqual(self.expired_ids(), [self.samples[0].getId()])
+        notify(ObjectModifiedEvent(
+            self.sampletype, Attributes(ISampleType, 'retention_period')))
+        self.assertEqual(self.expired_ids(), [])
+        self.sampletype.retention_period = 1
+        notify(ObjectModifiedEvent(self.sampletype))
+        self.assertEqual(self.expired_ids(),
+                         sorted(sample.getId()
+                                for sample in self.samples[:2]))
+
+    def test_expire_samples(self):
+        self.sampletype.retention_period = 1
+        notify(ObjectModifiedEvent(self.sampletype))
+        self.assertEqual(expire_samples(self.lims, batch_size=1,
+                                        commit=False), 2)
+        self.assertEqual(
+            [IExpiredSample.providedBy(sample) for sample in self.samples],
+            [True, True, False])
+        self.assertEqual(self.expired_ids(), [])
+        catalog = api.portal.get_tool('bika_catalog')
+        self.assertEqual(
+            len(catalog(object_provides=IExpiredSample.__identifier__)), 2)
+
+    def test_view_authenticator(self):
+        request = self.layer['request']
+        view = ExpireSamplesView(self.lims, request)
+        self.assertIn('error', json.loads(view()))
+        self.assertEqual(request.response.getStatus(), 400)
+        request.method = 'POST'
+        self.assertIn('error', json.loads(view()))
+        self.assertEqual(request.response.getStatus(), 403)
+        self.assertEqual(self.expired_ids(), [self.samples[0].getId()])
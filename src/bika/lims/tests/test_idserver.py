@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""ID server tests for this package."""
+import threading
+import unittest
+
+import transaction
+from BTrees.OOBTree import OOBTree
+from persistent.mapping import PersistentMapping
+from ZODB.DB import DB
+from ZODB.MappingStorage import MappingStorage
+
+from bika.lims.idserver import IDServer
+from bika.lims.idserver import format_aliquot_id
+from bika.lims.idserver import next_aliquot_id
+from bika.lims.idserver import next_aliquot_ids
+
+WORKERS = 8
+SAMPLES = 200
+
+
+class Container(dict):
+
+    def getId(self):
+        return u'WB18-0001'
+
+
+class TestIDServer(unittest.TestCase):
+    """Sequence numbers must be unique under parallel transactions."""
+
+    def setUp(self):
+        self.db = DB(MappingStorage())
+        connection = self.db.open()
+        root = connection.root()
+        root['counters'] = OOBTree()
+        for worker in range(WORKERS):
+            root['worker-%s' % worker] = PersistentMapping()
+        transaction.commit()
+        connection.close()
+
+    def tearDown(self):
+        self.db.close()
+
+    def register_samples(self, results, worker):
+        """Register SAMPLES samples, one transaction each, like a reception
+        desk would, and record the sequence numbers that were committed.
+        """
+        tm = transaction.TransactionManager()
+        connection = self.db.open(transaction_manager=tm)
+        root = connection.root()
+        registered = root['worker-%s' % worker]
+        server = IDServer(root['counters'])
+        for x in range(SAMPLES):
+            tm.begin()
+            seq = server.next_seq(u'WB', u'18')
+            registered[seq] = x
+            tm.commit()
+            results.append(seq)
+        connection.close()
+
+    def test_parallel_transactions(self):
+        results = []
+        workers = [threading.Thread(target=self.register_samples,
+                                    args=(results, x))
+                   for x in range(WORKERS)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(results), WORKERS * SAMPLES)
+        self.assertEqual(len(set(results)), WORKERS * SAMPLES)
+
+    def test_uncommitted_counters(self):
+        connection = self.db.open()
+        server = IDServer(OOBTree())
+        self.assertEqual([server.next_seq(u'WB') for x in range(3)],
+                         [1, 2, 3])
+        connection.close()
+
+    def test_prefixes_and_periods(self):
+        connection = self.db.open()
+        server = IDServer(connection.root()['counters'], block_size=5)
+        self.assertEqual(server.next_seq(u'WB', u'18'), 1)
+        self.assertEqual(server.next_seq(u'WB', u'19'), 1)
+        self.assertEqual(server.next_seq(u'SE', u'18'), 1)
+        self.assertEqual(server.next_seq(u'WB', u'18'), 2)
+        transaction.abort()
+        connection.close()
+
+    def test_aliquot_id_template(self):
+        self.assertEqual(format_aliquot_id(u'{sample_id:s}-001', u'WB18-0001',
+                                           1), u'WB18-0001-001')
+        self.assertEqual(format_aliquot_id(None, u'WB18-0001', 12),
+                         u'WB18-0001-012')
+        self.assertRaises(ValueError, format_aliquot_id, u'{client}-{seq}',
+                          u'WB18-0001', 1)
+
+    def test_template_without_seq(self):
+        container = Container()
+        name = next_aliquot_id(container, u'{sample_id:s}-001')
+        self.assertEqual(name, u'WB18-0001-001')
+        container[name] = None
+        name = next_aliquot_id(container, u'{sample_id:s}-001')
+        self.assertEqual(name, u'WB18-0001-002')
+        container[name] = None
+        self.assertEqual(next_aliquot_id(container, u'{sample_id:s}-001'),
+                         u'WB18-0001-003')
+
+    def test_batch_template_without_seq(self):
+        container = Container()
+        container[u'WB18-0001-001'] = None
+        self.assertEqual(
+            next_aliquot_ids(container, u'{sample_id:s}-001', 2),
+            [u'WB18-0001-002', u'WB18-0001-003'])
+        self.assertEqual(next_aliquot_id(container, u'{sample_id:s}-001'),
+                         u'WB18-0001-004')
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""Indexing queue tests for this package."""
+import unittest
+
+import transaction
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from zope.event import notify
+from zope.lifecycleevent import ObjectModifiedEvent
+
+from bika.lims.catalog.queue import IndexQueue
+from bika.lims.catalog.queue import getIndexQueue
+from bika.lims.catalog.queue import immediate_indexing
+from bika.lims.testing import BIKA_LIMS_FUNCTIONAL_TESTING  # noqa
+
+OBJECTS = 50
+
+
+class Catalog(object):
+    """Records catalog writes
+    """
+
+    def __init__(self, cataloged=()):
+        self.writes = []
+        self.cataloged = set(cataloged)
+
+    def getrid(self, uid):
+        return 1 if uid in self.cataloged else None
+
+    def catalog_object(self, obj, uid, idxs=None):
+        self.writes.append(('index', uid, idxs and sorted(idxs)))
+        self.cataloged.add(uid)
+
+    def uncatalog_object(self, uid):
+        self.writes.append(('unindex', uid))
+        self.cataloged.discard(uid)
+
+
+class Content(object):
+
+    def __init__(self, path):
+        self.path = path
+
+    def getPhysicalPath(self):
+        return self.path
+
+
+class TestIndexQueue(unittest.TestCase):
+    """Operations on the same object are merged."""
+
+    def setUp(self):
+        self.catalog = Catalog(['/a'])
+        self.queue = IndexQueue(None)
+        self.a = Content(('', 'a'))
+        self.b = Content(('', 'b'))
+
+    def test_reindexes_merge(self):
+        self.queue.index(self.a, self.catalog, ['Title'])
+        self.queue.index(self.a, self.catalog, ['keyword'])
+        self.queue.index(self.b, self.catalog)
+        self.queue.index(self.b, self.catalog, ['Title'])
+        self.assertEqual(self.queue.flush(), 2)
+        self.assertEqual(self.catalog.writes,
+                         [('index', '/a', ['Title', 'keyword']),
+                          ('index', '/b', None)])
+        self.assertEqual(self.queue.flush(), 0)
+
+    def test_unindex(self):
+        self.queue.index(self.a, self.catalog)
+        self.queue.unindex(self.a, self.catalog)
+        self.queue.index(self.b, self.catalog)
+        self.queue.unindex(self.b, self.catalog)
+        self.queue.flush()
+        self.assertEqual(self.catalog.writes, [('unindex', '/a')])
+
+    def test_unindex_then_index(self):
+        self.queue.unindex(self.a, self.catalog)
+        self.queue.index(self.a, self.catalog, ['Title'])
+        self.queue.flush()
+        self.assertEqual(self.catalog.writes, [('index', '/a', None)])
+
+    def test_rollback(self):
+        self.queue.index(self.a, self.catalog)
+        mark = self.queue.mark()
+        self.queue.index(self.b, self.catalog)
+        self.queue.rollback(mark)
+        self.queue.flush()
+        self.assertEqual(self.catalog.writes, [('index', '/a', None)])
+
+
+class TestIndexingBenchmark(unittest.TestCase):
+    """Catalog writes per created object, indexing immediately and through
+    the queue.
+    """
+
+    layer = BIKA_LIMS_FUNCTIONAL_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.catalog = api.portal.get_tool('portal_catalog')
+        self.bika_catalog = api.portal.get_tool('bika_catalog')
+        self.configuration = self.portal.lims.configuration
+
+    def create(self, prefix):
+        """Create OBJECTS contacts and sample points, modify each twice and
+        commit.  Returns the portal_catalog and bika_catalog writes per
+        object.
+        """
+        catalog = self.catalog.getCounter()
+        bika_catalog = self.bika_catalog.getCounter()
+        for x in range(OBJECTS):
+            for container, portal_type in [
+                    (self.configuration.contacts, 'Contact'),
+                    (self.configuration.samplepoints, 'SamplePoint')]:
+                obj = api.content.create(container, portal_type,
+                                         id='%s-%s' % (prefix, x),
+                                         title=u"%s %s" % (prefix, x))
+                notify(ObjectModifiedEvent(obj))
+                notify(ObjectModifiedEvent(obj))
+        transaction.commit()
+        objects = 2.0 * OBJECTS
+        return ((self.catalog.getCounter() - catalog) / objects,
+                (self.bika_catalog.getCounter() - bika_catalog) / objects)
+
+    def test_catalog_writes(self):
+        with immediate_indexing():
+            before = self.create('immediate')
+        after = self.create('queued')
+        self.assertEqual(after[1], 1)
+        self.assertLess(after[1], before[1])
+        self.assertFalse(getIndexQueue().ops)
+        results = self.bika_catalog(portal_type='Contact',
+                                    path='/'.join(self.configuration.contacts
+                                                  .getPhysicalPath()))
+        self.assertEqual(len(results), 2 * OBJECTS)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Analysis service keyword tests for this package."""
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from zope.event import notify
+from zope.lifecycleevent import ObjectModifiedEvent
+
+from bika.lims import keywords
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.utils.configversion import getConfigVersion
+
+
+class TestKeywords(unittest.TestCase):
+    """The keyword map follows the analysis services."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.services = self.portal.lims.configuration.analysisservices
+        self.ca = api.content.create(self.services, 'AnalysisService',
+                                     id='ca', title=u"Calcium", keyword=u"Ca")
+        self.mg = api.content.create(self.services, 'AnalysisService',
+                                     id='mg', title=u"Magnesium",
+                                     keyword=u"Mg")
+        keywords.clear()
+
+    def tearDown(self):
+        keywords.getConfigVersion = getConfigVersion
+        keywords.clear()
+
+    def set_version(self, version):
+        # Uncommitted configuration is never cached, so fake a committed
+        # configuration version.
+        keywords.getConfigVersion = lambda lims: version
+
+    def test_keyword_map(self):
+        mapping = keywords.keyword_map(self.services)
+        self.assertEqual(mapping, {u"Ca": api.content.get_uuid(self.ca),
+                                   u"Mg": api.content.get_uuid(self.mg)})
+        self.assertEqual(keywords.keyword_map(self.portal.lims), mapping)
+
+    def test_keyword_change(self):
+        keywords.keyword_map(self.services)
+        self.mg.keyword = u"Mg2"
+        notify(ObjectModifiedEvent(self.mg))
+        self.assertIsNone(keywords.getServiceUID(self.services, u"Mg"))
+        self.assertEqual(keywords.getServiceUID(self.services, u"Mg2"),
+                         api.content.get_uuid(self.mg))
+
+    def test_removed_service(self):
+        keywords.keyword_map(self.services)
+        api.content.delete(self.ca)
+        self.assertIsNone(keywords.getServiceUID(self.services, u"Ca"))
+
+    def test_duplicates(self):
+        self.assertEqual(keywords.keyword_uids(self.services, u"Ca"),
+                         [api.content.get_uuid(self.ca)])
+        self.assertEqual(keywords.keyword_uids(self.services, u"K"), [])
+
+    def test_cache(self):
+        self.set_version(1)
+        mapping = keywords.keyword_map(self.services)
+        self.assertIs(keywords.keyword_map(self.portal.lims), mapping)
+        self.set_version(2)
+        self.assertIsNot(keywords.keyword_map(self.services), mapping)
+
+    def test_hidden_services(self):
+        self.mg.manage_permission('View', ['Manager'], 0)
+        self.mg.reindexObjectSecurity()
+        setRoles(self.portal, TEST_USER_ID, ['Member'])
+        self.set_version(1)
+        self.assertEqual(keywords.getServiceUID(self.services, u"Mg"),
+                         api.content.get_uuid(self.mg))
+        self.assertEqual(keywords.keyword_uids(self.services, u"Mg"),
+                         [api.content.get_uuid(self.mg)])
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""LIMS root resolution tests for this package."""
+import unittest
+
+import transaction
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from zope.annotation.interfaces import IAnnotations
+
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.utils import configversion
+from bika.lims.utils import limsroot
+
+
+class TestGetLims(unittest.TestCase):
+    """getLims resolves the LIMS root, memoized per transaction."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.lims = self.portal.lims
+
+    def test_get_lims(self):
+        contacts = self.lims.configuration.contacts
+        self.assertEqual(limsroot.getLims(self.lims), self.lims)
+        self.assertEqual(limsroot.getLims(contacts), self.lims)
+        self.assertEqual(limsroot.getLims(contacts), self.lims)
+        document = api.content.create(self.portal, 'Document', id='doc')
+        self.assertIsNone(limsroot.getLims(document))
+
+    def test_memo_is_per_transaction(self):
+        limsroot.getLims(self.lims.configuration.contacts)
+        containers = limsroot._containers()
+        self.assertIn(id(self.lims.configuration.aq_base), containers)
+        txn = transaction.get()
+        transaction.abort()
+        self.assertIsNot(transaction.get(), txn)
+        self.assertEqual(limsroot._containers(), {})
+
+
+class TestConfigVersion(unittest.TestCase):
+    """Reading the configuration version never writes."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        self.lims = self.portal.lims
+
+    def test_new_lims(self):
+        self.assertIn(configversion.ANNOTATION_KEY,
+                      IAnnotations(self.lims))
+
+    def test_missing_counter(self):
+        annotations = IAnnotations(self.lims)
+        del annotations[configversion.ANNOTATION_KEY]
+        self.assertEqual(configversion.getConfigVersion(self.lims), 0)
+        self.assertNotIn(configversion.ANNOTATION_KEY, annotations)
+        configversion.bumpConfigVersion(self.lims)
+        self.assertIsNone(configversion.getConfigVersion(self.lims))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Sample and aliquot lineage tests for this package."""
+import unittest
+
+import transaction
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from plone.uuid.interfaces import IUUID
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.utils.lineage import ancestors
+from bika.lims.utils.lineage import descendants
+from bika.lims.utils.lineage import family
+from bika.lims.utils.lineage import root_sample
+
+
+def uids(brains):
+    return sorted(proxy.UID for proxy in brains)
+
+
+class TestLineage(unittest.TestCase):
+    """Descendants, ancestors and families come from the catalog and
+    follow moves, copies and removals."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        self.client = api.content.create(lims.clients, 'Client',
+                                         id='client-1', title=u"Client")
+        sampletype = api.content.create(
+            lims.configuration.sampletypes, 'SampleType', id='blood',
+            title=u"Blood", sample_id_prefix=u"B")
+        self.intid = getUtility(IIntIds).getId(sampletype)
+        self.sample = self.create('Sample', self.client.samples)
+        self.bulk = self.create('Aliquot', self.sample, u"Bulk")
+        self.working = self.create('Aliquot', self.bulk, u"Working")
+        self.qc = self.create('Aliquot', self.working, u"Quality Control")
+        self.other = self.create('Sample', self.client.samples)
+
+    def create(self, portal_type, container, purpose=None):
+        if portal_type == 'Sample':
+            obj = createContent('Sample',
+                                sample_type=RelationValue(self.intid))
+        else:
+            obj = createContent('Aliquot', aliquot_type=purpose,
+                                purpose=purpose)
+        return addContentToContainer(container, obj)
+
+    def test_queries(self):
+        self.assertEqual(uids(descendants(self.sample)),
+                         sorted(IUUID(obj) for obj in
+                                (self.bulk, self.working, self.qc)))
+        self.assertEqual(uids(descendants(self.working)), [IUUID(self.qc)])
+        self.assertEqual([proxy.UID for proxy in ancestors(self.qc)],
+                         [IUUID(self.sample), IUUID(self.bulk),
+                          IUUID(self.working)])
+        self.assertEqual(root_sample(self.qc).UID, IUUID(self.sample))
+        self.assertEqual(uids(family(self.working,
+                                     purpose=u"Quality Control")),
+                         [IUUID(self.qc)])
+        self.assertEqual(ancestors(self.sample), [])
+        # brains work as well as objects
+        proxy = root_sample(self.qc)
+        self.assertEqual(len(descendants(proxy)), 3)
+
+    def test_move(self):
+        transaction.savepoint(optimistic=True)
+        api.content.move(source=self.working, target=self.other)
+        working = self.other[self.working.getId()]
+        self.assertEqual(uids(descendants(self.sample)), [IUUID(self.bulk)])
+        self.assertEqual(uids(descendants(self.other)),
+                         sorted([IUUID(working), IUUID(self.qc)]))
+        self.assertEqual(root_sample(self.qc).UID, IUUID(self.other))
+
+    def test_copy(self):
+        transaction.savepoint(optimistic=True)
+        copy = api.content.copy(source=self.working, target=self.other)
+        self.assertEqual(len(descendants(self.sample)), 3)
+        copies = descendants(self.other)
+        self.assertEqual(len(copies), 2)
+        self.assertFalse(set(uids(copies)) &
+                         set(uids(descendants(self.sample))))
+        self.assertEqual(uids(descendants(copy)),
+                         [IUUID(copy[self.qc.getId()])])
+
+    def test_delete(self):
+        api.content.delete(self.working)
+        self.assertEqual(uids(descendants(self.sample)), [IUUID(self.bulk)])
+        catalog = api.portal.get_tool('bika_catalog')
+        self.assertEqual(len(catalog(UID=IUUID(self.qc))), 0)
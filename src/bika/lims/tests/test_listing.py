@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""JSON listing tests for this package."""
+import json
+import unittest
+from datetime import datetime
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.browser.listing import ListingView
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.listing import Listing
+from bika.lims.listing import ListingError
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+SAMPLES = 7
+
+
+class TestListing(unittest.TestCase):
+    """Pages follow each other by cursor, without gaps or repeats."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        self.client = api.content.create(lims.clients, 'Client',
+                                         id='client-1', title=u"Client")
+        sampletype = api.content.create(
+            lims.configuration.sampletypes, 'SampleType', id='water',
+            title=u"Water", sample_id_prefix=u"W")
+        intid = getUtility(IIntIds).getId(sampletype)
+        self.samples = [
+            addContentToContainer(self.client.samples, createContent(
+                'Sample', sample_type=RelationValue(intid)))
+            for x in range(SAMPLES)]
+
+    def pages(self, **kw):
+        pages = []
+        cursor = None
+        while True:
+            listing = Listing(self.client, 'samples', cursor=cursor, **kw)
+            pages.append([item['getId'] for item in listing])
+            cursor = listing.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_pages(self):
+        pages = self.pages(limit=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        ids = sorted(sample.getId() for sample in self.samples)
+        self.assertEqual(sum(pages, []), ids)
+        pages = self.pages(limit=3, reverse=True)
+        self.assertEqual(sum(pages, []), list(reversed(ids)))
+
+    def test_equal_sort_values(self):
+        catalog = getBikaCatalog(self.portal)
+        for x, sample in enumerate(self.samples):
+            sample.date_created = datetime(2018, 1, 1, 12, x // 4)
+            catalog.catalog_object(sample)
+        pages = self.pages(limit=3, sort_on='date_created')
+        self.assertEqual(sorted(sum(pages, [])),
+                         sorted(sample.getId() for sample in self.samples))
+        pages = self.pages(limit=3, sort_on='date_created', reverse=True)
+        self.assertEqual(sorted(sum(pages, [])),
+                         sorted(sample.getId() for sample in self.samples))
+
+    def test_cursor_size(self):
+        for sample in self.samples:
+            sample.date_created = datetime(2018, 1, 1, 12, 0)
+            getBikaCatalog(self.portal).catalog_object(sample)
+        first = Listing(self.client, 'samples', sort_on='date_created',
+                        limit=2)
+        list(first)
+        second = Listing(self.client, 'samples', cursor=first.next_cursor,
+                         limit=2)
+        list(second)
+        self.assertEqual(len(second.next_cursor), len(first.next_cursor))
+
+    def test_filters(self):
+        self.assertEqual(
+            len(list(Listing(self.client, 'samples',
+                             {'review_state': 'sample_due'}))), SAMPLES)
+        self.assertEqual(
+            list(Listing(self.client, 'samples', {'review_state': 'x'})), [])
+        self.assertRaises(ListingError, Listing, self.client, 'samples',
+                          {'Title': u"x"})
+        self.assertRaises(ListingError, Listing, self.client, 'samples',
+                          cursor='nonsense')
+
+    def test_bad_request(self):
+        request = self.layer['request']
+        request.form.update({'type': 'samples', 'sort_on': 'Title'})
+        view = ListingView(self.client, request)
+        self.assertIn('error', json.loads(view()))
+        self.assertEqual(request.response.getStatus(), 400)
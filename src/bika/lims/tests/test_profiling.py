@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Request instrumentation tests for this package."""
+import json
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from zope.component import getUtility
+from zope.schema.interfaces import IVocabularyFactory
+
+from bika.lims import profiling
+from bika.lims.browser.profiling import ProfileView
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+CONTACTS = 'bika.lims.vocabularies.Contacts'
+
+
+def profile(url, seconds, queries=0, subscribers=None):
+    return {'url': url, 'seconds': seconds, 'catalog_queries': queries,
+            'catalog_seconds': 0.0, 'loads': 0, 'stores': 0,
+            'subscribers': subscribers or {}, 'vocabularies': {}}
+
+
+class TestSummary(unittest.TestCase):
+    """Percentiles are taken by nearest rank."""
+
+    def test_percentiles(self):
+        self.assertEqual(profiling.percentiles(range(1, 101)),
+                         {'p50': 50, 'p90': 90, 'p99': 99, 'max': 100})
+        self.assertEqual(profiling.percentiles([3]),
+                         {'p50': 3, 'p90': 3, 'p99': 3, 'max': 3})
+        self.assertEqual(profiling.percentiles([]), {})
+
+    def test_summary(self):
+        profiles = [profile('/a', 0.1, 2, {'sample.Added': (1, 0.05)}),
+                    profile('/b', 0.3, 4),
+                    profile('/c', 0.2, 6, {'sample.Added': (2, 0.07)})]
+        summary = profiling.summary(profiles, slowest=2)
+        self.assertEqual(summary['requests'], 3)
+        self.assertEqual(summary['metrics']['catalog_queries']['p50'], 4)
+        self.assertEqual([p['url'] for p in summary['slowest']], ['/b', '/c'])
+        added = summary['subscribers']['sample.Added']
+        self.assertEqual((added['requests'], added['calls'], added['max']),
+                         (2, 3, 0.07))
+        self.assertIn(u"catalog=2/0.0ms", profiling.header(profiles[0]))
+
+
+class TestProfiling(unittest.TestCase):
+    """Subscribers, vocabulary factories and catalog queries are recorded
+    while a request is being profiled."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        profiling.install()
+        profiling.clear()
+
+    def tearDown(self):
+        profiling.uninstall()
+        profiling.clear()
+
+    def test_profile(self):
+        lims = self.portal.lims
+        profiling.start('/add-client')
+        api.content.create(lims.clients, 'Client', id='client-1',
+                           title=u"Client")
+        list(getUtility(IVocabularyFactory, CONTACTS)(lims))
+        result = profiling.finish()
+        self.assertEqual(result['subscribers']['client.Added'][0], 1)
+        self.assertEqual(result['vocabularies'][CONTACTS][0], 1)
+        self.assertGreater(result['catalog_queries'], 0)
+        self.assertEqual(profiling.recent(), [result])
+
+    def test_not_recording(self):
+        api.content.create(self.portal.lims.clients, 'Client',
+                           id='client-1', title=u"Client")
+        self.assertIsNone(profiling.finish())
+        self.assertEqual(profiling.recent(), [])
+
+    def test_uninstall(self):
+        profiling.uninstall()
+        factory = getUtility(IVocabularyFactory, CONTACTS)
+        self.assertFalse(hasattr(factory, 'original'))
+        self.assertFalse(profiling.active)
+
+    def test_view(self):
+        profiling.start('/a')
+        profiling.finish()
+        view = ProfileView(self.portal, self.layer['request'])
+        self.assertEqual(json.loads(view())['requests'], 1)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Client provisioning tests for this package."""
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+
+from bika.lims.interfaces.sample import ISamplesFolder
+from bika.lims.provisioning import CLIENT_FOLDERS
+from bika.lims.provisioning import provision_clients
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+
+def security(obj):
+    """Permission settings, local roles and workflow state of obj
+    """
+    permissions = [(p['name'], p['acquire'],
+                    tuple(role['checked'] for role in p['roles']))
+                   for p in obj.permission_settings()]
+    return (permissions,
+            sorted(obj.get_local_roles()),
+            api.content.get_state(obj, None))
+
+
+class TestProvisioning(unittest.TestCase):
+    """Bulk provisioned clients match clients added one by one."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.clients = self.portal.lims.clients
+
+    def test_same_security_as_subscriber(self):
+        added = api.content.create(self.clients, 'Client', id='added',
+                                   title=u"Added")
+        bulk = provision_clients(self.clients, [
+            {'id': 'bulk-%s' % x, 'title': u"Bulk %s" % x}
+            for x in range(3)])
+        self.assertEqual([client.getId() for client in bulk],
+                         ['bulk-0', 'bulk-1', 'bulk-2'])
+        for client in bulk:
+            self.assertEqual(security(client), security(added))
+            for path, title, restricted in CLIENT_FOLDERS:
+                expected = added.unrestrictedTraverse(path)
+                folder = client.unrestrictedTraverse(path)
+                self.assertEqual(folder.Title(), expected.Title())
+                self.assertEqual(security(folder), security(expected),
+                                 '/'.join(path))
+            self.assertTrue(ISamplesFolder.providedBy(client.samples))
+
+    def test_indexed(self):
+        provision_clients(self.clients, [{'id': 'bulk', 'title': u"Bulk"}])
+        path = '/'.join(self.clients.bulk.getPhysicalPath())
+        catalog = api.portal.get_tool('portal_catalog')
+        self.assertEqual(len(catalog(path=path)), 1 + len(CLIENT_FOLDERS))
+        bika_catalog = api.portal.get_tool('bika_catalog')
+        self.assertEqual(len(bika_catalog(path=path)), 1)
+        self.assertEqual(len(catalog(
+            path=path,
+            object_provides='bika.lims.interfaces.sample.ISamplesFolder')),
+            1)
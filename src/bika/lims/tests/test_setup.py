@@ -28,6 +28,14 @@ class TestSetup(unittest.TestCase):
         from plone.browserlayer import utils
         self.assertIn(IBikaLIMSLayer, utils.registered_layers())
 
+    def test_bika_catalog(self):
+        """Test that bika_catalog is installed and indexes the LIMS."""
+        from bika.lims.catalog import INDEXES
+        catalog = api.portal.get_tool('bika_catalog')
+        for name, meta_type, extra in INDEXES:
+            self.assertIn(name, catalog.indexes())
+        self.assertEqual(len(catalog(portal_type='LIMSRoot')), 0)
+
 
 class TestUninstall(unittest.TestCase):
     layer = BIKA_LIMS_INTEGRATION_TESTING
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Add subscriber tracing tests for this package."""
+import logging
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from zope.configuration import xmlconfig
+
+from bika.lims import tracing
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+
+ZCML = """\
+<configure xmlns="http://namespaces.zope.org/zope"
+           xmlns:bika="http://namespaces.bikalabs.com/lims">
+  <include package="bika.lims" file="meta.zcml" />
+  <bika:tracing threshold="0.25" />
+</configure>
+"""
+
+
+class Records(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestHistogram(unittest.TestCase):
+    """Invocations fall in the first bucket they fit in."""
+
+    def test_histogram(self):
+        counts = [bucket['count'] for bucket in tracing.histogram(
+            [(0.0005, 0, 0), (0.001, 0, 0), (0.003, 0, 0), (6.0, 0, 0)])]
+        self.assertEqual(counts[:3], [2, 0, 1])
+        self.assertEqual(counts[-1], 1)
+        self.assertEqual(sum(counts), 4)
+
+
+class TestTracing(unittest.TestCase):
+    """Traced add subscribers are timed, and slow ones logged."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.records = Records()
+        tracing.logger.addHandler(self.records)
+        tracing.clear()
+
+    def tearDown(self):
+        tracing.logger.removeHandler(self.records)
+        tracing.uninstall()
+        tracing.clear()
+
+    def test_trace(self):
+        tracing.install(0.0)
+        client = api.content.create(self.portal.lims.clients, 'Client',
+                                    id='client-1', title=u"Client")
+        api.content.create(client.configuration.contacts, 'Contact',
+                           id='jane', title=u"Jane", first_name=u"Jane")
+        histograms = tracing.histograms()
+        self.assertEqual(histograms['client.Added']['calls'], 1)
+        self.assertEqual(histograms['contact.WillBeAdded']['calls'], 1)
+        self.assertEqual(sum(bucket['count'] for bucket in
+                             histograms['client.Added']['histogram']), 1)
+        path = '/'.join(client.getPhysicalPath())
+        self.assertTrue([message for message in self.records.messages
+                         if path + '/configuration/contacts/jane' in message])
+
+    def test_off(self):
+        api.content.create(self.portal.lims.clients, 'Client',
+                           id='client-1', title=u"Client")
+        self.assertEqual(tracing.histograms(), {})
+
+    def test_uninstall(self):
+        tracing.install(0.0)
+        tracing.uninstall()
+        api.content.create(self.portal.lims.clients, 'Client',
+                           id='client-1', title=u"Client")
+        self.assertEqual(tracing.histograms(), {})
+
+    def test_directive(self):
+        xmlconfig.string(ZCML)
+        self.assertEqual(tracing.threshold, 0.25)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""Vocabulary tests for this package."""
+import unittest
+
+import transaction
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.interfaces.contact import IContact
+from bika.lims.testing import BIKA_LIMS_FUNCTIONAL_TESTING  # noqa
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.vocabularies import cache
+from bika.lims.vocabularies.cache import MAX_ENTRIES
+from bika.lims.vocabularies.contact import ContactsVocabularyFactory
+from bika.lims.vocabularies.sample import SamplesVocabularyFactory
+
+CONTACTS = 50
+SAMPLES = 5
+
+
+class TestVocabularyLoads(unittest.TestCase):
+    """Count ZODB loads needed to render a vocabulary."""
+
+    layer = BIKA_LIMS_FUNCTIONAL_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.contacts = self.portal.lims.configuration.contacts
+        for x in range(CONTACTS):
+            api.content.create(self.contacts, 'Contact',
+                               id='contact-%s' % x,
+                               title=u"Contact %s" % x,
+                               first_name=u"Contact")
+        transaction.commit()
+        cache.clear()
+
+    def count_loads(self, func):
+        connection = self.portal._p_jar
+        connection.cacheMinimize()
+        connection.getTransferCounts(True)
+        func()
+        return connection.getTransferCounts(True)[0]
+
+    def test_contacts_vocabulary_loads_no_contacts(self):
+        catalog = self.portal.portal_catalog
+        query = {'object_provides': IContact.__identifier__,
+                 'sort_on': 'sortable_title'}
+
+        def with_objects():
+            [(proxy.getObject(), proxy.Title) for proxy in catalog(query)]
+
+        def with_brains():
+            [(term.token, term.title)
+             for term in ContactsVocabularyFactory(self.contacts)]
+
+        before = self.count_loads(with_objects)
+        after = self.count_loads(with_brains)
+        self.assertLessEqual(after + CONTACTS, before)
+
+    def test_term_resolves_selected_value(self):
+        vocabulary = ContactsVocabularyFactory(self.contacts)
+        contact = self.contacts['contact-1']
+        self.assertIn(contact, vocabulary)
+        term = vocabulary.getTermByToken(api.content.get_uuid(contact))
+        self.assertEqual(term.value, contact)
+        self.assertEqual(vocabulary.getTerm(contact).title, u"Contact 1")
+
+
+class TestVocabularyCache(unittest.TestCase):
+    """Catalog rows are cached per LIMS and user until the catalog
+    changes."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    query = {'object_provides': IContact.__identifier__,
+             'sort_on': 'sortable_title'}
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.contacts = self.portal.lims.configuration.contacts
+        for x in range(2):
+            api.content.create(self.contacts, 'Contact',
+                               id='contact-%s' % x,
+                               title=u"Contact %s" % x,
+                               first_name=u"Contact")
+        cache.clear()
+
+    def tearDown(self):
+        cache.MAX_ENTRIES = MAX_ENTRIES
+        cache.clear()
+
+    def rows(self, name='contacts', context=None):
+        return cache.catalog_rows(name, context or self.contacts, self.query)
+
+    def test_hits(self):
+        rows = self.rows()
+        self.assertEqual(len(rows), 2)
+        self.assertIs(self.rows(), rows)
+        info = cache.cache_info()
+        self.assertEqual((info['hits'], info['misses'], info['size']),
+                         (1, 1, 1))
+
+    def test_catalog_change(self):
+        self.rows()
+        api.content.create(self.contacts, 'Contact', id='contact-2',
+                           title=u"Contact 2", first_name=u"Contact")
+        self.assertEqual(len(self.rows()), 3)
+        self.assertEqual(cache.cache_info()['misses'], 2)
+
+    def test_per_user(self):
+        contact = self.contacts['contact-0']
+        contact.manage_permission('View', ['Manager'], 0)
+        contact.reindexObjectSecurity()
+        self.assertEqual(len(self.rows()), 2)
+        setRoles(self.portal, TEST_USER_ID, ['Member'])
+        self.assertNotIn(u"Contact 0",
+                         [title for uid, title in self.rows()])
+        self.assertEqual(cache.cache_info()['size'], 2)
+
+    def test_lims_path(self):
+        other = api.content.create(self.portal, 'LIMSRoot', id='other',
+                                   title=u"Other")
+        api.content.create(other.configuration.contacts, 'Contact',
+                           id='contact-x', title=u"Other contact",
+                           first_name=u"Other")
+        self.assertEqual(len(self.rows()), 2)
+        self.assertEqual([title for uid, title in
+                          self.rows(context=other.configuration.contacts)],
+                         [u"Other contact"])
+
+    def test_eviction(self):
+        cache.MAX_ENTRIES = 2
+        for name in ('a', 'b', 'c'):
+            self.rows(name)
+        info = cache.cache_info()
+        self.assertEqual((info['size'], info['evictions']), (2, 1))
+        self.rows('c')
+        self.rows('a')
+        info = cache.cache_info()
+        self.assertEqual((info['hits'], info['misses']), (1, 4))
+
+
+class TestSamplesSource(unittest.TestCase):
+    """Samples are found by ID or client sample ID prefix, one batch at a
+    time."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        client = self.client = api.content.create(
+            lims.clients, 'Client', id='client-1', title=u"Client")
+        sampletype = api.content.create(
+            lims.configuration.sampletypes, 'SampleType', id='water',
+            title=u"Water", sample_id_prefix=u"W")
+        intid = getUtility(IIntIds).getId(sampletype)
+        self.samples = [
+            addContentToContainer(client.samples, createContent(
+                'Sample', sample_type=RelationValue(intid),
+                client_sample_id=u"cs-%s" % x))
+            for x in range(SAMPLES)]
+        self.source = SamplesVocabularyFactory(lims)
+
+    def ids(self, terms):
+        return [term.title.split()[0] for term in terms]
+
+    def test_search(self):
+        ids = sorted(sample.getId() for sample in self.samples)
+        self.assertEqual(self.ids(self.source.search(u"w")), ids)
+        self.assertEqual(self.ids(self.source.search(ids[2])), [ids[2]])
+        self.assertEqual(self.ids(self.source.search(u"cs-3")),
+                         [self.samples[3].getId()])
+        self.assertEqual(self.source.search(u"x"), [])
+        self.assertEqual(self.source.search(u"  "), [])
+
+    def test_batches(self):
+        ids = sorted(sample.getId() for sample in self.samples)
+        batches = [self.ids(self.source.search(u"W", b_start=start,
+                                               b_size=2))
+                   for start in (0, 2, 4)]
+        self.assertEqual(batches, [ids[:2], ids[2:4], ids[4:]])
+
+    def test_contains(self):
+        sample = self.samples[0]
+        self.assertIn(sample, self.source)
+        self.assertIn(api.content.get_uuid(sample), self.source)
+        self.assertNotIn(u"no-such-uid", self.source)
+        self.assertNotIn(u"", self.source)
+
+    def test_term_by_token(self):
+        sample = self.samples[1]
+        term = self.source.getTermByToken(api.content.get_uuid(sample))
+        self.assertEqual(term.title, u"%s (cs-1)" % sample.getId())
+        self.assertEqual(term.value, sample)
+        self.assertRaises(LookupError, self.source.getTermByToken,
+                          u"no-such-uid")
+
+    def test_client(self):
+        other = api.content.create(self.portal.lims.clients, 'Client',
+                                   id='client-2', title=u"Other")
+        source = SamplesVocabularyFactory(self.client)
+        self.assertEqual(len(source), SAMPLES)
+        self.assertEqual(len(SamplesVocabularyFactory(other)), 0)
+        self.assertEqual(self.ids(SamplesVocabularyFactory(other).search(
+            u"W")), [])
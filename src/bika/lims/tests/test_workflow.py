@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""LIMS workflow tests for this package."""
+import json
+import unittest
+
+from plone import api
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import setRoles
+from plone.dexterity.utils import addContentToContainer
+from plone.dexterity.utils import createContent
+from plone.protect.authenticator import createToken
+from Products.CMFCore.WorkflowCore import WorkflowException
+from z3c.relationfield import RelationValue
+from zope.component import getUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.browser.workflow import BulkTransitionView
+from bika.lims.testing import BIKA_LIMS_INTEGRATION_TESTING  # noqa
+from bika.lims.workflow.definitions import SAMPLE_WORKFLOW
+from bika.lims.workflow.engine import bulk_transition
+from bika.lims.workflow.engine import doTransition
+from bika.lims.workflow.engine import getHistory
+from bika.lims.workflow.engine import getState
+
+SAMPLES = 20
+
+
+class TestWorkflow(unittest.TestCase):
+    """Bulk transitions move samples and reindex their state."""
+
+    layer = BIKA_LIMS_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        lims = self.portal.lims
+        client = api.content.create(lims.clients, 'Client', id='client-1',
+                                    title=u"Client")
+        sampletype = api.content.create(
+            lims.configuration.sampletypes, 'SampleType', id='blood',
+            title=u"Blood", sample_id_prefix=u"B")
+        intid = getUtility(IIntIds).getId(sampletype)
+        self.samples = [
+            addContentToContainer(client.samples, createContent(
+                'Sample', sample_type=RelationValue(intid)))
+            for x in range(SAMPLES)]
+        self.catalog = api.portal.get_tool('bika_catalog')
+
+    def count(self, state):
+        return len(self.catalog(portal_type='Sample', review_state=state))
+
+    def test_bulk_receive(self):
+        self.assertEqual(self.count('sample_due'), SAMPLES)
+        result = bulk_transition(self.samples, 'receive')
+        self.assertEqual(len(result.done), SAMPLES)
+        self.assertEqual(result.skipped, [])
+        self.assertEqual(self.count('sample_due'), 0)
+        self.assertEqual(self.count('sample_received'), SAMPLES)
+        self.assertEqual([entry[:2] for entry in getHistory(self.samples[0])],
+                         [('receive', TEST_USER_ID)])
+
+        result = bulk_transition(self.samples[:2], 'receive')
+        self.assertEqual(result.done, [])
+        self.assertEqual(len(result.skipped), 2)
+        self.assertRaises(WorkflowException, doTransition, self.samples[0],
+                          'cancel')
+
+    def test_guard_once_per_container(self):
+        calls = []
+        transition = SAMPLE_WORKFLOW.transitions['cancel']
+        transition.guard = calls.append
+        try:
+            result = bulk_transition(self.samples, 'cancel')
+        finally:
+            transition.guard = None
+        self.assertEqual(len(calls), 1)
+        # The guard returned None, so nothing was cancelled
+        self.assertEqual(len(result.skipped), SAMPLES)
+        self.assertEqual(getState(self.samples[0]), 'sample_due')
+
+    def test_permission(self):
+        setRoles(self.portal, TEST_USER_ID, ['Analyst'])
+        result = bulk_transition(self.samples, 'receive')
+        self.assertEqual(result.done, [])
+        setRoles(self.portal, TEST_USER_ID, ['LabClerk'])
+        doTransition(self.samples[0], 'receive')
+        self.assertEqual(getState(self.samples[0]), 'sample_received')
+
+    def test_view_authenticator(self):
+        request = self.layer['request']
+        request.method = 'POST'
+        request.form.update({'transition': 'receive',
+                             'uids': [api.content.get_uuid(self.samples[0])]})
+        view = BulkTransitionView(self.portal.lims, request)
+        self.assertIn('error', json.loads(view()))
+        self.assertEqual(request.response.getStatus(), 403)
+        self.assertEqual(getState(self.samples[0]), 'sample_due')
+        request.response.setStatus(200)
+        request.form['_authenticator'] = createToken()
+        self.assertEqual(len(json.loads(view())['done']), 1)
+        self.assertEqual(getState(self.samples[0]), 'sample_received')
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Tracing of the add subscribers.
+
+The handlers that run synchronously while LIMS content is added, and the
+LIMSCreatedEvent notification of a new LIMS root, can be traced by
+switching tracing on in ZCML, e.g. from the instance's zcml-additional:
+
+    <configure xmlns:bika="http://namespaces.bikalabs.com/lims">
+      <bika:tracing threshold="0.5" />
+    </configure>
+
+Every invocation records its wall time, and the bika_catalog queries and
+ZODB loads it caused; times include whatever the handler triggers.
+Invocations slower than threshold seconds are logged with the path of the
+object.  The last WINDOW invocations of each handler are kept for the
+histograms of the @@lims-tracing view.  The directive's `handlers`
+attribute replaces the TRACED handlers.
+"""
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+
+from zope.configuration.fields import GlobalObject
+from zope.configuration.fields import Tokens
+from zope.dottedname.resolve import resolve
+from zope.interface import Interface
+from zope.schema import Float
+
+from bika.lims import profiling
+
+logger = logging.getLogger('bika.lims.tracing')
+
+TRACED = (
+    'bika.lims.subscribers.limsroot.Added',
+    'bika.lims.subscribers.client.Added',
+    'bika.lims.subscribers.contact.WillBeAdded',
+    'bika.lims.subscribers.samplepoint.WillBeAdded',
+    'bika.lims.subscribers.sample.Added',
+)
+
+# Seconds
+THRESHOLD = 0.5
+
+# Invocations kept per handler
+WINDOW = 1000
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Slow invocation threshold in seconds, None while tracing is off
+threshold = None
+
+_lock = Lock()
+_windows = {}
+_calls = {}
+_wrapped = []
+
+
+def _path(obj, event=None):
+    """Path of obj; objects that are about to be added are not in their
+    container yet, so their path is taken from the event.
+    """
+    parent = getattr(event, 'newParent', None)
+    name = getattr(event, 'newName', None)
+    if parent is not None and name:
+        return '/'.join(parent.getPhysicalPath() + (name,))
+    try:
+        return '/'.join(obj.getPhysicalPath())
+    except AttributeError:
+        return repr(obj)
+
+
+def record(name, seconds, queries, loads):
+    with _lock:
+        window = _windows.get(name)
+        if window is None:
+            window = _windows[name] = deque(maxlen=WINDOW)
+        window.append((seconds, queries, loads))
+        _calls[name] = _calls.get(name, 0) + 1
+
+
+@contextmanager
+def trace(name, obj, event=None):
+    """Trace a block of code that handles obj, while tracing is on.
+    """
+    if threshold is None:
+        yield
+        return
+    before = profiling.activity()
+    started = time.time()
+    try:
+        yield
+    finally:
+        seconds = time.time() - started
+        after = profiling.activity()
+        queries = after[0] - before[0]
+        loads = after[2] - before[2]
+        record(name, seconds, queries, loads)
+        if seconds >= threshold:
+            logger.warning("%s took %.1fms for %s (%s catalog queries, "
+                           "%s ZODB loads)", name, seconds * 1000,
+                           _path(obj, event), queries, loads)
+
+
+def _traced(targets):
+    def wrap(handler):
+        if handler not in targets:
+            return None
+        name = '%s.%s' % (handler.__module__.split('.')[-1],
+                          handler.__name__)
+
+        @wraps(handler)
+        def traced(obj, event, *args):
+            with trace(name, obj, event):
+                return handler(obj, event, *args)
+        return traced
+    return wrap
+
+
+def install(seconds=THRESHOLD, handlers=None):
+    """Switch tracing on for handlers, the TRACED ones by default.
+    """
+    global threshold
+    if handlers is None:
+        handlers = [resolve(name) for name in TRACED]
+    with _lock:
+        if threshold is None:
+            _wrapped.append(profiling.wrap_handlers(_traced(set(handlers))))
+            profiling.counting += 1
+        threshold = seconds
+
+
+def uninstall():
+    global threshold
+    with _lock:
+        if threshold is None:
+            return
+        for wrapped in _wrapped:
+            profiling.unwrap_handlers(wrapped)
+        del _wrapped[:]
+        profiling.counting -= 1
+        threshold = None
+
+
+def clear():
+    with _lock:
+        _windows.clear()
+        _calls.clear()
+
+
+def histogram(window):
+    """Count the invocations of a window per BUCKETS bucket.  The last
+    bucket, with no upper bound, holds the slower ones.
+    """
+    counts = [0] * (len(BUCKETS) + 1)
+    for seconds, queries, loads in window:
+        ms = seconds * 1000
+        for x, bound in enumerate(BUCKETS):
+            if ms <= bound:
+                counts[x] += 1
+                break
+        else:
+            counts[-1] += 1
+    return [{'le': bound, 'count': count}
+            for bound, count in zip(BUCKETS + (None,), counts)]
+
+
+def histograms():
+    """Return, per traced handler, its number of calls, and the histogram,
+    percentiles and mean catalog queries and ZODB loads of its recent
+    invocations.
+    """
+    with _lock:
+        windows = dict((name, list(window))
+                       for name, window in _windows.items())
+        calls = dict(_calls)
+    result = {}
+    for name, window in windows.items():
+        count = float(len(window))
+        result[name] = {
+            'calls': calls[name],
+            'recent': len(window),
+            'slow': len([row for row in window
+                         if threshold is not None and row[0] >= threshold]),
+            'histogram': histogram(window),
+            'seconds': profiling.percentiles([row[0] for row in window]),
+            'catalog_queries': sum(row[1] for row in window) / count,
+            'loads': sum(row[2] for row in window) / count,
+        }
+    return result
+
+
+class ITracingDirective(Interface):
+    """Switch tracing of the add subscribers on
+    """
+
+    threshold = Float(
+        title=u"Threshold",
+        description=u"Invocations slower than this many seconds are logged.",
+        required=False,
+        default=THRESHOLD,
+    )
+
+    handlers = Tokens(
+        title=u"Handlers",
+        description=u"Subscribers to trace instead of the default ones.",
+        value_type=GlobalObject(),
+        required=False,
+    )
+
+
+def tracing_directive(_context, threshold=THRESHOLD, handlers=None):
+    # Run after all subscribers are registered
+    _context.action(
+        discriminator=('bika.lims.tracing',),
+        callable=install,
+        args=(threshold, handlers),
+        order=10000,
+    )
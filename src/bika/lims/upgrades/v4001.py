@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from plone import api
+
+from bika.lims.catalog import CATALOGED_INTERFACES
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+
+logger = logging.getLogger('bika.lims')
+
+
+def upgrade(context):
+    """Install bika_catalog and index the existing LIMS content in it.
+    """
+    portal = api.portal.get()
+    setup_catalog(portal)
+
+    catalog = getBikaCatalog(portal)
+    proxies = portal.portal_catalog.unrestrictedSearchResults(
+        object_provides=[iface.__identifier__
+                         for iface in CATALOGED_INTERFACES])
+    for proxy in proxies:
+        catalog.catalog_object(proxy._unrestrictedGetObject())
+    logger.info("Indexed %s objects in bika_catalog", len(proxies))
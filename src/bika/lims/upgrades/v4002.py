@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import transaction
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.config import LARGE_FOLDERS
+from bika.lims.content.container import make_unordered
+
+logger = logging.getLogger('bika.lims')
+
+BATCH_SIZE = 500
+
+
+def upgrade(context):
+    """Move samples, aliquots, analysis requests and the folders holding
+    them to unordered BTree storage, in place.  A transaction is committed
+    every BATCH_SIZE objects, so the step can be re-run if interrupted.
+    """
+    context.runImportStepFromProfile('profile-bika.lims:default', 'typeinfo')
+    portal = api.portal.get()
+
+    folders = []
+    for proxy in portal.portal_catalog.unrestrictedSearchResults(
+            portal_type=['LIMSRoot', 'Client']):
+        parent = proxy._unrestrictedGetObject()
+        for name in LARGE_FOLDERS:
+            if name in parent.objectIds(ordered=False):
+                folders.append(parent[name])
+    migrate(folders, "LIMS folders")
+
+    proxies = getBikaCatalog(portal).unrestrictedSearchResults(
+        portal_type=['Sample', 'Aliquot', 'AnalysisRequest'])
+    migrate((proxy._unrestrictedGetObject() for proxy in proxies),
+            "samples, aliquots and analysis requests")
+
+
+def migrate(objects, label):
+    count = 0
+    for obj in objects:
+        if make_unordered(obj):
+            count += 1
+            if count % BATCH_SIZE == 0:
+                transaction.commit()
+                logger.info("Unordered %s %s", count, label)
+    transaction.commit()
+    logger.info("Unordered %s %s, done", count, label)
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from plone import api
+from zope.interface import alsoProvides
+
+from bika.lims.interfaces.sample import ISamplesFolder
+
+
+def upgrade(context):
+    """Mark the existing samples folders, so that new samples in them are
+    named by the ID server.
+    """
+    portal = api.portal.get()
+    for proxy in portal.portal_catalog.unrestrictedSearchResults(
+            portal_type=['LIMSRoot', 'Client']):
+        parent = proxy._unrestrictedGetObject()
+        if 'samples' in parent.objectIds(ordered=False):
+            alsoProvides(parent.samples, ISamplesFolder)
+            parent.samples.reindexObject(idxs=['object_provides'])
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+from bika.lims.interfaces.analysisservice import IAnalysisService
+
+
+def upgrade(context):
+    """Add the keyword index and column to bika_catalog and index the
+    existing analysis services.
+    """
+    portal = api.portal.get()
+    setup_catalog(portal)
+    catalog = getBikaCatalog(portal)
+    for proxy in catalog.unrestrictedSearchResults(
+            object_provides=IAnalysisService.__identifier__):
+        catalog.catalog_object(proxy._unrestrictedGetObject())
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+from bika.lims.interfaces.samplepoint import ISamplePoint
+from bika.lims.interfaces.sampletype import ISampleType
+
+
+def upgrade(context):
+    """Add the sample_type_uids and sample_point_uids indexes and columns
+    to bika_catalog and index the existing sample types and sample points.
+    """
+    portal = api.portal.get()
+    setup_catalog(portal)
+    catalog = getBikaCatalog(portal)
+    for proxy in catalog.unrestrictedSearchResults(
+            object_provides=[ISampleType.__identifier__,
+                             ISamplePoint.__identifier__]):
+        catalog.catalog_object(proxy._unrestrictedGetObject(),
+                               proxy.getPath(),
+                               idxs=['sample_type_uids', 'sample_point_uids'])
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+from bika.lims.interfaces.limsroot import ILIMSRoot
+from bika.lims.subscribers.limsroot import workflow_permissions
+
+
+def upgrade(context):
+    """Move samples, aliquots and Analysis Requests off DCWorkflow, grant
+    the workflow permissions in every LIMS and index review_state in
+    bika_catalog.
+    """
+    portal = api.portal.get()
+    setup = api.portal.get_tool('portal_setup')
+    setup.runImportStepFromProfile('profile-bika.lims:default', 'workflow',
+                                   run_dependencies=False)
+    for proxy in portal.portal_catalog.unrestrictedSearchResults(
+            object_provides=ILIMSRoot.__identifier__):
+        workflow_permissions(proxy._unrestrictedGetObject())
+
+    setup_catalog(portal)
+    catalog = getBikaCatalog(portal)
+    for proxy in catalog.unrestrictedSearchResults():
+        catalog.catalog_object(proxy._unrestrictedGetObject(),
+                               proxy.getPath(), idxs=['review_state'])
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+from bika.lims.counters import rebuild
+from bika.lims.interfaces.limsroot import ILIMSRoot
+
+
+def upgrade(context):
+    """Add the date_received index and column to bika_catalog and build the
+    dashboard counters of every LIMS.
+    """
+    portal = api.portal.get()
+    setup_catalog(portal)
+    catalog = getBikaCatalog(portal)
+    for proxy in catalog.unrestrictedSearchResults(
+            portal_type=['Sample', 'AnalysisRequest']):
+        catalog.catalog_object(proxy._unrestrictedGetObject(),
+                               proxy.getPath(), idxs=['date_received'])
+    for proxy in portal.portal_catalog.unrestrictedSearchResults(
+            object_provides=ILIMSRoot.__identifier__):
+        rebuild(proxy._unrestrictedGetObject())
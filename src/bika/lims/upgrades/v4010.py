@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+from bika.lims.interfaces.contact import IClientContact
+
+
+def upgrade(context):
+    """Add the username index to bika_catalog and index the existing
+    client contacts.
+    """
+    portal = api.portal.get()
+    setup_catalog(portal)
+    catalog = getBikaCatalog(portal)
+    for proxy in catalog.unrestrictedSearchResults(
+            object_provides=IClientContact.__identifier__):
+        catalog.catalog_object(proxy._unrestrictedGetObject(),
+                               proxy.getPath(), idxs=['username'])
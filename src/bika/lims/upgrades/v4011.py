@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.interfaces.limsroot import ILIMSRoot
+from bika.lims.utils.configversion import setupConfigVersion
+
+
+def upgrade(context):
+    """Create the configuration version counter of every LIMS, so that
+    reading it never writes.
+    """
+    portal = api.portal.get()
+    for proxy in portal.portal_catalog.unrestrictedSearchResults(
+            object_provides=ILIMSRoot.__identifier__):
+        setupConfigVersion(proxy._unrestrictedGetObject())
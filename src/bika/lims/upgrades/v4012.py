@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from plone import api
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.tool import setup_catalog
+
+
+def upgrade(context):
+    """Add the id_key and date_created_key indexes to bika_catalog and
+    index the existing samples, aliquots and Analysis Requests.
+    """
+    portal = api.portal.get()
+    setup_catalog(portal)
+    catalog = getBikaCatalog(portal)
+    for proxy in catalog.unrestrictedSearchResults(
+            portal_type=['Sample', 'Aliquot', 'AnalysisRequest']):
+        catalog.catalog_object(proxy._unrestrictedGetObject(),
+                               proxy.getPath(),
+                               idxs=['id_key', 'date_created_key'])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Adding many objects without per-object events.
+
+Adding content the usual way fires add events for every object, and each
+of them indexes, registers and notifies on its own.  Bulk operations add
+their objects with add_quietly(), then call index_added() once for all of
+them.  Subscribers to add events of these objects are not called.
+"""
+from Products.CMFCore.utils import getToolByName
+from zope.component import queryUtility
+from zope.intid.interfaces import IIntIds
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog import is_cataloged
+from bika.lims.catalog.queue import getIndexQueue
+
+
+def add_quietly(container, obj, workflow=None):
+    """Add obj to container without events, and give it its initial
+    workflow state.  Returns the added object.
+    """
+    container._setObject(obj.id, obj, suppress_events=True)
+    obj = container._getOb(obj.id)
+    if workflow is None:
+        workflow = getToolByName(container, 'portal_workflow')
+    for wf in workflow.getWorkflowsFor(obj):
+        wf.notifyCreated(obj)
+    return obj
+
+
+def index_added(objects):
+    """Register objects added with add_quietly() in the intid utility and
+    index them, in portal_catalog right away and in bika_catalog through
+    the indexing queue.
+    """
+    if not objects:
+        return
+    intids = queryUtility(IIntIds)
+    catalog = getBikaCatalog(objects[0])
+    queue = getIndexQueue()
+    for obj in objects:
+        if intids is not None:
+            intids.register(obj)
+        obj.indexObject()
+        if not is_cataloged(obj):
+            continue
+        if queue is not None:
+            queue.index(obj, catalog)
+        else:
+            catalog.catalog_object(obj)
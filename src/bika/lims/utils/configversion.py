@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Version number of the LIMS configuration.
+
+Structures derived from the configuration of a LIMS (the calculation
+dependency graph, the keyword map, the sample point and sample type
+compatibility map) are cached per process and tagged with this number.  It
+is bumped whenever a service, calculation, sample type or sample point is
+added, edited or removed.  The counter is a BTrees Length,
+whose conflict resolution merges concurrent increments.
+"""
+from BTrees.Length import Length
+from zope.annotation.interfaces import IAnnotations
+
+ANNOTATION_KEY = 'bika.lims.configversion'
+
+
+def _counter(lims, create=True):
+    annotations = IAnnotations(lims)
+    counter = annotations.get(ANNOTATION_KEY)
+    if counter is None and create:
+        counter = annotations[ANNOTATION_KEY] = Length()
+    return counter
+
+
+def setupConfigVersion(lims):
+    """Create the configuration version counter of a new LIMS root.
+    """
+    _counter(lims)
+
+
+def getConfigVersion(lims):
+    """Return the configuration version of a LIMS root, or None while it
+    is being changed in the current transaction.  Caches must not store
+    what they compute from uncommitted configuration.  Reading never
+    writes: a LIMS root without a counter is at version 0.
+    """
+    counter = _counter(lims, create=False)
+    if counter is None:
+        return 0
+    if counter._p_oid is None or counter._p_changed:
+        return None
+    return counter()
+
+
+def bumpConfigVersion(lims):
+    _counter(lims).change(1)
@@ -1,7 +1,25 @@
 # -*- coding: utf-8 -*-
+import threading
+
+import transaction
+from Acquisition import aq_base
 from Products.CMFPlone.interfaces import IPloneSiteRoot
 from bika.lims.interfaces.limsroot import ILIMSRoot
 
+# Containers seen by getLims in the current transaction, by id(), mapped to
+# (container, LIMS root).  Bulk operations resolve the LIMS root for many
+# objects in the same few containers, so after the first object of a
+# container, resolution is a single dictionary lookup.
+_memo = threading.local()
+
+
+def _containers():
+    txn = transaction.get()
+    if getattr(_memo, 'txn', None) is not txn:
+        _memo.txn = txn
+        _memo.containers = {}
+    return _memo.containers
+
 
 def getLims(context):
     """Return the ILIMSRoot instance that is the ancestor of context.
@@ -9,11 +27,37 @@ def getLims(context):
 
     if ILIMSRoot.providedBy(context):
         return context
+    containers = _containers()
+    visited = []
     parent = context.__parent__
-    while not IPloneSiteRoot.providedBy(parent) \
-        and not ILIMSRoot.providedBy(parent):
+    while True:
+        entry = containers.get(id(aq_base(parent)))
+        if entry is not None:
+            lims = entry[1]
+            break
+        if ILIMSRoot.providedBy(parent):
+            lims = parent
+            break
+        if IPloneSiteRoot.providedBy(parent):
+            lims = None
+            break
+        visited.append(parent)
         parent = parent.__parent__
-    if IPloneSiteRoot.providedBy(parent):
+    for container in visited:
+        base = aq_base(container)
+        containers[id(base)] = (base, lims)
+    return lims
+
+
+def getLimsPath(context):
+    """Return the physical path of the LIMS root containing context, or None.
+    Vocabularies are sometimes bound to contexts that are not content
+    (e.g. a datagrid row dict), those are treated as being outside a LIMS.
+    """
+    try:
+        lims = getLims(context)
+    except AttributeError:
+        return None
+    if lims is None:
         return None
-    if ILIMSRoot.providedBy(parent):
-        return parent
+    return lims.getPhysicalPath()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Sample and aliquot families.
+
+Aliquots can hold aliquots of their own, so a sample is the root of a tree
+of aliquots of any depth.  The lineage of a sample or aliquot is the list
+of UIDs from its root sample down to itself.  bika_catalog has it as the
+`lineage` keyword index and metadata column, and the root sample's UID as
+`root_sample`, so that descendants, ancestors and whole families are found
+with a single catalog query, without waking up any objects.  The catalog
+subscribers index moved, copied and removed subtrees object by object, so
+the lineage of every aliquot follows its position.
+
+The functions below take either an object or a bika_catalog brain.
+"""
+from Acquisition import aq_chain
+from plone.uuid.interfaces import IUUID
+from Products.ZCatalog.interfaces import ICatalogBrain
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.interfaces.aliquot import IAliquot
+from bika.lims.interfaces.sample import ISample
+
+
+def getLineage(obj):
+    """Return the UIDs of the root sample and aliquots above obj, and of
+    obj itself, root first.  Raises AttributeError if obj is not in a
+    sample.
+    """
+    if ICatalogBrain.providedBy(obj):
+        return tuple(obj.lineage or ())
+    uids = []
+    for parent in aq_chain(obj):
+        if ISample.providedBy(parent):
+            uids.append(IUUID(parent))
+            uids.reverse()
+            return tuple(uids)
+        if IAliquot.providedBy(parent):
+            uids.append(IUUID(parent))
+    raise AttributeError('lineage')
+
+
+def _uid(obj):
+    if ICatalogBrain.providedBy(obj):
+        return obj.UID
+    return IUUID(obj)
+
+
+def descendants(obj, **query):
+    """Return the brains of the aliquots under obj, at any depth.  Extra
+    catalog query arguments narrow the search down.
+    """
+    uid = _uid(obj)
+    return [proxy for proxy in getBikaCatalog(obj)(lineage=uid, **query)
+            if proxy.UID != uid]
+
+
+def family(obj, **query):
+    """Return the brains of the root sample of obj and all of its aliquots,
+    e.g. family(aliquot, purpose=u"Quality Control").
+    """
+    return getBikaCatalog(obj)(lineage=getLineage(obj)[0], **query)
+
+
+def ancestors(obj):
+    """Return the brains of the root sample and aliquots above obj, root
+    first.
+    """
+    lineage = getLineage(obj)[:-1]
+    if not lineage:
+        return []
+    position = dict((uid, x) for x, uid in enumerate(lineage))
+    return sorted(getBikaCatalog(obj)(UID=list(lineage)),
+                  key=lambda proxy: position[proxy.UID])
+
+
+def root_sample(obj):
+    """Return the brain of the root sample of obj.
+    """
+    for proxy in getBikaCatalog(obj)(UID=getLineage(obj)[0]):
+        return proxy
+    return None
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Helpers for the console scripts."""
+
+
+def zope_object(zope_conf, path, user):
+    """Start Zope with zope_conf, log in as the Zope root user and return
+    the object at path, with its Plone site set up.  Raises ValueError if
+    there is no such user.
+    """
+    import Zope2
+    from AccessControl.SecurityManagement import newSecurityManager
+    from Products.CMFCore.utils import getToolByName
+    from Testing.makerequest import makerequest
+    from zope.component.hooks import setSite
+
+    Zope2.configure(zope_conf)
+    app = makerequest(Zope2.app())
+    obj = app.unrestrictedTraverse(path)
+    setSite(getToolByName(obj, 'portal_url').getPortalObject())
+    acl_user = app.acl_users.getUser(user)
+    if acl_user is None:
+        raise ValueError("No such user in the Zope root: %s" % user)
+    newSecurityManager(None, acl_user.__of__(app.acl_users))
+    return obj
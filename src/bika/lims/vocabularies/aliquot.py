@@ -1,61 +1,34 @@
 # -*- coding: utf-8 -*-
+from binascii import b2a_hex
+
+from Acquisition import aq_chain
 from zope.schema.vocabulary import SimpleVocabulary, SimpleTerm
 
+from bika.lims.interfaces.sample import ISample
+
 
 class AliquotTypesVocabulary():
-    """Vocabulary factory for Contacts
+    """Vocabulary factory for the aliquot types of the enclosing sample's
+    sample type.  Only the sample type is woken up, never its siblings.
     """
 
     def __init__(self):
         pass
 
     def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
-            'object_provides': 'bika.lims.interfaces.contact.IContact',
-            'sort_on': 'sortable_title',
-        })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
+        for parent in aq_chain(context):
+            if ISample.providedBy(parent):
+                break
+        else:
+            return SimpleVocabulary([])
+        relation = getattr(parent, 'sample_type', None)
+        sampletype = relation.to_object if relation else None
+        rows = getattr(sampletype, 'aliquot_types', None) or []
+        terms = [SimpleTerm(row['title'],
+                            token=b2a_hex(row['title'].encode('utf-8')),
+                            title=row['title'])
+                 for row in rows if row.get('title')]
         return SimpleVocabulary(terms)
 
 
 AliquotTypesFactory = AliquotTypesVocabulary()
-
-
-class ClientAliquotTypes():
-    """Vocabulary factory showing only Client Contacts.
-    """
-
-    def __init__(self):
-        pass
-
-    def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
-            'object_provides': 'bika.lims.interfaces.contact.IClientContact',
-            'sort_on': 'sortable_title',
-        })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
-
-
-ClientAliquotTypesFactory = ClientAliquotTypes()
-
-
-class LabAliquotTypes():
-    """Vocabulary factory showing only Lab Contacts
-    """
-
-    def __init__(self):
-        pass
-
-    def __call__(self, context):
-
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
-
-
-LabAliquotTypesFactory = LabAliquotTypes()
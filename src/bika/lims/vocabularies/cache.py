@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Shared cache for the catalog-backed vocabulary factories.
+
+Entries are keyed by vocabulary name, LIMS root and the catalog security
+tokens of the current user.  Each entry remembers the bika_catalog change
+counter it was computed at, so it goes stale as soon as any LIMS object is
+catalogued or uncatalogued.  Only plain tuples are stored, never brains or
+persistent objects, so entries can be shared safely between threads.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from AccessControl import getSecurityManager
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.utils.limsroot import getLimsPath
+
+MAX_ENTRIES = 256
+
+_lock = Lock()
+_entries = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def catalog_rows(name, context, query):
+    """Return the (UID, Title) rows of a catalog query, served from the
+    cache while the catalog has not changed.
+    """
+    catalog = getBikaCatalog(context)
+    user = getSecurityManager().getUser()
+    limspath = getLimsPath(context)
+    key = (name,
+           limspath,
+           tuple(sorted(catalog._listAllowedRolesAndUsers(user))))
+    counter = catalog.getCounter()
+
+    with _lock:
+        entry = _entries.pop(key, None)
+        if entry is not None and entry[0] == counter:
+            _entries[key] = entry
+            _stats['hits'] += 1
+            return entry[1]
+        _stats['misses'] += 1
+
+    query = dict(query)
+    if limspath is not None:
+        query['path'] = '/'.join(limspath)
+    rows = tuple((proxy.UID, proxy.Title) for proxy in catalog(query))
+
+    with _lock:
+        _entries.pop(key, None)
+        _entries[key] = (counter, rows)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+    return rows
+
+
+def cache_info():
+    """Return the hit/miss counters and the current size of the cache.
+    """
+    with _lock:
+        info = dict(_stats)
+        info['size'] = len(_entries)
+    info['maxsize'] = MAX_ENTRIES
+    return info
+
+
+def clear():
+    """Drop all entries and reset the counters.
+    """
+    with _lock:
+        _entries.clear()
+        for key in _stats:
+            _stats[key] = 0
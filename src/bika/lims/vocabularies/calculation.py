@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from bika.lims.vocabularies.cache import catalog_rows
+from bika.lims.vocabularies.uid import UIDVocabulary
+
+
+class CalculationsVocabulary():
+    """Vocabulary factory for Calculations
+    """
+
+    def __init__(self):
+        pass
+
+    def __call__(self, context):
+        rows = catalog_rows('bika.lims.vocabularies.Calculations', context, {
+            'object_provides':
+                'bika.lims.interfaces.calculation.ICalculation',
+            'sort_on': 'sortable_title',
+        })
+        return UIDVocabulary(rows)
+
+
+CalculationsVocabularyFactory = CalculationsVocabulary()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from zope.schema.vocabulary import SimpleVocabulary, SimpleTerm
+from bika.lims.vocabularies.cache import catalog_rows
+from bika.lims.vocabularies.uid import UIDVocabulary
 
 
 class ContactsVocabulary():
@@ -10,14 +11,11 @@ class ContactsVocabulary():
         pass
 
     def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
+        rows = catalog_rows('bika.lims.vocabularies.Contacts', context, {
             'object_provides': 'bika.lims.interfaces.contact.IContact',
             'sort_on': 'sortable_title',
         })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
+        return UIDVocabulary(rows)
 
 
 ContactsVocabularyFactory = ContactsVocabulary()
@@ -31,14 +29,11 @@ class ClientContactsVocabulary():
         pass
 
     def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
+        rows = catalog_rows('bika.lims.vocabularies.ClientContacts', context, {
             'object_provides': 'bika.lims.interfaces.contact.IClientContact',
             'sort_on': 'sortable_title',
         })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
+        return UIDVocabulary(rows)
 
 
 ClientContactsVocabularyFactory = ClientContactsVocabulary()
@@ -52,14 +47,11 @@ class LabContactsVocabulary():
         pass
 
     def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
+        rows = catalog_rows('bika.lims.vocabularies.LabContacts', context, {
             'object_provides': 'bika.lims.interfaces.contact.ILabContact',
             'sort_on': 'sortable_title',
         })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
+        return UIDVocabulary(rows)
 
 
 LabContactsVocabularyFactory = LabContactsVocabulary()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from zope.schema.vocabulary import SimpleVocabulary, SimpleTerm
+from bika.lims.vocabularies.cache import catalog_rows
+from bika.lims.vocabularies.uid import UIDVocabulary
 
 
 class DepartmentsVocabulary():
@@ -10,14 +11,11 @@ class DepartmentsVocabulary():
         pass
 
     def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
+        rows = catalog_rows('bika.lims.vocabularies.Departments', context, {
             'object_provides': 'bika.lims.interfaces.department.IDepartment',
             'sort_on': 'sortable_title',
         })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
+        return UIDVocabulary(rows)
 
 
 DepartmentsVocabularyFactory = DepartmentsVocabulary()
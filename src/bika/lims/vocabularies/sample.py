@@ -1,5 +1,99 @@
 # -*- coding: utf-8 -*-
-from zope.schema.vocabulary import SimpleVocabulary, SimpleTerm
+from z3c.formwidget.query.interfaces import IQuerySource
+from zope.interface import implementer
+
+from bika.lims.clientsecurity import context_client
+from bika.lims.clientsecurity import search
+from bika.lims.interfaces.sample import ISample
+from bika.lims.utils.limsroot import getLimsPath
+from bika.lims.vocabularies.uid import UIDTerm
+from bika.lims.vocabularies.uid import to_uid
+
+BATCH_SIZE = 20
+
+# Indexes searched for search-as-you-type prefix matches
+PREFIX_INDEXES = ('id', 'client_sample_id')
+
+
+def prefix_range(prefix):
+    """Range query matching every index value that starts with prefix.
+    """
+    return {'query': (prefix, prefix + u'\uffff'), 'range': 'min:max'}
+
+
+@implementer(IQuerySource)
+class SamplesSource(object):
+    """Queryable source of Samples.
+
+    Never enumerates the samples in the site: search() prefix-matches the
+    sample ID and the client sample ID and returns one batch of a sort_limit
+    query, and membership is checked with a single UID lookup.  Inside a
+    client, only the samples of that client are found.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.base_query = {'object_provides': ISample.__identifier__}
+        limspath = getLimsPath(context)
+        if limspath is not None:
+            self.base_query['path'] = '/'.join(limspath)
+        client = context_client(context)
+        if client is not None:
+            self.base_query['client'] = client
+
+    def _query(self, **kw):
+        query = dict(self.base_query)
+        query.update(kw)
+        return search(self.context, **query)
+
+    def _term(self, proxy):
+        title = proxy.getId
+        if proxy.client_sample_id:
+            title = u"%s (%s)" % (title, proxy.client_sample_id)
+        return UIDTerm(proxy.UID, title)
+
+    def _lookup(self, uid):
+        if uid:
+            for proxy in self._query(UID=uid):
+                return self._term(proxy)
+        raise LookupError(uid)
+
+    def __contains__(self, value):
+        uid = to_uid(value)
+        return bool(uid) and len(self._query(UID=uid)) > 0
+
+    def __iter__(self):
+        return (self._term(proxy) for proxy in self._query(sort_on='id'))
+
+    def __len__(self):
+        return len(self._query())
+
+    def getTerm(self, value):
+        term = self._lookup(to_uid(value))
+        if not isinstance(value, basestring):
+            term._value = value
+        return term
+
+    def getTermByToken(self, token):
+        return self._lookup(token)
+
+    def search(self, query_string, b_start=0, b_size=BATCH_SIZE):
+        """Return one batch of the samples whose ID or client sample ID
+        starts with query_string, in sample ID order.
+        """
+        query_string = query_string.strip()
+        if not query_string:
+            return []
+        prefixes = set([query_string, query_string.upper()])
+        limit = b_start + b_size
+        found = {}
+        for index in PREFIX_INDEXES:
+            for prefix in prefixes:
+                for proxy in self._query(sort_on='id', sort_limit=limit,
+                                         **{index: prefix_range(prefix)}):
+                    found[proxy.UID] = proxy
+        proxies = sorted(found.values(), key=lambda proxy: proxy.getId)
+        return [self._term(proxy) for proxy in proxies[b_start:limit]]
 
 
 class SamplesVocabulary():
@@ -10,14 +104,7 @@ class SamplesVocabulary():
         pass
 
     def __call__(self, context):
-        catalog = context.portal_catalog
-        proxies = catalog({
-            'object_provides': 'bika.lims.interfaces.sample.ISample',
-            'sort_on': 'sortable_title',
-        })
-        terms = [SimpleTerm(proxy.getObject(), title=proxy.Title)
-                 for proxy in proxies]
-        return SimpleVocabulary(terms)
+        return SamplesSource(context)
 
 
 SamplesVocabularyFactory = SamplesVocabulary()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Vocabularies built from catalog metadata only.
+
+Terms carry the UID as token and the catalog Title as title.  The content
+object is only woken up when a term's value is requested, which happens
+when a submitted token is converted back to a field value.  Rendering a
+dropdown therefore loads no content objects at all.
+"""
+from plone.app.uuid.utils import uuidToObject
+from plone.uuid.interfaces import IUUID
+from zope.interface import implementer
+from zope.schema.interfaces import ITitledTokenizedTerm
+from zope.schema.interfaces import IVocabularyTokenized
+
+
+def to_uid(value):
+    """Return the UID of value, which may be a UID string or an object.
+    """
+    if isinstance(value, basestring):
+        return value
+    return IUUID(value, None)
+
+
+@implementer(ITitledTokenizedTerm)
+class UIDTerm(object):
+    """A term whose value is resolved from its UID token on first access.
+    """
+
+    def __init__(self, uid, title):
+        self.token = uid
+        self.title = title
+
+    @property
+    def value(self):
+        try:
+            return self._value
+        except AttributeError:
+            self._value = uuidToObject(self.token)
+            return self._value
+
+
+@implementer(IVocabularyTokenized)
+class UIDVocabulary(object):
+    """Vocabulary of UIDTerms, in catalog order.
+
+    Values may be given either as content objects or as UIDs.  Only plain
+    strings are held, so instances can be shared between threads; the
+    lazily resolved values live on per-call term copies.
+    """
+
+    def __init__(self, rows):
+        self._rows = tuple(rows)
+        self._titles = dict(self._rows)
+
+    def __contains__(self, value):
+        return to_uid(value) in self._titles
+
+    def __iter__(self):
+        return (UIDTerm(uid, title) for uid, title in self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def getTerm(self, value):
+        uid = to_uid(value)
+        if uid not in self._titles:
+            raise LookupError(value)
+        term = UIDTerm(uid, self._titles[uid])
+        if not isinstance(value, basestring):
+            term._value = value
+        return term
+
+    def getTermByToken(self, token):
+        if token not in self._titles:
+            raise LookupError(token)
+        return UIDTerm(token, self._titles[token])
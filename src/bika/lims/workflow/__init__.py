@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+from bika.lims.workflow import definitions  # noqa
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""The workflows of samples, aliquots and Analysis Requests.
+"""
+from bika.lims import messagefactory as _
+from bika.lims.permissions import CancelAndReinstate
+from bika.lims.permissions import DisposeSample
+from bika.lims.permissions import PublishResults
+from bika.lims.permissions import ReceiveSample
+from bika.lims.permissions import SubmitResults
+from bika.lims.permissions import VerifyResults
+from bika.lims.workflow.engine import Transition
+from bika.lims.workflow.engine import Workflow
+from bika.lims.workflow.engine import registerWorkflow
+
+SAMPLE_WORKFLOW = Workflow(
+    'bika_sample_workflow',
+    initial='sample_due',
+    states=[
+        ('sample_due', _(u"Sample due")),
+        ('sample_received', _(u"Received")),
+        ('disposed', _(u"Disposed")),
+        ('cancelled', _(u"Cancelled")),
+    ],
+    transitions=[
+        Transition('receive', _(u"Receive"), ['sample_due'],
+                   'sample_received', ReceiveSample),
+        Transition('dispose', _(u"Dispose"), ['sample_received'],
+                   'disposed', DisposeSample),
+        Transition('cancel', _(u"Cancel"), ['sample_due'], 'cancelled',
+                   CancelAndReinstate),
+        Transition('reinstate', _(u"Reinstate"), ['cancelled'],
+                   'sample_due', CancelAndReinstate),
+    ])
+
+ALIQUOT_WORKFLOW = Workflow(
+    'bika_aliquot_workflow',
+    initial='available',
+    states=[
+        ('available', _(u"Available")),
+        ('disposed', _(u"Disposed")),
+    ],
+    transitions=[
+        Transition('dispose', _(u"Dispose"), ['available'], 'disposed',
+                   DisposeSample),
+    ])
+
+AR_WORKFLOW = Workflow(
+    'bika_ar_workflow',
+    initial='sample_due',
+    states=[
+        ('sample_due', _(u"Sample due")),
+        ('sample_received', _(u"Received")),
+        ('to_be_verified', _(u"To be verified")),
+        ('verified', _(u"Verified")),
+        ('published', _(u"Published")),
+        ('cancelled', _(u"Cancelled")),
+    ],
+    transitions=[
+        Transition('receive', _(u"Receive"), ['sample_due'],
+                   'sample_received', ReceiveSample),
+        Transition('submit', _(u"Submit"), ['sample_received'],
+                   'to_be_verified', SubmitResults),
+        Transition('retract', _(u"Retract"), ['to_be_verified'],
+                   'sample_received', VerifyResults),
+        Transition('verify', _(u"Verify"), ['to_be_verified'], 'verified',
+                   VerifyResults),
+        Transition('publish', _(u"Publish"), ['verified'], 'published',
+                   PublishResults),
+        Transition('cancel', _(u"Cancel"), ['sample_due', 'sample_received'],
+                   'cancelled', CancelAndReinstate),
+        Transition('reinstate', _(u"Reinstate"), ['cancelled'],
+                   'sample_due', CancelAndReinstate),
+    ])
+
+registerWorkflow(SAMPLE_WORKFLOW, 'Sample')
+registerWorkflow(ALIQUOT_WORKFLOW, 'Aliquot')
+registerWorkflow(AR_WORKFLOW, 'AnalysisRequest')
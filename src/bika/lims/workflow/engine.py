@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Workflow engine for samples, aliquots and Analysis Requests.
+
+These types are not bound to DCWorkflow.  Their workflows are defined in
+Python (see bika.lims.workflow.definitions) and kept deliberately small:
+a state is a plain string attribute of the object, absent until the first
+transition, so creating content writes no workflow data at all.  Each
+transition appends one (transition, actor, time) tuple to the object's
+history.  States do not change permissions; who may do a transition is
+decided by its guard permission and guard function.
+
+bulk_transition() moves many objects at once, e.g. a rack of samples
+being received.  Guards are evaluated once per container in the batch,
+not per object, and only the state related indexes of bika_catalog
+(review_state and date_received) are updated, through the indexing queue.
+One BulkTransitionEvent is notified for the whole batch.
+"""
+import time
+from datetime import datetime
+
+from AccessControl import getSecurityManager
+from Acquisition import aq_base
+from Acquisition import aq_inner
+from Acquisition import aq_parent
+from Products.CMFCore.WorkflowCore import WorkflowException
+from zope.event import notify
+
+from bika.lims.catalog import getBikaCatalog
+from bika.lims.catalog.queue import getIndexQueue
+from bika.lims.events import BulkTransitionEvent
+
+STATE_ATTR = '_review_state'
+HISTORY_ATTR = '_review_history'
+
+STATE_INDEXES = ('review_state', 'date_received')
+
+# Workflows by portal_type
+WORKFLOWS = {}
+
+
+class Transition(object):
+    """A transition from any of `sources` to `target`.  The user needs
+    `permission` on the container of the objects, and guard(container),
+    if set, must return True.
+    """
+
+    def __init__(self, id, title, sources, target, permission=None,
+                 guard=None):
+        self.id = id
+        self.title = title
+        self.sources = frozenset(sources)
+        self.target = target
+        self.permission = permission
+        self.guard = guard
+
+    def allowed(self, container):
+        if self.permission and not getSecurityManager().checkPermission(
+                self.permission, container):
+            return False
+        return self.guard is None or bool(self.guard(container))
+
+
+class Workflow(object):
+    """States, as (id, title) pairs, and transitions of a workflow.
+    """
+
+    def __init__(self, id, initial, states, transitions):
+        self.id = id
+        self.initial = initial
+        self.states = tuple(states)
+        self.titles = dict(self.states)
+        self.transitions = dict((transition.id, transition)
+                                for transition in transitions)
+
+    def getState(self, obj):
+        return getattr(aq_base(obj), STATE_ATTR, None) or self.initial
+
+    def available(self, obj):
+        """Return the ids of the transitions the current user can do on
+        obj.
+        """
+        state = self.getState(obj)
+        container = aq_parent(aq_inner(obj))
+        return sorted(transition.id
+                      for transition in self.transitions.values()
+                      if state in transition.sources and
+                      transition.allowed(container))
+
+
+def registerWorkflow(workflow, *portal_types):
+    for portal_type in portal_types:
+        WORKFLOWS[portal_type] = workflow
+
+
+def getWorkflow(obj):
+    """Return the workflow of obj, or None if it has none.
+    """
+    return WORKFLOWS.get(getattr(aq_base(obj), 'portal_type', None))
+
+
+def getState(obj):
+    """Return the state of obj, or None if it has no workflow.
+    """
+    workflow = getWorkflow(obj)
+    if workflow is None:
+        return None
+    return workflow.getState(obj)
+
+
+def getHistory(obj):
+    """Return the (transition, actor, time) tuples of obj, oldest first.
+    """
+    return getattr(aq_base(obj), HISTORY_ATTR, ())
+
+
+class BulkResult(object):
+    """Objects that were moved by a bulk transition, and (object, reason)
+    pairs of those that were not.
+    """
+
+    def __init__(self, transition):
+        self.transition = transition
+        self.done = []
+        self.skipped = []
+
+
+def bulk_transition(objects, transition_id):
+    """Do a transition on many objects.  Objects whose workflow, state or
+    guards do not allow it are skipped.  Returns a BulkResult.
+    """
+    result = BulkResult(transition_id)
+    previous = []
+    actor = getSecurityManager().getUser().getId()
+    now = int(time.time())
+    guards = {}
+    queue = getIndexQueue()
+    for obj in objects:
+        workflow = getWorkflow(obj)
+        transition = workflow and workflow.transitions.get(transition_id)
+        if transition is None:
+            result.skipped.append((obj, u"No such transition"))
+            continue
+        state = workflow.getState(obj)
+        if state not in transition.sources:
+            result.skipped.append(
+                (obj, u"Not possible in state %s" % state))
+            continue
+        container = aq_parent(aq_inner(obj))
+        key = (workflow.id, transition_id, container.getPhysicalPath())
+        allowed = guards.get(key)
+        if allowed is None:
+            allowed = guards[key] = transition.allowed(container)
+        if not allowed:
+            result.skipped.append((obj, u"Not allowed"))
+            continue
+        setattr(obj, STATE_ATTR, transition.target)
+        setattr(obj, HISTORY_ATTR,
+                getHistory(obj) + ((transition_id, actor, now),))
+        if queue is not None:
+            queue.index(obj, getBikaCatalog(obj), STATE_INDEXES)
+        else:
+            getBikaCatalog(obj).catalog_object(obj, idxs=list(STATE_INDEXES))
+        result.done.append(obj)
+        previous.append(state)
+    if result.done:
+        notify(BulkTransitionEvent(transition_id, result.done, previous))
+    return result
+
+
+def doTransition(obj, transition_id):
+    """Do a transition on one object.  Raises WorkflowException if it is
+    not possible.
+    """
+    result = bulk_transition([obj], transition_id)
+    if result.skipped:
+        raise WorkflowException(result.skipped[0][1])
+
+
+def getTransitionDate(obj, transition_id):
+    """Return the time of the last transition_id of obj, as a datetime, or
+    None.
+    """
+    for transition, actor, when in reversed(getHistory(obj)):
+        if transition == transition_id:
+            return datetime.fromtimestamp(when)
+    return None